@@ -1,10 +1,47 @@
+import os
 import sys
-from PyQt6.QtWidgets import QApplication
-from modules.notepad import Notepad
+from modules.startupProfiler import StartupProfiler
 
 if __name__ == '__main__':
-    app = QApplication(sys.argv)
-    notepad = Notepad(app)
-    notepad.show()
+    profiler = StartupProfiler.shared()
+    if "--profile-startup" in sys.argv:
+        sys.argv.remove("--profile-startup")
+        profiler.enable()
+    new_instance = "--new-instance" in sys.argv
+    if new_instance:
+        sys.argv.remove("--new-instance")
+    paths = [os.path.abspath(argument) for argument in sys.argv[1:] if not argument.startswith("-")]
 
-    sys.exit(app.exec())
\ No newline at end of file
+    # A running instance opens the files instead, before anything heavy is loaded.
+    from modules.singleInstance import InstanceServer, forward
+    if not new_instance and forward(paths):
+        sys.exit(0)
+
+    with profiler.phase("import modules"):
+        from PyQt6.QtCore import QTimer
+        from PyQt6.QtWidgets import QApplication
+        from modules.notepad import Notepad
+
+    with profiler.phase("QApplication"):
+        app = QApplication(sys.argv)
+    server = None
+    if not new_instance:
+        server = InstanceServer(app)
+        if not server.listen() and forward(paths):
+            sys.exit(0)
+    with profiler.phase("Notepad"):
+        notepad = Notepad(app)
+    if server is not None:
+        server.paths_received.connect(notepad.open_paths)
+    if paths:
+        notepad.file_manager.open_files(paths)
+    with profiler.phase("show"):
+        notepad.show()
+    profiler.mark("window shown")
+
+    if profiler.enabled:
+        QTimer.singleShot(0, lambda: profiler.mark("first event loop turn"))
+        # Late enough to include the deferred explorer and the update check.
+        QTimer.singleShot(2500, profiler.report)
+
+    sys.exit(app.exec())
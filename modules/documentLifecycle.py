@@ -0,0 +1,113 @@
+import os
+import time
+from PyQt6.QtCore import QTimer
+from modules.editor import Editor
+from modules.fileLoader import LoadingTab, PlaceholderTab
+from modules.largeFileViewer import LargeFileView
+
+# Rough memory cost of an open document, measured with Qt 6: the text is held
+# as UTF-16 and every block (line) carries its own layout and format data.
+CHAR_BYTES = 2
+BLOCK_BYTES = 600
+BUDGET_CHECK_MS = 30000
+
+
+class DocumentLifecycle:
+    # Frees the widgets of closed tabs and keeps the open documents within a
+    # memory budget by hibernating the least recently used inactive editors:
+    # their text (if it is not on disk) and cursor go to the session store and
+    # the tab becomes a placeholder that is materialized again on activation.
+    def __init__(self, notepad):
+        self.notepad = notepad
+        self.last_used = {}
+        self.budget_timer = QTimer(notepad)
+        self.budget_timer.timeout.connect(self.enforce_budget)
+        self.budget_timer.start(BUDGET_CHECK_MS)
+
+    def touch(self, widget):
+        self.last_used[widget] = time.monotonic()
+
+    def close_tab(self, index):
+        tab_widget = self.notepad.tab_widget
+        file_manager = self.notepad.file_manager
+        widget = tab_widget.widget(index)
+        self.last_used.pop(widget, None)
+        if isinstance(widget, LoadingTab):
+            file_manager.cancel_loading(widget)
+            return
+        tab_widget.removeTab(index)
+        if isinstance(widget, LargeFileView):
+            widget.release()
+        elif isinstance(widget, Editor):
+            file_manager.finish_save(widget)
+            widget.cancel_load()
+            self._forget(widget, file_manager.file_paths.pop(widget, None))
+            self.notepad.session_store.detach(widget)
+        widget.deleteLater()
+
+    @staticmethod
+    def estimate(widget):
+        if isinstance(widget, Editor):
+            document = widget.document()
+            return document.characterCount() * CHAR_BYTES + document.blockCount() * BLOCK_BYTES
+        return 0
+
+    def memory_report(self):
+        tab_widget = self.notepad.tab_widget
+        report = []
+        for i in range(tab_widget.count()):
+            widget = tab_widget.widget(i)
+            if isinstance(widget, PlaceholderTab):
+                state = "hibernated"
+            elif isinstance(widget, LoadingTab):
+                state = "loading"
+            elif isinstance(widget, LargeFileView):
+                state = "memory-mapped"
+            else:
+                state = "loaded"
+            report.append((tab_widget.tabText(i), self.estimate(widget), state))
+        return report
+
+    def enforce_budget(self):
+        budget = self.notepad.settings.get_memory_budget_mb() * 1024 * 1024
+        tab_widget = self.notepad.tab_widget
+        file_manager = self.notepad.file_manager
+        editors = [tab_widget.widget(i) for i in range(tab_widget.count())]
+        editors = [widget for widget in editors if isinstance(widget, Editor)]
+        total = sum(self.estimate(editor) for editor in editors)
+        if total <= budget:
+            return
+        current = tab_widget.currentWidget()
+        candidates = [editor for editor in editors
+                      if editor is not current and editor in file_manager.file_paths
+                      and editor not in file_manager.saving and not editor.isReadOnly()]
+        candidates.sort(key=lambda editor: self.last_used.get(editor, 0))
+        for editor in candidates:
+            if total <= budget:
+                break
+            size = self.estimate(editor)
+            if self.hibernate(editor):
+                total -= size
+
+    def hibernate(self, editor):
+        file_manager = self.notepad.file_manager
+        store = self.notepad.session_store
+        file_path = file_manager.file_paths[editor]
+        try:
+            tab = store.snapshot(editor, file_path, editor)
+        except OSError as e:
+            self.notepad.statusBar().showMessage(f"Unable to hibernate {os.path.basename(file_path)}: {str(e)}", 10000)
+            return False
+        placeholder = PlaceholderTab(tab)
+        store.adopt(placeholder, tab, editor.edit_revision)
+        title = self.notepad.tab_widget.tabText(self.notepad.tab_widget.indexOf(editor))
+        del file_manager.file_paths[editor]
+        self._forget(editor, file_path)
+        self.last_used.pop(editor, None)
+        file_manager.replace_tab(editor, placeholder, title)
+        return True
+
+    def _forget(self, editor, file_path):
+        self.notepad.file_watcher.forget(editor)
+        if file_path and file_path not in self.notepad.file_manager.file_paths.values():
+            self.notepad.file_watcher.unwatch(file_path)
@@ -0,0 +1,161 @@
+import json
+import os
+import struct
+import time
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QTextCursor
+
+# A journal is a JSON header line naming the base text it applies to, then one
+# record per edit: position, characters removed and the UTF-8 length of the
+# inserted text, followed by that text. Positions are QTextDocument positions.
+RECORD = struct.Struct("<III")
+FLUSH_MS = 500
+FSYNC_INTERVAL = 1.0
+EMPTY_BASE = {"path": None}
+
+
+def file_base(path):
+    # A base is identified by the size and mtime of the file holding it, so a
+    # journal is never replayed onto text it was not recorded against.
+    if path is None:
+        return EMPTY_BASE
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return {"path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def read_journal(log_path):
+    try:
+        with open(log_path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return None, []
+    header_end = data.find(b"\n")
+    if header_end == -1:
+        return None, []
+    try:
+        base = json.loads(data[:header_end])
+    except ValueError:
+        return None, []
+    records = []
+    position = header_end + 1
+    # A record cut off by a crash ends the journal.
+    while position + RECORD.size <= len(data):
+        start, removed, length = RECORD.unpack_from(data, position)
+        position += RECORD.size
+        if position + length > len(data):
+            break
+        try:
+            text = data[position:position + length].decode("utf-8", "surrogatepass")
+        except UnicodeDecodeError:
+            break
+        records.append((start, removed, text))
+        position += length
+    return base, records
+
+
+def replay(document, records):
+    # Applies records to the base text outside the undo history. Returns the
+    # number applied; a record that does not fit the text stops the replay.
+    document.setUndoRedoEnabled(False)
+    cursor = QTextCursor(document)
+    applied = 0
+    try:
+        for start, removed, text in records:
+            end = start + removed
+            if end > document.characterCount() - 1:
+                break
+            cursor.setPosition(start)
+            cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+            cursor.insertText(text)
+            applied += 1
+    finally:
+        document.setUndoRedoEnabled(True)
+    return applied
+
+
+class EditJournal:
+    # Appends every edit of a document to its journal. Records are buffered and
+    # written shortly after the edit, so the cost of crash safety follows what
+    # was typed rather than the size of the document.
+    def __init__(self, editor, log_path, base, resume=False):
+        self.editor = editor
+        self.log_path = log_path
+        self.base = base
+        self._buffer = bytearray()
+        self._last_sync = 0.0
+        self._timer = QTimer(editor)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self._fd = os.open(log_path, os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, "O_BINARY", 0), 0o600)
+        if resume:
+            self.size = os.fstat(self._fd).st_size
+            self._length = editor.document().characterCount() - 1
+        else:
+            self.restart(base)
+        editor.document().contentsChange.connect(self._record)
+
+    def restart(self, base):
+        # Called once the base holds the current text; what was recorded so
+        # far is part of it now.
+        self.base = base
+        self._buffer.clear()
+        self._length = self.editor.document().characterCount() - 1
+        os.ftruncate(self._fd, 0)
+        header = json.dumps(base).encode("utf-8") + b"\n"
+        os.write(self._fd, header)
+        self.size = len(header)
+        self._sync()
+
+    def _record(self, position, removed, added):
+        document = self.editor.document()
+        # Changes reaching the end of the document count the final block
+        # separator, which is not part of the text, as removed or added.
+        length = document.characterCount() - 1
+        removed = max(min(removed, self._length - position), 0)
+        added = max(min(added, length - position), 0)
+        self._length = length
+        text = ""
+        if added:
+            cursor = QTextCursor(document)
+            cursor.setPosition(position)
+            cursor.setPosition(position + added, QTextCursor.MoveMode.KeepAnchor)
+            text = cursor.selectedText().replace("\u2029", "\n")
+        data = text.encode("utf-8", "surrogatepass")
+        self._buffer += RECORD.pack(position, removed, len(data))
+        self._buffer += data
+        if not self._timer.isActive():
+            self._timer.start(FLUSH_MS)
+
+    def flush(self):
+        if self._fd is None or not self._buffer:
+            return
+        os.write(self._fd, self._buffer)
+        self.size += len(self._buffer)
+        self._buffer.clear()
+        if time.monotonic() - self._last_sync >= FSYNC_INTERVAL:
+            self._sync()
+
+    def _sync(self):
+        os.fsync(self._fd)
+        self._last_sync = time.monotonic()
+
+    def close(self, delete=False):
+        if self._fd is None:
+            return
+        try:
+            self.editor.document().contentsChange.disconnect(self._record)
+        except (TypeError, RuntimeError):
+            pass
+        self._timer.stop()
+        if not delete:
+            self.flush()
+        os.close(self._fd)
+        self._fd = None
+        if delete:
+            try:
+                os.remove(self.log_path)
+            except OSError:
+                pass
@@ -1,27 +1,138 @@
-from PyQt6.QtWidgets import QPlainTextEdit, QWidget, QLineEdit, QHBoxLayout, QPushButton
-from PyQt6.QtGui import QTextCursor, QKeySequence
-from PyQt6.QtCore import Qt
+import re
+import time
+from PyQt6.QtWidgets import QPlainTextEdit, QWidget, QLineEdit, QHBoxLayout, QVBoxLayout, QApplication, QPushButton, QToolButton, QLabel, QTextEdit
+from PyQt6.QtGui import QTextCursor, QKeySequence, QColor, QTextCharFormat
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from modules.syntaxHightlighter import SyntaxHighlighter
+from modules.searchIndex import SearchIndex, compile_pattern, substitute, utf16_length
 
+# Documents with at least this many lines are highlighted lazily: the visible
+# lines right away, the rest in the background.
+LAZY_HIGHLIGHT_LINES = 2000
+# Extra lines past the viewport that are highlighted together with it.
+VISIBLE_MARGIN = 100
+# Text longer than this is inserted by load_text in newline-aligned chunks of
+# about this size, one per event loop turn.
+LOAD_CHUNK_CHARS = 256 * 1024
+# Typing in the find box searches once it has paused for this long.
+FIND_DEBOUNCE_MS = 150
+MATCH_COLOR = QColor(255, 210, 0, 90)
+CURRENT_MATCH_COLOR = QColor(255, 140, 0, 170)
 
 class FindWidget(QWidget):
-    def __init__(self, parent=None):
+    # With incremental set, the search follows the typing (search_changed is
+    # emitted once it pauses) and there are regex, case and whole-word options,
+    # a match count and a replace row.
+    search_changed = pyqtSignal()
+    next_requested = pyqtSignal()
+    previous_requested = pyqtSignal()
+    replace_requested = pyqtSignal()
+    replace_all_requested = pyqtSignal()
+    closed = pyqtSignal()
+
+    def __init__(self, parent=None, incremental=False):
         super().__init__(parent)
         self.setWindowFlags(Qt.WindowType.Tool | Qt.WindowType.FramelessWindowHint)
         self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
 
-        layout = QHBoxLayout(self)
-        layout.setContentsMargins(5, 5, 5, 5)
+        rows = QVBoxLayout(self)
+        rows.setContentsMargins(5, 5, 5, 5)
+        layout = QHBoxLayout()
+        rows.addLayout(layout)
         self.find_input = QLineEdit()
         self.find_input.setPlaceholderText("Find...")
         layout.addWidget(self.find_input)
 
+        if incremental:
+            self.debounce = QTimer(self)
+            self.debounce.setSingleShot(True)
+            self.debounce.setInterval(FIND_DEBOUNCE_MS)
+            self.debounce.timeout.connect(self.search_changed)
+            self.find_input.textChanged.connect(self.debounce.start)
+            self.find_input.returnPressed.connect(self._return_pressed)
+
+            self.regex_button = self._option_button(".*", "Regular expression")
+            self.case_button = self._option_button("Aa", "Match case")
+            self.word_button = self._option_button("W", "Whole word")
+            for button in (self.regex_button, self.case_button, self.word_button):
+                layout.addWidget(button)
+
+            self.count_label = QLabel()
+            self.count_label.setMinimumWidth(70)
+            layout.addWidget(self.count_label)
+
+            previous_button = QPushButton("↑")
+            previous_button.setFixedSize(20, 20)
+            previous_button.clicked.connect(self.previous_requested)
+            layout.addWidget(previous_button)
+            next_button = QPushButton("↓")
+            next_button.setFixedSize(20, 20)
+            next_button.clicked.connect(self.next_requested)
+            layout.addWidget(next_button)
+
         close_button = QPushButton("×")
         close_button.setFixedSize(20, 20)
-        close_button.clicked.connect(self.hide)
+        close_button.clicked.connect(self.close_find)
         layout.addWidget(close_button)
 
-        self.setLayout(layout)
+        if incremental:
+            self.replace_row = QWidget()
+            replace_layout = QHBoxLayout(self.replace_row)
+            replace_layout.setContentsMargins(0, 0, 0, 0)
+            self.replace_input = QLineEdit()
+            self.replace_input.setPlaceholderText("Replace...")
+            self.replace_input.returnPressed.connect(self.replace_requested)
+            replace_layout.addWidget(self.replace_input)
+            replace_button = QPushButton("Replace")
+            replace_button.clicked.connect(self.replace_requested)
+            replace_layout.addWidget(replace_button)
+            replace_all_button = QPushButton("All")
+            replace_all_button.setToolTip("Replace all")
+            replace_all_button.clicked.connect(self.replace_all_requested)
+            replace_layout.addWidget(replace_all_button)
+            self.replace_row.hide()
+            rows.addWidget(self.replace_row)
+
+        self.setLayout(rows)
+
+    def _option_button(self, text, tooltip):
+        button = QToolButton()
+        button.setText(text)
+        button.setToolTip(tooltip)
+        button.setCheckable(True)
+        button.setFixedSize(24, 20)
+        button.toggled.connect(self.search_changed)
+        return button
+
+    def _return_pressed(self):
+        # A search still waiting for the debounce runs first.
+        if self.debounce.isActive():
+            self.debounce.stop()
+            self.search_changed.emit()
+        if QApplication.keyboardModifiers() & Qt.KeyboardModifier.ShiftModifier:
+            self.previous_requested.emit()
+        else:
+            self.next_requested.emit()
+
+    def pattern(self):
+        # The compiled search, None for an empty one; raises re.error.
+        text = self.find_input.text()
+        if not text:
+            return None
+        return compile_pattern(text, self.regex_button.isChecked(), self.case_button.isChecked(),
+                               self.word_button.isChecked())
+
+    def keyPressEvent(self, event):
+        if event.key() == Qt.Key.Key_Escape:
+            self.close_find()
+        else:
+            super().keyPressEvent(event)
+
+    def close_find(self):
+        # Only closing ends the search; the widget is also hidden while its
+        # tab is switched away.
+        self.hide()
+        self.closed.emit()
 
 class Editor(QPlainTextEdit):
     def __init__(self, path=None):
@@ -29,15 +140,110 @@ class Editor(QPlainTextEdit):
         self.init_ui()
         self.init_find_widget()
         self.syntax = SyntaxHighlighter(self.document(), path)
+        self.verticalScrollBar().valueChanged.connect(self.update_visible_range)
+        self.verticalScrollBar().valueChanged.connect(self.update_match_highlights)
+        # Counts every edit, undo and redo included, so a saved snapshot can
+        # tell whether the document changed after it was taken.
+        self.edit_revision = 0
+        self.last_edit = 0.0
+        # How the file was stored on disk.
+        self.encoding = "utf-8"
+        self.bom = b""
+        self.newline = "\n"
+        self.document().contentsChange.connect(self._track_edit)
+
+    def _track_edit(self, position, removed, added):
+        self.edit_revision += 1
+        self.last_edit = time.monotonic()
 
     def init_ui(self):
         self.setLineWrapMode(QPlainTextEdit.LineWrapMode.NoWrap)
         self.setTabStopDistance(40)
 
+    def setPlainText(self, text):
+        if text.count("\n") < LAZY_HIGHLIGHT_LINES:
+            super().setPlainText(text)
+            return
+        self.syntax.begin_lazy(*self.visible_range())
+        try:
+            super().setPlainText(text)
+        finally:
+            self.syntax.finish_loading()
+
+    def load_text(self, text, progress=None, finished=None):
+        if len(text) <= LOAD_CHUNK_CHARS:
+            self.setPlainText(text)
+            if finished:
+                finished()
+            return
+        self.clear()
+        self.setReadOnly(True)
+        self.document().setUndoRedoEnabled(False)
+        self.syntax.begin_lazy(*self.visible_range())
+        self._load_state = (text, 0, progress, finished)
+        self._load_timer = QTimer(self)
+        self._load_timer.timeout.connect(self._insert_next_chunk)
+        self._load_timer.start(0)
+
+    def cancel_load(self):
+        if getattr(self, "_load_timer", None) is not None:
+            self._load_timer.stop()
+            self._load_timer = None
+            self._load_state = None
+            self.syntax.finish_loading()
+
+    def _insert_next_chunk(self):
+        text, start, progress, finished = self._load_state
+        end = start + LOAD_CHUNK_CHARS
+        if end < len(text):
+            newline = text.rfind("\n", start, end)
+            if newline > start:
+                end = newline + 1
+        cursor = QTextCursor(self.document())
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text[start:end])
+        if end < len(text):
+            self._load_state = (text, end, progress, finished)
+            if progress:
+                progress(end * 100 // len(text))
+            return
+        self.cancel_load()
+        self.document().setUndoRedoEnabled(True)
+        self.document().setModified(False)
+        self.setReadOnly(False)
+        self.moveCursor(QTextCursor.MoveOperation.Start)
+        if finished:
+            finished()
+
+    def visible_range(self):
+        first = self.firstVisibleBlock().blockNumber()
+        lines = self.viewport().height() // max(self.fontMetrics().lineSpacing(), 1)
+        return max(first - VISIBLE_MARGIN, 0), first + max(lines, VISIBLE_MARGIN) + VISIBLE_MARGIN
+
+    def update_visible_range(self, *args):
+        if self.syntax.is_lazy():
+            self.syntax.set_visible_range(*self.visible_range())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_visible_range()
+        self.update_match_highlights()
+
     def init_find_widget(self):
-        self.find_widget = FindWidget()
-        self.find_widget.find_input.returnPressed.connect(self.find_text)
+        self.find_widget = FindWidget(incremental=True)
+        self.find_widget.search_changed.connect(self.search)
+        self.find_widget.next_requested.connect(self.find_text)
+        self.find_widget.previous_requested.connect(self.find_previous)
+        self.find_widget.replace_requested.connect(self.replace)
+        self.find_widget.replace_all_requested.connect(self.replace_all)
+        self.find_widget.closed.connect(self.end_search)
         self.find_widget.hide()
+        self.search_index = SearchIndex(self.document(), self)
+        self.search_index.changed.connect(self._search_progress)
+        self.selectionChanged.connect(self._search_progress)
+        # The match to select once the index has got far enough: the position
+        # to search from and whether to search backwards.
+        self._pending_match = None
 
     def show_find_widget(self):
         if not self.find_widget.isVisible():
@@ -54,31 +260,175 @@ class Editor(QPlainTextEdit):
     #def syntax(self, path):
     #    PythonHighlighter(self.document(), path)
 
+    def search(self):
+        try:
+            pattern = self.find_widget.pattern()
+        except re.error:
+            self.search_index.set_pattern(None)
+            self.find_widget.count_label.setText("Invalid pattern")
+            return
+        self.search_index.set_pattern(pattern, literal=not self.find_widget.regex_button.isChecked())
+        if pattern is not None:
+            # Searching as you type starts from where the search began.
+            self._pending_match = (self.textCursor().selectionStart(), False)
+            self._search_progress()
+
     def find_text(self):
-        search_text = self.find_widget.find_input.text()
-        if search_text:
-            cursor = self.textCursor()
-            found_cursor = self.document().find(search_text, cursor)
-            if found_cursor.isNull():
-                cursor.movePosition(QTextCursor.MoveOperation.Start)
-                found_cursor = self.document().find(search_text, cursor)
-            if not found_cursor.isNull():
-                self.setTextCursor(found_cursor)
+        self._pending_match = (self.textCursor().selectionEnd(), False)
+        self._search_progress()
+
+    def find_previous(self):
+        self._pending_match = (self.textCursor().selectionStart(), True)
+        self._search_progress()
+
+    def replace(self):
+        # Replaces the selected match, then selects the next one.
+        index = self.search_index
+        if index.pattern is None or self.isReadOnly():
+            return
+        cursor = self.textCursor()
+        start, end = cursor.selectionStart(), cursor.selectionEnd()
+        if index.find(start, end) == -1:
+            self.find_text()
+            return
+        replacement = self.find_widget.replace_input.text()
+        if not index.literal:
+            # The match again, in its line, for its groups.
+            block = self.document().findBlock(start)
+            prefix = QTextCursor(block)
+            prefix.setPosition(start, QTextCursor.MoveMode.KeepAnchor)
+            match = index.pattern.match(block.text(), len(prefix.selectedText()))
+            if match is None or utf16_length(match.group()) != end - start:
+                return
+            try:
+                replacement = match.expand(replacement)
+            except (re.error, IndexError) as e:
+                self.find_widget.count_label.setText(f"Bad replacement: {str(e)}")
+                return
+        cursor.insertText(replacement)
+        self.setTextCursor(cursor)
+        self.find_text()
+
+    def replace_all(self):
+        # Every match is replaced by one insertText over the lines from the
+        # first match to the last: one edit, one undo step, one update of the
+        # index and the journal. The new text is built in a single pass with
+        # the replacement parsed once; large edits leave the highlighting to
+        # the background fill.
+        index = self.search_index
+        if index.pattern is None or self.isReadOnly():
+            return
+        index.finish()
+        if not index.count():
+            return
+        # Whole lines, so anchors and word boundaries see what the index saw.
+        start = self.document().findBlock(index.span(0)[0]).position()
+        last = self.document().findBlock(index.span(index.count() - 1)[1])
+        end = last.position() + last.length() - 1
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        text = cursor.selectedText().replace("\u2029", "\n")
+        try:
+            text, count = substitute(index.pattern, text, self.find_widget.replace_input.text(), index.literal)
+        except (re.error, IndexError) as e:
+            self.find_widget.count_label.setText(f"Bad replacement: {str(e)}")
+            return
+        if self.document().findBlock(end).blockNumber() - self.document().findBlock(start).blockNumber() >= LAZY_HIGHLIGHT_LINES:
+            self.syntax.defer_from(start, *self.visible_range())
+        cursor.beginEditBlock()
+        cursor.insertText(text)
+        cursor.endEditBlock()
+        cursor.setPosition(start)
+        self.setTextCursor(cursor)
+        self.find_widget.count_label.setText(f"Replaced {count}")
+
+    def end_search(self):
+        self._pending_match = None
+        self.search_index.set_pattern(None)
+        self.setExtraSelections([])
+
+    def _search_progress(self):
+        index = self.search_index
+        if index.pattern is None and self._pending_match is None:
+            return
+        if self._pending_match is not None:
+            position, backward = self._pending_match
+            match = index.previous_match(position) if backward else index.next_match(position)
+            if match is not None:
+                self._pending_match = None
+                start, end = index.span(match)
+                cursor = self.textCursor()
+                cursor.setPosition(start)
+                cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+                self.setTextCursor(cursor)
+            elif index.complete:
+                self._pending_match = None
+        self.update_match_highlights()
+        if index.pattern is None:
+            self.find_widget.count_label.setText("")
+            return
+        cursor = self.textCursor()
+        current = index.find(cursor.selectionStart(), cursor.selectionEnd())
+        total = f"{index.count()}" if index.complete else f"{index.count()}+"
+        if current != -1:
+            self.find_widget.count_label.setText(f"{current + 1} of {total}")
+        elif index.complete and not index.count():
+            self.find_widget.count_label.setText("No results")
+        else:
+            self.find_widget.count_label.setText(f"{total} matches")
+
+    def update_match_highlights(self, *args):
+        # Only the matches in the viewport get an extra selection, so the
+        # cost does not grow with the number of matches.
+        index = getattr(self, "search_index", None)
+        if index is None:
+            return
+        if index.pattern is None:
+            if self.extraSelections():
+                self.setExtraSelections([])
+            return
+        start = self.cursorForPosition(self.viewport().rect().topLeft()).block().position()
+        bottom = self.cursorForPosition(self.viewport().rect().bottomRight()).block()
+        end = bottom.position() + bottom.length()
+        cursor = self.textCursor()
+        selections = []
+        for i in index.visible(start, end):
+            match_start, match_end = index.span(i)
+            selection = QTextEdit.ExtraSelection()
+            current = match_start == cursor.selectionStart() and match_end == cursor.selectionEnd()
+            selection.format = QTextCharFormat()
+            selection.format.setBackground(CURRENT_MATCH_COLOR if current else MATCH_COLOR)
+            selection.cursor = QTextCursor(self.document())
+            selection.cursor.setPosition(match_start)
+            selection.cursor.setPosition(match_end, QTextCursor.MoveMode.KeepAnchor)
+            selections.append(selection)
+        self.setExtraSelections(selections)
+
+    def go_to_line(self, line):
+        block = self.document().findBlockByNumber(min(max(line, 0), self.document().blockCount() - 1))
+        self.setTextCursor(QTextCursor(block))
+        self.centerCursor()
 
     def keyPressEvent(self, event):
-        if event.matches(QKeySequence.StandardKey.Find):
+        if event.matches(QKeySequence.StandardKey.Replace) or (
+                event.key() == Qt.Key.Key_H and event.modifiers() & Qt.KeyboardModifier.ControlModifier):
+            self.show_find_widget(replace=True)
+        elif event.matches(QKeySequence.StandardKey.Find):
             self.show_find_widget()
         elif event.key() == Qt.Key.Key_F and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
             self.show_find_widget()
         else:
             super().keyPressEvent(event)
 
-    def show_find_widget(self):
+    def show_find_widget(self, replace=False):
+        if replace or not self.find_widget.isVisible():
+            self.find_widget.replace_row.setVisible(replace)
         if not self.find_widget.isVisible():
             self.find_widget.setParent(self)
     
-            find_widget_width = 200
-            find_widget_height = 30
+            find_widget_width = max(self.find_widget.sizeHint().width(), 200)
+            find_widget_height = self.find_widget.sizeHint().height()
             x = self.width() - find_widget_width - 5
             y = 5
     
@@ -86,6 +436,9 @@ class Editor(QPlainTextEdit):
             self.find_widget.move(x, y)
             
             self.find_widget.show()
+            self.search()
         
+        else:
+            self.find_widget.resize(self.find_widget.width(), self.find_widget.sizeHint().height())
         self.find_widget.find_input.setFocus()
         self.find_widget.find_input.selectAll()
\ No newline at end of file
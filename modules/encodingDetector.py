@@ -0,0 +1,129 @@
+import codecs
+import os
+import threading
+
+# Bytes handed to chardet when a file is neither BOM-marked nor valid UTF-8.
+SAMPLE_SIZE = 256 * 1024
+FEED_SIZE = 16 * 1024
+CACHE_SIZE = 512
+
+# UTF-32 LE must be checked before UTF-16 LE; its BOM starts with the same bytes.
+BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32-le"),
+    (codecs.BOM_UTF32_BE, "utf-32-be"),
+    (codecs.BOM_UTF8, "utf-8"),
+    (codecs.BOM_UTF16_LE, "utf-16-le"),
+    (codecs.BOM_UTF16_BE, "utf-16-be"),
+]
+
+
+class DecodedText:
+    __slots__ = ("text", "encoding", "bom", "newline", "exact")
+
+    def __init__(self, text, encoding, bom, newline, exact):
+        self.text = text
+        self.encoding = encoding
+        self.bom = bom
+        self.newline = newline
+        self.exact = exact
+
+
+class EncodingDetector:
+    # Detected encodings are remembered per (path, size, mtime), so reopening
+    # an unchanged file skips detection entirely. Files are decoded on several
+    # pool threads at once, so the cache is only touched under _lock.
+    _shared = None
+
+    def __init__(self):
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def read(self, file_path):
+        with open(file_path, "rb") as file:
+            stat = os.fstat(file.fileno())
+            raw = file.read()
+        return self.decode(raw, (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns))
+
+    def decode(self, raw, key=None):
+        cached = None
+        if key:
+            with self._lock:
+                cached = self._cache.get(key)
+        if cached is not None:
+            encoding, bom, exact = cached
+            try:
+                return self._result(raw[len(bom):].decode(encoding), encoding, bom, exact)
+            except (UnicodeDecodeError, LookupError):
+                pass
+
+        result = self._detect(raw)
+        if key:
+            with self._lock:
+                if key not in self._cache and len(self._cache) >= CACHE_SIZE:
+                    self._cache.pop(next(iter(self._cache)))
+                self._cache[key] = (result.encoding, result.bom, result.exact)
+        return result
+
+    def forget(self, file_path):
+        path = os.path.abspath(file_path)
+        with self._lock:
+            for key in [key for key in self._cache if key[0] == path]:
+                del self._cache[key]
+
+    def detect_sample(self, sample):
+        # Like decode(), but for the first bytes of a file that is never read
+        # whole; a character cut off at the end of the sample is tolerated.
+        for bom, encoding in BOMS:
+            if sample.startswith(bom):
+                return encoding, bom
+        try:
+            sample.decode("utf-8")
+            return "utf-8", b""
+        except UnicodeDecodeError as e:
+            if e.start >= len(sample) - 3 and e.reason == "unexpected end of data":
+                return "utf-8", b""
+        return self._sniff(sample[:SAMPLE_SIZE]) or "latin-1", b""
+
+    def _detect(self, raw):
+        for bom, encoding in BOMS:
+            if raw.startswith(bom):
+                try:
+                    return self._result(raw[len(bom):].decode(encoding), encoding, bom, True)
+                except UnicodeDecodeError:
+                    break
+
+        try:
+            return self._result(raw.decode("utf-8"), "utf-8", b"", True)
+        except UnicodeDecodeError:
+            pass
+
+        encoding = self._sniff(raw[:SAMPLE_SIZE])
+        if encoding:
+            try:
+                return self._result(raw.decode(encoding), encoding, b"", True)
+            except (UnicodeDecodeError, LookupError):
+                pass
+        return self._result(raw.decode("latin-1"), "latin-1", b"", False)
+
+    def _sniff(self, sample):
+        from chardet.universaldetector import UniversalDetector
+        detector = UniversalDetector()
+        for start in range(0, len(sample), FEED_SIZE):
+            detector.feed(sample[start:start + FEED_SIZE])
+            if detector.done:
+                break
+        detector.close()
+        return detector.result.get("encoding")
+
+    def _result(self, text, encoding, bom, exact):
+        newline = "\n"
+        if "\r" in text:
+            newline = "\r\n" if "\r\n" in text else "\r"
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return DecodedText(text, encoding, bom, newline, exact)
@@ -0,0 +1,93 @@
+import os
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QLabel, QProgressBar, QPushButton
+from PyQt6.QtCore import Qt, QObject, QRunnable, pyqtSignal
+from modules.encodingDetector import EncodingDetector
+
+READ_CHUNK = 4 * 1024 * 1024
+
+
+class LoadSignals(QObject):
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class LoadFileTask(QRunnable):
+    # Reads and decodes a file on the thread pool. Progress is reported in
+    # percent of bytes read; setting cancelled stops the read and suppresses
+    # every further signal.
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self.cancelled = False
+        self.signals = LoadSignals()
+
+    def run(self):
+        try:
+            with open(self.file_path, "rb") as file:
+                stat = os.fstat(file.fileno())
+                chunks = []
+                done = 0
+                while not self.cancelled:
+                    chunk = file.read(READ_CHUNK)
+                    if not chunk:
+                        break
+                    chunks.append(chunk)
+                    done += len(chunk)
+                    if stat.st_size:
+                        self.signals.progress.emit(min(done * 100 // stat.st_size, 100))
+            if self.cancelled:
+                return
+            raw = b"".join(chunks)
+            del chunks
+            key = (os.path.abspath(self.file_path), stat.st_size, stat.st_mtime_ns)
+            decoded = EncodingDetector.shared().decode(raw, key)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(str(e))
+            return
+        if not self.cancelled:
+            self.signals.finished.emit(decoded)
+
+
+class LoadingTab(QWidget):
+    cancel_requested = pyqtSignal()
+
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.task = None
+        self.editor = None
+        self.session_tab = None
+        self.line = None
+
+        layout = QVBoxLayout(self)
+        layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.label = QLabel(f"Loading {os.path.basename(file_path)}...")
+        self.label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setFixedWidth(300)
+        layout.addWidget(self.progress_bar, alignment=Qt.AlignmentFlag.AlignCenter)
+
+        cancel_button = QPushButton("Cancel")
+        cancel_button.clicked.connect(self.cancel_requested)
+        layout.addWidget(cancel_button, alignment=Qt.AlignmentFlag.AlignCenter)
+
+    def set_progress(self, value):
+        self.progress_bar.setValue(value)
+
+    def set_stage(self, text):
+        self.label.setText(f"{text} {os.path.basename(self.file_path)}...")
+        self.progress_bar.setValue(0)
+
+
+class PlaceholderTab(QWidget):
+    # Stands in for a restored tab until it is first activated. It holds only
+    # the session entry; the editor and its text are created on demand.
+    def __init__(self, session_tab, parent=None):
+        super().__init__(parent)
+        self.session_tab = session_tab
+        self.file_path = session_tab.path
@@ -1,65 +1,175 @@
 from PyQt6.QtWidgets import QFileDialog, QMessageBox
+from PyQt6.QtCore import QThreadPool, QTimer
+from PyQt6 import sip
 from modules.editor import Editor
-import chardet
+from modules.fileLoader import LoadFileTask, LoadingTab, PlaceholderTab
+from modules.largeFileViewer import LargeFileView
+from modules.fileWriter import DocumentWriter
 import os
+import time
+
+# Autosave waits until a document has not been edited for this long, so a
+# burst of typing is written once when it ends.
+AUTOSAVE_QUIET_SECONDS = 2.0
+# Restored tabs after the active one that are materialized in the background.
+PREWARM_TABS = 2
 
 class FileManager:
     def __init__(self, notepad):
         self.notepad = notepad
         self.file_paths = {}
         self.untitled_count = 0
+        # Editor to the DocumentWriter saving it, explicitly or by autosave.
+        self.saving = {}
+        # Placeholders still to materialize ahead of the active tab.
+        self._prewarm = []
 
-    def open_file(self, file_path=None):
+    def open_file(self, file_path=None, line=None):
         if not file_path:
-            file_path, _ = QFileDialog.getOpenFileName(self.notepad, "Open File", "", "All Files (*)")
-        
-        if file_path:
-            for i in range(self.notepad.tab_widget.count()):
-                editor = self.notepad.tab_widget.widget(i)
-                if editor in self.file_paths and self.file_paths[editor] == file_path:
-                    self.notepad.tab_widget.setCurrentIndex(i)
-                    return
-
-            try:
-                with open(file_path, 'rb') as file:
-                    raw_data = file.read()
-                    result = chardet.detect(raw_data)
-                    encoding = result['encoding']
-    
-                if not encoding:
-                    encoding = 'utf-8'
-    
-                with open(file_path, 'r', encoding=encoding) as file:
-                    content = file.read()
-    
-                editor = Editor(path=file_path)
-                editor.setPlainText(content)
-                #if file_path.endswith('.py'):
-                #editor.syntax(file_path)
-                index = self.notepad.tab_widget.addTab(editor, os.path.basename(file_path))
+            file_paths, _ = QFileDialog.getOpenFileNames(self.notepad, "Open File", "", "All Files (*)")
+            self.open_files(file_paths)
+        else:
+            self.open_files([file_path])
+            if line is not None:
+                self.go_to_line(file_path, line)
+
+    def go_to_line(self, file_path, line):
+        # A file still loading goes to the line once it is shown.
+        index = self.find_tab(file_path)
+        if index == -1:
+            return
+        widget = self.notepad.tab_widget.widget(index)
+        if isinstance(widget, LoadingTab):
+            widget.line = line
+        elif isinstance(widget, (Editor, LargeFileView)):
+            widget.go_to_line(line)
+
+    def open_files(self, file_paths):
+        # Every file is read and decoded on the thread pool, so several files
+        # load in parallel while their tabs show progress.
+        for file_path in file_paths:
+            index = self.find_tab(file_path)
+            if index != -1:
                 self.notepad.tab_widget.setCurrentIndex(index)
-                self.file_paths[editor] = file_path
-            except UnicodeDecodeError:
-                try:
-                    with open(file_path, 'r', encoding='latin-1') as file:
-                        content = file.read()
-                    
-                    editor = Editor(path=file_path)
-                    editor.setPlainText(content)
-                    index = self.notepad.tab_widget.addTab(editor, os.path.basename(file_path))
-                    self.notepad.tab_widget.setCurrentIndex(index)
-                    self.file_paths[editor] = file_path
-                    
-                    QMessageBox.warning(self.notepad, "Encoding Warning", 
-                                        "The file encoding could not be detected accurately. "
-                                        "The file has been opened, but some characters may not display correctly.")
-                except Exception as e:
-                    QMessageBox.critical(self.notepad, "Error", f"Unable to open file: {str(e)}")
-            except Exception as e:
-                QMessageBox.critical(self.notepad, "Error", f"Unable to open file: {str(e)}")
+                continue
+            if self._is_large_file(file_path):
+                self.open_large_file(file_path)
+                continue
+            loading_tab = self._start_loading(file_path)
+            index = self.notepad.tab_widget.addTab(loading_tab, os.path.basename(file_path))
+            self.notepad.tab_widget.setCurrentIndex(index)
+
+    def _start_loading(self, file_path):
+        loading_tab = LoadingTab(file_path)
+        task = LoadFileTask(file_path)
+        loading_tab.task = task
+        loading_tab.cancel_requested.connect(lambda tab=loading_tab: self.cancel_loading(tab))
+        task.signals.progress.connect(loading_tab.set_progress)
+        task.signals.finished.connect(lambda decoded, tab=loading_tab: self._on_file_loaded(tab, decoded))
+        task.signals.failed.connect(lambda error, tab=loading_tab: self._on_file_load_failed(tab, error))
+        QThreadPool.globalInstance().start(task)
+        return loading_tab
+
+    def _is_large_file(self, file_path):
+        try:
+            size = os.path.getsize(file_path)
+            threshold = self.notepad.settings.get_large_file_threshold_mb() * 1024 * 1024
+            return size >= max(threshold, 1) and LargeFileView.supports(file_path)
+        except OSError:
+            return False
+
+    def open_large_file(self, file_path):
+        # Files above the threshold are memory-mapped into a read-only view
+        # instead of being loaded into a QPlainTextEdit.
+        try:
+            view = LargeFileView(file_path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self.notepad, "Error", f"Unable to open file: {str(e)}")
+            return
+        index = self.notepad.tab_widget.addTab(view, f"{os.path.basename(file_path)} (read-only)")
+        self.notepad.tab_widget.setCurrentIndex(index)
+
+    def find_tab(self, file_path):
+        for i in range(self.notepad.tab_widget.count()):
+            widget = self.notepad.tab_widget.widget(i)
+            if isinstance(widget, (LoadingTab, LargeFileView, PlaceholderTab)) and widget.file_path == file_path:
+                return i
+            if widget in self.file_paths and self.file_paths[widget] == file_path:
+                return i
+        return -1
+
+    def cancel_loading(self, loading_tab):
+        if loading_tab.task is not None:
+            loading_tab.task.cancelled = True
+        if loading_tab.editor is not None:
+            loading_tab.editor.cancel_load()
+            loading_tab.editor.deleteLater()
+        index = self.notepad.tab_widget.indexOf(loading_tab)
+        if index != -1:
+            self.notepad.tab_widget.removeTab(index)
+        loading_tab.deleteLater()
+
+    def _on_file_loaded(self, loading_tab, decoded):
+        loading_tab.task = None
+        if self.notepad.tab_widget.indexOf(loading_tab) == -1:
+            return
+        file_path = loading_tab.file_path
+        editor = Editor(path=file_path)
+        loading_tab.editor = editor
+        loading_tab.set_stage("Preparing")
+        editor.load_text(decoded.text, loading_tab.set_progress,
+                         lambda: self._show_loaded_editor(loading_tab, editor, decoded))
+
+    def _show_loaded_editor(self, loading_tab, editor, decoded):
+        if self.notepad.tab_widget.indexOf(loading_tab) == -1:
+            editor.deleteLater()
+            return
+        file_path = loading_tab.file_path
+        self.file_paths[editor] = file_path
+        editor.encoding, editor.bom, editor.newline = decoded.encoding, decoded.bom, decoded.newline
+        self.notepad.file_watcher.watch(file_path)
+        if self.notepad.session_store.attach(editor, editor, file_path, loading_tab.session_tab):
+            editor.document().setModified(True)
+        if loading_tab.session_tab is not None:
+            self._restore_view(editor, loading_tab.session_tab)
+        self.replace_tab(loading_tab, editor, os.path.basename(file_path))
+        if loading_tab.line is not None:
+            editor.go_to_line(loading_tab.line)
+        if not decoded.exact:
+            QMessageBox.warning(self.notepad, "Encoding Warning", 
+                                "The file encoding could not be detected accurately. "
+                                "The file has been opened, but some characters may not display correctly.")
+
+    def replace_tab(self, old_widget, new_widget, title):
+        # Signals are held back while the tab is swapped, so removing the
+        # current tab does not activate (and materialize) a neighbour.
+        tab_widget = self.notepad.tab_widget
+        index = tab_widget.indexOf(old_widget)
+        was_current = tab_widget.currentIndex() == index
+        tab_widget.blockSignals(True)
+        try:
+            tab_widget.removeTab(index)
+            tab_widget.insertTab(index, new_widget, title)
+            if was_current:
+                tab_widget.setCurrentIndex(index)
+        finally:
+            tab_widget.blockSignals(False)
+        old_widget.deleteLater()
+        if was_current:
+            self.notepad.on_tab_changed(index)
+
+    def _on_file_load_failed(self, loading_tab, error):
+        loading_tab.task = None
+        index = self.notepad.tab_widget.indexOf(loading_tab)
+        if index != -1:
+            self.notepad.tab_widget.removeTab(index)
+        loading_tab.deleteLater()
+        QMessageBox.critical(self.notepad, "Error", f"Unable to open file: {error}")
 
     def save_file(self):
         current_editor = self.notepad.tab_widget.currentWidget()
+        if not isinstance(current_editor, Editor):
+            return
         if current_editor in self.file_paths:
             file_path = self.file_paths[current_editor]
             self._save_to_file(current_editor, file_path)
@@ -68,19 +178,94 @@ class FileManager:
 
     def save_file_as(self):
         current_editor = self.notepad.tab_widget.currentWidget()
+        if not isinstance(current_editor, Editor):
+            return
         file_path, _ = QFileDialog.getSaveFileName(self.notepad, "Save File", "", "Text Files (*.txt);;All Files (*)")
         if file_path:
-            self._save_to_file(current_editor, file_path)
+            old_path = self.file_paths.get(current_editor)
+            if not self._save_to_file(current_editor, file_path):
+                return
             self.file_paths[current_editor] = file_path
+            if old_path and old_path != file_path:
+                self.notepad.file_watcher.unwatch(old_path)
             self.notepad.tab_widget.setTabText(self.notepad.tab_widget.currentIndex(), os.path.basename(file_path))
 
     def _save_to_file(self, editor, file_path):
-        content = editor.toPlainText()
-        try:
-            with open(file_path, 'w', encoding='utf-8') as file:
-                file.write(content)
-        except Exception as e:
-            QMessageBox.critical(self.notepad, "Error", f"Save failed for {file_path}: {str(e)}")
+        # The file keeps the encoding, byte order mark and line endings it was
+        # opened with. The text is written in the background and the editor
+        # is read-only until it is done. Returns whether the save started.
+        writer = self.saving.pop(editor, None)
+        if writer is not None:
+            if writer.freeze:
+                self.saving[editor] = writer
+                self.notepad.statusBar().showMessage(f"{os.path.basename(writer.file_path)} is still being saved.", 5000)
+                return False
+            # A running autosave gives way.
+            writer.cancel()
+            writer.deleteLater()
+        self._start_save(editor, file_path, editor.encoding, editor.bom, True)
+        return True
+
+    def _start_save(self, editor, file_path, encoding, bom, explicit):
+        writer = DocumentWriter(editor, file_path, encoding, bom, freeze=explicit)
+        writer.finished.connect(lambda error: self._save_finished(editor, writer, error))
+        if explicit:
+            name = os.path.basename(file_path)
+            writer.progress.connect(
+                lambda percent: self.notepad.statusBar().showMessage(f"Saving {name}... {percent}%"))
+        self.saving[editor] = writer
+        writer.start()
+
+    def _save_finished(self, editor, writer, error):
+        if self.saving.get(editor) is not writer:
+            return
+        del self.saving[editor]
+        writer.deleteLater()
+        if editor not in self.file_paths:
+            return
+        file_path = writer.file_path
+        name = os.path.basename(file_path)
+        if isinstance(writer.task.error, UnicodeEncodeError) and writer.encoding != "utf-8":
+            # Text typed since the file was opened that its encoding cannot
+            # hold; UTF-8 holds anything.
+            self.notepad.statusBar().showMessage(
+                f"{name} has characters {writer.encoding} cannot store; saving it as UTF-8.", 10000)
+            self._start_save(editor, file_path, "utf-8", b"", writer.freeze)
+            return
+        if writer.task.cancelled:
+            # The document was edited before it was all read; for an explicit
+            # save that only happens by a reload. Autosave tries again later.
+            if writer.freeze:
+                QMessageBox.critical(self.notepad, "Error",
+                                     f"Save failed for {file_path}: the document changed while it was being saved.")
+            return
+        if error:
+            if writer.freeze:
+                QMessageBox.critical(self.notepad, "Error", f"Save failed for {file_path}: {error}")
+            else:
+                self.notepad.statusBar().showMessage(f"Autosave failed for {file_path}: {error}", 10000)
+            return
+        editor.encoding, editor.bom = writer.encoding, writer.bom
+        if editor.edit_revision == writer.revision:
+            editor.document().setModified(False)
+            self.notepad.session_store.rebase_on_file(editor, file_path)
+        if writer.freeze:
+            self.notepad.file_watcher.conflicts.discard(editor)
+            self.notepad.file_watcher.watch(file_path)
+            if writer.reported:
+                self.notepad.statusBar().showMessage(f"Saved {name}", 3000)
+        else:
+            self.notepad.file_watcher.remember(file_path)
+
+    def finish_save(self, editor):
+        # Completes a save still running for a document about to go away.
+        while editor in self.saving:
+            writer = self.saving[editor]
+            self._save_finished(editor, writer, writer.finish())
+
+    def finish_saves(self):
+        for editor in list(self.saving):
+            self.finish_save(editor)
 
     def open_file_from_explorer(self, index):
         file_path = self.notepad.file_model.filePath(index)
@@ -88,16 +273,17 @@ class FileManager:
             self.open_file(file_path)
             
     def autosave(self):
-        for index in range(self.notepad.tab_widget.count()):
-            editor = self.notepad.tab_widget.widget(index)
-            if editor in self.file_paths:
-                file_path = self.file_paths[editor]
-                content = editor.toPlainText()
-                try:
-                    with open(file_path, 'w', encoding='utf-8') as file:
-                        file.write(content)
-                except Exception as e:
-                    QMessageBox.critical(self.notepad, "Error", f"Autosave failed for {file_path}: {str(e)}")
+        # Only documents edited since they were last written are saved, each
+        # at most once at a time, by a DocumentWriter that gives up if the
+        # document is edited before it is read. Idle tabs cost no disk I/O.
+        now = time.monotonic()
+        for editor, file_path in list(self.file_paths.items()):
+            if (not isinstance(editor, Editor) or editor in self.saving
+                    or file_path.startswith("Untitled-") or not editor.document().isModified()
+                    or editor in self.notepad.file_watcher.conflicts
+                    or now - editor.last_edit < AUTOSAVE_QUIET_SECONDS):
+                continue
+            self._start_save(editor, file_path, editor.encoding, editor.bom, False)
 
     def new_file(self):
         editor = Editor()
@@ -105,16 +291,95 @@ class FileManager:
         index = self.notepad.tab_widget.addTab(editor, f"Untitled-{self.untitled_count}")
         self.notepad.tab_widget.setCurrentIndex(index)
         self.file_paths[editor] = f"Untitled-{self.untitled_count}"
+        self.notepad.session_store.attach(editor, editor, self.file_paths[editor])
 
-    def get_all_open_files(self):
-        open_files = []
+    def session_entries(self):
+        entries = []
         for i in range(self.notepad.tab_widget.count()):
-            editor = self.notepad.tab_widget.widget(i)
-            if editor in self.file_paths:
-                file_path = self.file_paths[editor]
-                content = editor.toPlainText()
-                open_files.append((file_path, content))
-        return open_files
+            widget = self.notepad.tab_widget.widget(i)
+            if isinstance(widget, PlaceholderTab):
+                entries.append((widget, widget.file_path, widget.session_tab))
+            elif isinstance(widget, LoadingTab):
+                # A restored tab keeps its stored view until it is shown.
+                entries.append((widget, widget.file_path, widget.session_tab))
+            elif isinstance(widget, LargeFileView):
+                entries.append((widget, widget.file_path, None))
+            elif widget in self.file_paths:
+                entries.append((widget, self.file_paths[widget], widget))
+        return entries
+
+    def restore_session(self, store, tabs, current):
+        # Restored tabs start as placeholders holding only their session entry;
+        # nothing is read or highlighted until a tab is activated.
+        tab_widget = self.notepad.tab_widget
+        tab_widget.blockSignals(True)
+        try:
+            for tab in tabs:
+                if not tab.has_content and not os.path.isfile(tab.path):
+                    continue
+                placeholder = PlaceholderTab(tab)
+                store.adopt(placeholder, tab, None)
+                if tab.path.startswith("Untitled-"):
+                    self.untitled_count += 1
+                    tab_widget.addTab(placeholder, tab.path)
+                else:
+                    tab_widget.addTab(placeholder, os.path.basename(tab.path))
+            if tab_widget.count():
+                tab_widget.setCurrentIndex(min(max(current, 0), tab_widget.count() - 1))
+        finally:
+            tab_widget.blockSignals(False)
+        if tab_widget.count():
+            self.notepad.on_tab_changed(tab_widget.currentIndex())
+
+    def materialize(self, placeholder):
+        if sip.isdeleted(placeholder) or self.notepad.tab_widget.indexOf(placeholder) == -1:
+            return
+        tab = placeholder.session_tab
+        content = self.notepad.session_store.read_content(tab.tab_id) if tab.has_content else None
+        if content is None and not tab.path.startswith("Untitled-"):
+            loading_tab = self._start_loading(tab.path)
+            loading_tab.session_tab = tab
+            self.notepad.session_store.adopt(loading_tab, tab, None)
+            self.replace_tab(placeholder, loading_tab, os.path.basename(tab.path))
+            return
+        # An untitled tab without stored content was empty when its journal
+        # started.
+        editor = Editor(path=tab.path)
+        editor.setPlainText(content or "")
+        recovered = self.notepad.session_store.attach(editor, editor, tab.path, tab)
+        editor.document().setModified(tab.modified or recovered)
+        self._restore_view(editor, tab)
+        self.file_paths[editor] = tab.path
+        if not tab.path.startswith("Untitled-"):
+            self.notepad.file_watcher.watch(tab.path)
+        self.replace_tab(placeholder, editor, self.notepad.tab_widget.tabText(self.notepad.tab_widget.indexOf(placeholder)))
+
+    def prewarm(self, index):
+        # Materializes the next few placeholders after the active tab, one per
+        # event loop turn, so switching to them is instant.
+        tab_widget = self.notepad.tab_widget
+        placeholders = []
+        for i in range(index + 1, min(index + 1 + PREWARM_TABS, tab_widget.count())):
+            widget = tab_widget.widget(i)
+            if isinstance(widget, PlaceholderTab):
+                placeholders.append(widget)
+        scheduled = bool(self._prewarm)
+        self._prewarm = placeholders
+        if placeholders and not scheduled:
+            QTimer.singleShot(0, self._prewarm_next)
+
+    def _prewarm_next(self):
+        if not self._prewarm:
+            return
+        self.materialize(self._prewarm.pop(0))
+        if self._prewarm:
+            QTimer.singleShot(0, self._prewarm_next)
+
+    def _restore_view(self, editor, tab):
+        cursor = editor.textCursor()
+        cursor.setPosition(min(tab.cursor, editor.document().characterCount() - 1))
+        editor.setTextCursor(cursor)
+        editor.verticalScrollBar().setValue(tab.scroll)
 
     def open_files_from_session(self, files):
         for file_path, content in files:
@@ -0,0 +1,321 @@
+import codecs
+import os
+from PyQt6.QtWidgets import QMessageBox
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, QFileSystemWatcher, pyqtSignal
+from modules.fileLoader import LoadFileTask
+
+# Change notifications for a path are handled once it has been quiet this long.
+DEBOUNCE_MS = 300
+# Bytes read per step when following a growing file.
+TAIL_READ = 4 * 1024 * 1024
+# A followed file that cannot be read is tried again after DEBOUNCE_MS, twice
+# as long after each further failure, up to this long.
+TAIL_RETRY_MAX_MS = 30000
+
+
+def file_stat(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def file_identity(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+class TailSignals(QObject):
+    finished = pyqtSignal(bytes, int, object)
+    failed = pyqtSignal(str)
+
+
+class TailReadTask(QRunnable):
+    # Reads what was appended to a file past offset; finished carries the data,
+    # the size of the file when it was read and its (device, inode). Nothing
+    # is read from a file shorter than offset or other than identity.
+    def __init__(self, file_path, offset, identity):
+        super().__init__()
+        self.file_path = file_path
+        self.offset = offset
+        self.identity = identity
+        self.signals = TailSignals()
+
+    def run(self):
+        try:
+            with open(self.file_path, "rb") as file:
+                stat = os.fstat(file.fileno())
+                size, identity = stat.st_size, (stat.st_dev, stat.st_ino)
+                if size < self.offset or identity != self.identity:
+                    self.signals.finished.emit(b"", size, identity)
+                    return
+                file.seek(self.offset)
+                data = file.read(TAIL_READ)
+        except OSError as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(data, size, identity)
+
+
+class FollowState:
+    __slots__ = ("offset", "identity", "decoder", "pending_cr", "task", "retry_ms")
+
+    def __init__(self, offset, identity, encoding):
+        self.offset = offset
+        self.identity = identity
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        self.pending_cr = False
+        self.task = None
+        self.retry_ms = 0
+
+
+class FileWatcher(QObject):
+    # Watches the files of open editors. Changes made by Pady itself are told
+    # apart by the size and mtime remembered after each load and save. An
+    # unmodified editor is reloaded in the background, keeping its cursor; a
+    # modified one is a conflict, and autosave leaves it alone until the user
+    # decides. Followed files only have their new bytes appended.
+    def __init__(self, notepad):
+        super().__init__(notepad)
+        self.notepad = notepad
+        self.known = {}
+        self.conflicts = set()
+        self.following = {}
+        self.reloading = set()
+        self._pending = set()
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self._schedule)
+        self.watcher.directoryChanged.connect(self._directory_changed)
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(DEBOUNCE_MS)
+        self._debounce.timeout.connect(self._process)
+
+    def watch(self, path):
+        self.remember(path)
+        if os.path.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+
+    def unwatch(self, path):
+        self.known.pop(path, None)
+        if path in self.watcher.files():
+            self.watcher.removePath(path)
+
+    def remember(self, path):
+        self.known[path] = file_stat(path)
+
+    def forget(self, editor):
+        state = self.following.pop(editor, None)
+        if state is not None and state.task is not None:
+            state.task.signals.finished.disconnect()
+            state.task.signals.failed.disconnect()
+        self.conflicts.discard(editor)
+        self.reloading.discard(editor)
+
+    def editor_for(self, path):
+        for editor, file_path in self.notepad.file_manager.file_paths.items():
+            if file_path == path:
+                return editor
+        return None
+
+    def _schedule(self, path):
+        self._pending.add(path)
+        self._debounce.start()
+
+    def _directory_changed(self, directory):
+        # Only the folders of followed files that are gone are watched, until
+        # the files are back.
+        waiting = False
+        for editor in self.following:
+            path = self.notepad.file_manager.file_paths.get(editor)
+            if path is None or os.path.dirname(path) != directory:
+                continue
+            if os.path.exists(path):
+                self._schedule(path)
+            else:
+                waiting = True
+        if not waiting:
+            self.watcher.removePath(directory)
+
+    def _process(self):
+        pending = self._pending
+        self._pending = set()
+        for path in pending:
+            # Files replaced by a rename drop out of the watcher.
+            if os.path.exists(path) and path not in self.watcher.files():
+                self.watcher.addPath(path)
+            self._handle(path)
+
+    def _handle(self, path):
+        editor = self.editor_for(path)
+        if editor is None:
+            return
+        if editor in self.notepad.file_manager.saving or editor in self.reloading:
+            # Our own write (or a reload) is still running; look again after it.
+            self._schedule(path)
+            return
+        if editor in self.following:
+            self._read_tail(editor, path)
+            return
+        stat = file_stat(path)
+        if stat == self.known.get(path):
+            return
+        if stat is None:
+            self.conflicts.add(editor)
+            self.notepad.statusBar().showMessage(
+                f"{os.path.basename(path)} was deleted on disk; autosave is paused for it until it is saved.", 10000)
+        elif not editor.document().isModified():
+            self.reload(editor, path)
+        elif editor not in self.conflicts:
+            self._resolve_conflict(editor, path)
+
+    def _resolve_conflict(self, editor, path):
+        self.conflicts.add(editor)
+        answer = QMessageBox.question(self.notepad, "File Changed",
+                                      f"{path} was changed by another program, and this tab has unsaved changes.\n\n"
+                                      "Reload it from disk and discard your changes?")
+        if answer == QMessageBox.StandardButton.Yes:
+            self.conflicts.discard(editor)
+            self.reload(editor, path)
+        else:
+            self.notepad.statusBar().showMessage(
+                f"Autosave is paused for {os.path.basename(path)} until it is saved.", 10000)
+
+    def reload(self, editor, path, finished=None):
+        # The text is read on the thread pool; the cursor and scroll position
+        # are restored by line and column afterwards.
+        self.reloading.add(editor)
+        stat = file_stat(path)
+        task = LoadFileTask(path)
+        task.signals.finished.connect(lambda decoded: self._apply_reload(editor, path, stat, decoded, finished))
+        task.signals.failed.connect(lambda error: self._reload_failed(editor, path, error))
+        QThreadPool.globalInstance().start(task)
+
+    def _apply_reload(self, editor, path, stat, decoded, finished):
+        if editor not in self.reloading or self.editor_for(path) is not editor:
+            return
+        cursor = editor.textCursor()
+        line, column = cursor.blockNumber(), cursor.positionInBlock()
+        scroll = editor.verticalScrollBar().value()
+        self.notepad.session_store.detach(editor)
+        editor.encoding, editor.bom, editor.newline = decoded.encoding, decoded.bom, decoded.newline
+        editor.load_text(decoded.text, finished=lambda: self._finish_reload(editor, path, stat, line, column, scroll, finished))
+
+    def _finish_reload(self, editor, path, stat, line, column, scroll, finished):
+        self.reloading.discard(editor)
+        self.conflicts.discard(editor)
+        block = editor.document().findBlockByNumber(min(line, editor.document().blockCount() - 1))
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + min(column, block.length() - 1))
+        editor.setTextCursor(cursor)
+        editor.verticalScrollBar().setValue(scroll)
+        self.known[path] = stat
+        self.notepad.session_store.attach(editor, editor, path)
+        if finished:
+            finished()
+        if file_stat(path) != stat:
+            self._schedule(path)
+
+    def _reload_failed(self, editor, path, error):
+        self.reloading.discard(editor)
+        self.notepad.statusBar().showMessage(f"Unable to reload {path}: {error}", 10000)
+
+    def set_follow(self, editor, enabled):
+        # A followed tab is a read-only live view of the end of the file:
+        # only appended bytes are read, scrollback is capped and there is no
+        # undo history or journal. Turning it off reloads the whole file.
+        path = self.notepad.file_manager.file_paths.get(editor)
+        if enabled == (editor in self.following) or path is None or path.startswith("Untitled-"):
+            return
+        if not enabled:
+            self.forget(editor)
+            editor.document().setMaximumBlockCount(0)
+            self.reload(editor, path, lambda: self._end_follow(editor))
+            return
+        if editor.document().isModified() or editor.isReadOnly():
+            self.notepad.statusBar().showMessage("Save or reload the file before following it.", 10000)
+            return
+        self.notepad.session_store.detach(editor)
+        editor.setReadOnly(True)
+        editor.document().setUndoRedoEnabled(False)
+        editor.document().setMaximumBlockCount(self.notepad.settings.get_follow_max_lines())
+        known = self.known.get(path)
+        self.following[editor] = FollowState(known[0] if known else 0, file_identity(path), editor.encoding)
+        editor.moveCursor(QTextCursor.MoveOperation.End)
+        self._read_tail(editor, path)
+
+    def _end_follow(self, editor):
+        editor.document().setUndoRedoEnabled(True)
+        editor.setReadOnly(False)
+
+    def _read_tail(self, editor, path):
+        state = self.following.get(editor)
+        if state is None or state.task is not None:
+            return
+        state.task = TailReadTask(path, state.offset, state.identity)
+        state.task.signals.finished.connect(lambda data, size, identity: self._append_tail(editor, path, data, size, identity))
+        state.task.signals.failed.connect(lambda error: self._tail_failed(editor, path, error))
+        QThreadPool.globalInstance().start(state.task)
+
+    def _tail_failed(self, editor, path, error):
+        state = self.following.get(editor)
+        if state is None:
+            return
+        state.task = None
+        if not os.path.exists(path):
+            # Deleted, or moved away by a rotation: its folder is watched
+            # until it is back.
+            self.notepad.statusBar().showMessage(
+                f"{os.path.basename(path)} is gone; following resumes once it is back.", 10000)
+            directory = os.path.dirname(path)
+            if directory not in self.watcher.directories():
+                self.watcher.addPath(directory)
+            return
+        self.notepad.statusBar().showMessage(f"Unable to read {path}: {error}", 10000)
+        state.retry_ms = min(max(state.retry_ms * 2, DEBOUNCE_MS), TAIL_RETRY_MAX_MS)
+        QTimer.singleShot(state.retry_ms, lambda: self._retry_tail(editor, path))
+
+    def _retry_tail(self, editor, path):
+        if editor in self.following:
+            self._schedule(path)
+
+    def _append_tail(self, editor, path, data, size, identity):
+        state = self.following.get(editor)
+        if state is None:
+            return
+        state.task = None
+        state.retry_ms = 0
+        if size < state.offset or identity != state.identity:
+            # Truncated, or replaced by a rotation: start over from the new
+            # beginning.
+            editor.clear()
+            state.offset = 0
+            state.identity = identity
+            state.decoder.reset()
+            state.pending_cr = False
+            self._read_tail(editor, path)
+            return
+        state.offset += len(data)
+        text = state.decoder.decode(data)
+        if state.pending_cr:
+            text = "\r" + text
+        state.pending_cr = text.endswith("\r")
+        if state.pending_cr:
+            text = text[:-1]
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        if text:
+            scroll_bar = editor.verticalScrollBar()
+            at_bottom = scroll_bar.value() >= scroll_bar.maximum()
+            cursor = QTextCursor(editor.document())
+            cursor.movePosition(QTextCursor.MoveOperation.End)
+            cursor.insertText(text)
+            editor.document().setModified(False)
+            if at_bottom:
+                scroll_bar.setValue(scroll_bar.maximum())
+        if state.offset < size:
+            self._read_tail(editor, path)
@@ -0,0 +1,270 @@
+import codecs
+import os
+import queue
+import stat
+import tempfile
+import threading
+import time
+from itertools import chain, count
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+# New files get the usual permissions; mkstemp would leave them owner-only.
+# The umask can only be read by setting it, so that happens once, up front.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+NEW_FILE_MODE = 0o666 & ~_UMASK
+# Documents are saved in pieces of this many characters, read on the event
+# loop for at most SAVE_SLICE_SECONDS per turn; at most SAVE_QUEUE_PIECES of
+# them wait to be encoded and written.
+SAVE_PIECE_CHARS = 256 * 1024
+SAVE_SLICE_SECONDS = 0.008
+SAVE_QUEUE_PIECES = 4
+# How long reading waits for the writer to catch up, and how often a long
+# save reports its progress.
+SAVE_WAIT_MS = 5
+SAVE_REPORT_SECONDS = 0.25
+# Writes waiting on the event loop for their text at once.
+SAVE_THREADS = 8
+
+_commit_lock = threading.Lock()
+_generations = count(1)
+_committed = {}
+
+
+def next_generation():
+    return next(_generations)
+
+
+def write_atomic(file_path, chunks, generation=None):
+    # Writes to a temporary file next to the target, fsyncs it and renames it
+    # over the target, so a crash or a full disk never leaves a half-written
+    # file behind. The target keeps its permission bits. Generations are taken
+    # when the text is snapshotted; a write whose snapshot is older than one
+    # already committed to the same path is dropped and returns False.
+    if generation is None:
+        generation = next_generation()
+    file_path = os.path.abspath(file_path)
+    directory = os.path.dirname(file_path)
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(file_path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            for chunk in chunks:
+                file.write(chunk)
+            file.flush()
+            os.fsync(file.fileno())
+        with _commit_lock:
+            if _committed.get(file_path, 0) > generation:
+                os.unlink(temp_path)
+                return False
+            try:
+                mode = stat.S_IMODE(os.stat(file_path).st_mode)
+            except FileNotFoundError:
+                mode = NEW_FILE_MODE
+            os.chmod(temp_path, mode)
+            os.replace(temp_path, file_path)
+            _committed[file_path] = generation
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except OSError:
+            pass
+        raise
+    if hasattr(os, "O_DIRECTORY"):
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError:
+            pass
+    return True
+
+
+class WriteSignals(QObject):
+    finished = pyqtSignal(str)
+
+
+class SaveCancelled(Exception):
+    pass
+
+
+class StreamWriteTask(QRunnable):
+    # Encodes the pieces of text put on its queue as they arrive and writes
+    # them atomically on the thread pool; None ends the text. finished
+    # carries an error message, or an empty string on success.
+    def __init__(self, file_path, encoding, bom):
+        super().__init__()
+        self.file_path = file_path
+        self.encoding = encoding
+        self.bom = bom
+        self.queue = queue.Queue(SAVE_QUEUE_PIECES)
+        self.generation = next_generation()
+        self.cancelled = False
+        self.error = None
+        self.done = threading.Event()
+        self.signals = WriteSignals()
+
+    def run(self):
+        self.write(iter(self.queue.get, None))
+
+    def write(self, pieces):
+        try:
+            write_atomic(self.file_path, self._chunks(pieces), self.generation)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done.set()
+        self.signals.finished.emit(self.message())
+
+    def message(self):
+        if self.error is None:
+            return ""
+        return str(self.error) or type(self.error).__name__
+
+    def _chunks(self, pieces):
+        # Raising here makes write_atomic throw the temporary file away.
+        encoder = codecs.getincrementalencoder(self.encoding)()
+        yield self.bom
+        for text in pieces:
+            if self.cancelled:
+                break
+            yield encoder.encode(text)
+        if self.cancelled:
+            raise SaveCancelled("The save was cancelled")
+        yield encoder.encode("", True)
+
+
+class DocumentWriter(QObject):
+    # Saves an editor's document without ever holding its whole text as one
+    # string: the text is read on the event loop a piece at a time, with the
+    # file's line endings, and a StreamWriteTask encodes and writes the
+    # pieces as they come. An edit made before all of it is read abandons
+    # the write, as the file would mix two versions of the text; with freeze
+    # the editor is read-only until the write is done.
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(str)
+    # Writes have threads of their own, so a save starts at once rather than
+    # behind whatever else the global pool is running.
+    _threads = None
+
+    @classmethod
+    def threads(cls):
+        if cls._threads is None:
+            cls._threads = QThreadPool()
+            cls._threads.setMaxThreadCount(SAVE_THREADS)
+        return cls._threads
+
+    def __init__(self, editor, file_path, encoding, bom, freeze=False):
+        super().__init__(editor)
+        self.editor = editor
+        self.file_path = file_path
+        self.encoding = encoding
+        self.bom = bom
+        self.freeze = freeze
+        self.revision = editor.edit_revision
+        self.reported = False
+        self.task = StreamWriteTask(file_path, encoding, bom)
+        self.task.signals.finished.connect(self._written)
+        self._position = 0
+        self._length = 0
+        self._read_all = False
+        self._done = False
+        self._was_read_only = editor.isReadOnly()
+        self._last_report = time.perf_counter()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._read_slice)
+
+    def start(self):
+        if self.freeze:
+            self.editor.setReadOnly(True)
+        self.threads().start(self.task)
+        self._timer.start(0)
+
+    def cancel(self):
+        self._timer.stop()
+        self._read_all = True
+        self.task.cancelled = True
+        try:
+            self.task.queue.put_nowait(None)
+        except queue.Full:
+            # The writer is busy with the queue and sees the flag next.
+            pass
+
+    def finish(self):
+        # Reads the rest of the text at once and waits for the write, for a
+        # document about to go away. Returns the error message.
+        self._timer.stop()
+        if self.threads().tryTake(self.task):
+            # No pool thread got to it yet, so it is written here.
+            queued = []
+            while not self.task.queue.empty():
+                text = self.task.queue.get_nowait()
+                if text is not None:
+                    queued.append(text)
+            self.task.write(chain(queued, self._rest()))
+        else:
+            while not self.task.done.is_set():
+                if self._read_all or self.task.queue.full():
+                    self.task.done.wait(SAVE_WAIT_MS / 1000)
+                else:
+                    self.task.queue.put_nowait(self._read_next())
+        self._complete()
+        return self.task.message()
+
+    def _rest(self):
+        while not self._read_all:
+            text = self._read_next()
+            if text is None:
+                return
+            yield text
+
+    def _read_next(self):
+        # The next piece of text, or None once all of it has been read (or an
+        # edit abandoned the write).
+        if self.editor.edit_revision != self.revision:
+            self.task.cancelled = True
+        document = self.editor.document()
+        self._length = document.characterCount() - 1
+        if self.task.cancelled or self._position >= self._length:
+            self._read_all = True
+            return None
+        end = min(self._position + SAVE_PIECE_CHARS, self._length)
+        cursor = QTextCursor(document)
+        cursor.setPosition(self._position)
+        cursor.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+        text = cursor.selectedText()
+        if end < self._length and text and "\ud800" <= text[-1] <= "\udbff":
+            # Positions count UTF-16 units; a surrogate pair is not split.
+            text = text[:-1]
+            end -= 1
+        self._position = end
+        return text.replace("\u2029", self.editor.newline)
+
+    def _read_slice(self):
+        deadline = time.perf_counter() + SAVE_SLICE_SECONDS
+        while not self._read_all and not self.task.queue.full() and time.perf_counter() < deadline:
+            self.task.queue.put_nowait(self._read_next())
+        if self._read_all:
+            return
+        now = time.perf_counter()
+        if now - self._last_report >= SAVE_REPORT_SECONDS:
+            self._last_report = now
+            self.reported = True
+            self.progress.emit(self._position * 100 // max(self._length, 1))
+        self._timer.start(SAVE_WAIT_MS if self.task.queue.full() else 0)
+
+    def _complete(self):
+        if self._done:
+            return False
+        self._done = True
+        self._timer.stop()
+        if self.freeze and not self._was_read_only:
+            self.editor.setReadOnly(False)
+        return True
+
+    def _written(self, error):
+        if self._complete():
+            self.finished.emit(error)
@@ -0,0 +1,246 @@
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, wait
+from PyQt6.QtWidgets import (QDockWidget, QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QToolButton, QPushButton,
+                             QLabel, QTreeWidget, QTreeWidgetItem)
+from PyQt6.QtCore import Qt, QObject, QRunnable, pyqtSignal
+from modules.textSearch import walk, search_batch, compile_pattern, query_trigrams
+from modules.workerPool import WorkerPool
+
+# Files are handed to the worker processes in batches of about this many
+# files or bytes, and at most BATCHES_PER_WORKER batches per worker wait.
+BATCH_FILES = 128
+BATCH_BYTES = 4 * 1024 * 1024
+BATCHES_PER_WORKER = 2
+# The search stops once this many lines have matched.
+MAX_RESULTS = 10000
+
+
+class SearchSignals(QObject):
+    found = pyqtSignal(list)
+    progress = pyqtSignal(int)
+    narrowed = pyqtSignal(int)
+    finished = pyqtSignal(int, bool)
+    failed = pyqtSignal(str)
+
+
+class FindInFilesTask(QRunnable):
+    # Walks root on the thread pool and feeds the files to the worker
+    # processes. Results are emitted batch by batch as they arrive. With a
+    # trigram index of root only the files it cannot rule out are searched.
+    def __init__(self, root, query, index=None):
+        super().__init__()
+        self.root = root
+        self.query = query
+        self.index = index
+        self.executor = None
+        self.cancelled = False
+        self.signals = SearchSignals()
+
+    def _files(self):
+        # The path and size of each file to search.
+        trigrams = query_trigrams(self.query) if self.index is not None else None
+        if trigrams is None:
+            return ((path, size) for path, size, _ in walk(self.root))
+        # Files changed since the index was last updated are read again first.
+        self.index.update(self.executor, lambda: self.cancelled)
+        paths = self.index.candidates(trigrams)
+        self.signals.narrowed.emit(len(paths))
+        found = []
+        for path in paths:
+            entry = self.index.files.get(path)
+            if entry is not None:
+                found.append((path, entry[1]))
+        return found
+
+    def run(self):
+        # Submitted batches and their number of files.
+        pending = {}
+        searched = 0
+        batch = []
+        batch_bytes = 0
+        try:
+            pool = WorkerPool.shared()
+            self.executor = pool.executor()
+            for path, size in self._files():
+                if self.cancelled:
+                    break
+                batch.append(path)
+                batch_bytes += size
+                if len(batch) >= BATCH_FILES or batch_bytes >= BATCH_BYTES:
+                    while len(pending) >= pool.workers * BATCHES_PER_WORKER and not self.cancelled:
+                        searched += self._collect(pending)
+                    pending[self.executor.submit(search_batch, batch, self.query)] = len(batch)
+                    batch = []
+                    batch_bytes = 0
+            if batch and not self.cancelled:
+                pending[self.executor.submit(search_batch, batch, self.query)] = len(batch)
+            while pending and not self.cancelled:
+                searched += self._collect(pending)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        finally:
+            for future in pending:
+                future.cancel()
+            self.signals.finished.emit(searched, self.cancelled)
+
+    def _collect(self, pending):
+        # Waits briefly for a batch to finish; returns the number of files
+        # searched by the batches that did.
+        done, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+        searched = 0
+        for future in done:
+            files = pending.pop(future)
+            searched += files
+            self.signals.progress.emit(files)
+            try:
+                results = future.result()
+            except Exception:
+                continue
+            if results and not self.cancelled:
+                self.signals.found.emit(results)
+        return searched
+
+
+class FindInFilesPanel(QDockWidget):
+    # Searches every text file under the explorer's folder. Files are read and
+    # searched in worker processes; double-clicking a result opens the file
+    # at that line.
+    def __init__(self, notepad):
+        super().__init__("Find in Files", notepad)
+        self.setObjectName("FindInFilesDock")
+        self.notepad = notepad
+        self.task = None
+        self.root = None
+        self.result_count = 0
+        self.searched = 0
+
+        widget = QWidget()
+        layout = QVBoxLayout(widget)
+        layout.setContentsMargins(5, 5, 5, 5)
+        row = QHBoxLayout()
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Find in files...")
+        self.query_input.returnPressed.connect(self.start_search)
+        row.addWidget(self.query_input)
+        self.regex_button = self._option_button(".*", "Regular expression")
+        self.case_button = self._option_button("Aa", "Match case")
+        self.word_button = self._option_button("W", "Whole word")
+        for button in (self.regex_button, self.case_button, self.word_button):
+            row.addWidget(button)
+        self.search_button = QPushButton("Search")
+        self.search_button.clicked.connect(self.toggle_search)
+        row.addWidget(self.search_button)
+        layout.addLayout(row)
+
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+        self.results = QTreeWidget()
+        self.results.setHeaderHidden(True)
+        self.results.setUniformRowHeights(True)
+        self.results.itemDoubleClicked.connect(self._open_result)
+        layout.addWidget(self.results)
+        self.setWidget(widget)
+
+    def _option_button(self, text, tooltip):
+        button = QToolButton()
+        button.setText(text)
+        button.setToolTip(tooltip)
+        button.setCheckable(True)
+        return button
+
+    def toggle_search(self):
+        if self.task is not None:
+            self.cancel()
+        else:
+            self.start_search()
+
+    def start_search(self):
+        self.cancel()
+        text = self.query_input.text()
+        root = self.notepad.current_folder
+        if not text or not root:
+            return
+        query = (text, self.regex_button.isChecked(), self.case_button.isChecked(), self.word_button.isChecked())
+        try:
+            compile_pattern(*query)
+        except re.error as e:
+            self.status_label.setText(f"Invalid pattern: {str(e)}")
+            return
+        indexer = self.notepad.folder_indexer
+        index = indexer.index_for(root) if indexer is not None else None
+        self.results.clear()
+        self.root = root
+        self.result_count = 0
+        self.searched = 0
+        self.status_label.setText(f"Searching {root}...")
+        self.search_button.setText("Stop")
+        self.task = FindInFilesTask(root, query, index)
+        task = self.task
+        task.signals.found.connect(lambda results: self._add_results(task, results))
+        task.signals.progress.connect(lambda searched: self._show_progress(task, searched))
+        task.signals.narrowed.connect(lambda candidates: self._show_narrowed(task, candidates))
+        task.signals.finished.connect(lambda searched, cancelled: self._search_finished(task))
+        task.signals.failed.connect(self._search_failed)
+        WorkerPool.shared().start(task)
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancelled = True
+            self.task = None
+            self.search_button.setText("Search")
+            self.status_label.setText(f"Stopped: {self._summary()}")
+
+    def _summary(self):
+        files = self.results.topLevelItemCount()
+        return f"{self.result_count} matching lines in {files} of {self.searched} files searched"
+
+    def _add_results(self, task, results):
+        if task is not self.task:
+            return
+        self.results.setUpdatesEnabled(False)
+        try:
+            for path, matches in results:
+                matches = matches[:MAX_RESULTS - self.result_count]
+                file_item = QTreeWidgetItem([f"{os.path.relpath(path, self.root)} ({len(matches)})"])
+                file_item.setData(0, Qt.ItemDataRole.UserRole, (path, 0))
+                for line, column, preview in matches:
+                    item = QTreeWidgetItem(file_item, [f"{line + 1}: {preview}"])
+                    item.setData(0, Qt.ItemDataRole.UserRole, (path, line))
+                self.results.addTopLevelItem(file_item)
+                self.result_count += len(matches)
+                if self.result_count >= MAX_RESULTS:
+                    break
+        finally:
+            self.results.setUpdatesEnabled(True)
+        if self.result_count >= MAX_RESULTS:
+            self.cancel()
+            self.status_label.setText(f"Stopped after {MAX_RESULTS} results: {self._summary()}")
+
+    def _show_progress(self, task, searched):
+        if task is not self.task:
+            return
+        self.searched += searched
+        self.status_label.setText(f"Searching... {self._summary()}")
+
+    def _show_narrowed(self, task, candidates):
+        if task is not self.task:
+            return
+        self.status_label.setText(f"Searching {candidates} files the index could not rule out...")
+
+    def _search_finished(self, task):
+        if task is not self.task:
+            return
+        self.task = None
+        self.search_button.setText("Search")
+        self.status_label.setText(f"Done: {self._summary()}")
+
+    def _search_failed(self, error):
+        # The pool is broken (a worker died, say); the next search starts a
+        # new one.
+        WorkerPool.shared().reset()
+        self.notepad.statusBar().showMessage(f"Find in files failed: {error}", 10000)
+
+    def _open_result(self, item, column):
+        path, line = item.data(0, Qt.ItemDataRole.UserRole)
+        self.notepad.file_manager.open_file(path, line)
@@ -0,0 +1,146 @@
+from array import array
+from PyQt6.QtGui import QTextBlockUserData, QTextCursor
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+# Lines tokenized per background job.
+CHUNK_LINES = 1000
+
+
+class BlockSpans(QTextBlockUserData):
+    # Tokenizer output cached on a block: flat (start, length, kind) triples,
+    # the lexer state the line was tokenized from and the one it ended in, and
+    # the block revision and length it belongs to.
+    __slots__ = ("spans", "start_state", "end_state", "revision", "length")
+
+    def __init__(self, spans, start_state, end_state, revision, length):
+        super().__init__()
+        self.spans = spans
+        self.start_state = start_state
+        self.end_state = end_state
+        self.revision = revision
+        self.length = length
+
+    def matches(self, block, start_state):
+        return (self.revision == block.revision() and self.length == block.length() - 1
+                and self.start_state == start_state)
+
+
+class TokenizeSignals(QObject):
+    finished = pyqtSignal(int, int, object)
+
+
+class TokenizeJob(QRunnable):
+    def __init__(self, tokenizer, revision, first, texts, state):
+        super().__init__()
+        self.signals = TokenizeSignals()
+        self.tokenizer = tokenizer
+        self.revision = revision
+        self.first = first
+        self.texts = texts
+        self.state = state
+
+    def run(self):
+        results = []
+        state = self.state
+        tokenize = self.tokenizer.tokenize
+        for text in self.texts:
+            spans, end_state = tokenize(text, state)
+            flat = array("i")
+            for span in spans:
+                flat.extend(span)
+            results.append((flat, state, end_state))
+            state = end_state
+        self.signals.finished.emit(self.revision, self.first, results)
+
+
+class TokenizeWorker(QObject):
+    # Tokenizes snapshots of a document on the global thread pool, one job at a
+    # time, starting from the earliest block whose cached spans are missing or
+    # stale. Results carry the document revision they were taken at and are
+    # dropped if the text changed since; the affected blocks are simply
+    # requested again.
+    def __init__(self, highlighter):
+        super().__init__(highlighter)
+        self.highlighter = highlighter
+        self.revision = 0
+        self._job = None
+        self._dirty = []
+        self._last_request = -2
+        self._scheduled = False
+        highlighter.document().contentsChange.connect(self._bump_revision)
+
+    def request(self, block):
+        number = block.blockNumber()
+        busy = self._job is not None or self._dirty
+        # A job keeps going while the following blocks are stale too, so a run
+        # of consecutive requests (a paste, a fresh document) needs one entry.
+        if busy and number == self._last_request + 1:
+            self._last_request = number
+            return
+        self._last_request = number
+        for cursor in self._dirty:
+            if cursor.blockNumber() == number:
+                return
+        self._dirty.append(QTextCursor(block))
+        if self._job is None and not self._scheduled:
+            # Dispatching on the next turn snapshots the text after the edit
+            # that caused the request has finished, not halfway through it.
+            self._scheduled = True
+            QTimer.singleShot(0, self._dispatch)
+
+    def _bump_revision(self, *args):
+        self.revision += 1
+
+    def _dispatch(self):
+        self._scheduled = False
+        if self._job is not None:
+            return
+        self._dirty.sort(key=lambda cursor: cursor.position())
+        while self._dirty:
+            block = self._dirty[0].block()
+            if block.isValid() and self._needs_tokens(block):
+                break
+            self._dirty.pop(0)
+        else:
+            return
+        texts = []
+        current = block
+        while current.isValid() and len(texts) < CHUNK_LINES:
+            texts.append(current.text())
+            current = current.next()
+        state = max(block.previous().userState(), 0) if block.previous().isValid() else 0
+        self._job = TokenizeJob(self.highlighter.language.tokenizer, self.revision, block.blockNumber(), texts, state)
+        self._job.signals.finished.connect(self._apply)
+        QThreadPool.globalInstance().start(self._job)
+
+    def _needs_tokens(self, block):
+        data = block.userData()
+        previous = block.previous()
+        start_state = max(previous.userState(), 0) if previous.isValid() else 0
+        return not isinstance(data, BlockSpans) or not data.matches(block, start_state)
+
+    def _apply(self, revision, first, results):
+        if revision != self.revision:
+            self._job = None
+            self._dispatch()
+            return
+        changed = []
+        block = self.highlighter.document().findBlockByNumber(first)
+        for flat, start_state, end_state in results:
+            if not block.isValid():
+                break
+            old = block.userData()
+            block.setUserData(BlockSpans(flat, start_state, end_state, block.revision(), block.length() - 1))
+            if (not isinstance(old, BlockSpans) or old.spans != flat or old.end_state != end_state
+                    or block.userState() != end_state):
+                changed.append(block)
+            block = block.next()
+        # All of the chunk is cached before anything is re-applied, so a state
+        # change cascading into the next block finds its spans already there.
+        for changed_block in changed:
+            self.highlighter.rehighlightBlock(changed_block)
+        self._job = None
+        self._dirty = [cursor for cursor in self._dirty if cursor.blockNumber() >= first + len(results)]
+        if block.isValid() and self._needs_tokens(block):
+            self._dirty.append(QTextCursor(block))
+        self._dispatch()
@@ -0,0 +1,226 @@
+import os
+import json
+from PyQt6.QtGui import QTextCharFormat, QColor, QFont
+from modules.tokenizer import Tokenizer
+
+COLORS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "syntaxColors.json")
+
+DEFAULT_COLORS = {
+    "keyword": "#c678dd",
+    "string": "#98c379",
+    "comment": "#5c6370",
+    "number": "#d19a66",
+    "function": "#61afef",
+    "class": "#e5c07b",
+    "decorator": "#b58900"
+}
+
+EXTENSIONS = {
+    ".py": "python",
+    ".js": "javascript",
+    ".ts": "typescript",
+    ".java": "java",
+    ".c": "c++",
+    ".cpp": "c++",
+    ".cc": "c++",
+    ".cxx": "c++",
+    ".hpp": "c++",
+    ".h": "c++",
+    ".cs": "c#",
+    ".html": "html",
+    ".htm": "html",
+    ".css": "css"
+}
+
+BOLD = "bold"
+ITALIC = "italic"
+
+PYTHON_KEYWORDS = [
+    "and", "as", "assert", "break", "class", "continue", "def", "del", "elif",
+    "else", "except", "False", "finally", "for", "from", "global", "if", "import",
+    "in", "is", "lambda", "None", "nonlocal", "not", "or", "pass", "raise",
+    "return", "True", "try", "while", "with", "yield"
+]
+
+JAVASCRIPT_KEYWORDS = [
+    "break", "case", "catch", "class", "const", "continue", "debugger", "default", "delete",
+    "do", "else", "export", "extends", "finally", "for", "function", "if", "import", "in",
+    "instanceof", "let", "new", "return", "super", "switch", "this", "throw", "try", "typeof",
+    "var", "void", "while", "with", "yield", "enum", "implements", "interface", "package", "private",
+    "protected", "public", "static", "await", "async"
+]
+
+JAVA_KEYWORDS = [
+    "abstract", "assert", "boolean", "break", "byte", "case", "catch", "char", "class", "const",
+    "continue", "default", "do", "double", "else", "enum", "extends", "final", "finally", "float",
+    "for", "goto", "if", "implements", "import", "instanceof", "int", "interface", "long", "native",
+    "new", "package", "private", "protected", "public", "return", "short", "static", "strictfp",
+    "super", "switch", "synchronized", "this", "throw", "throws", "transient", "try", "void",
+    "volatile", "while", "true", "false", "null"
+]
+
+CPP_KEYWORDS = [
+    "alignas", "alignof", "and", "and_eq", "asm", "auto", "bitand", "bitor", "bool", "break", "case",
+    "catch", "char", "char16_t", "char32_t", "class", "compl", "const", "constexpr", "const_cast",
+    "continue", "decltype", "default", "delete", "do", "double", "dynamic_cast", "else", "enum",
+    "explicit", "export", "extern", "false", "float", "for", "friend", "goto", "if", "inline", "int",
+    "long", "mutable", "namespace", "new", "noexcept", "not", "not_eq", "nullptr", "operator", "or",
+    "or_eq", "private", "protected", "public", "register", "reinterpret_cast", "return", "short",
+    "signed", "sizeof", "static", "static_assert", "static_cast", "struct", "switch", "template",
+    "this", "thread_local", "throw", "true", "try", "typedef", "typeid", "typename", "union",
+    "unsigned", "using", "virtual", "void", "volatile", "wchar_t", "while", "xor", "xor_eq"
+]
+
+CSHARP_KEYWORDS = [
+    "abstract", "as", "base", "bool", "break", "byte", "case", "catch", "char", "checked", "class",
+    "const", "continue", "decimal", "default", "delegate", "do", "double", "else", "enum", "event",
+    "explicit", "extern", "false", "finally", "fixed", "float", "for", "foreach", "goto", "if",
+    "implicit", "in", "int", "interface", "internal", "is", "lock", "long", "namespace", "new",
+    "null", "object", "operator", "out", "override", "params", "private", "protected", "public",
+    "readonly", "ref", "return", "sbyte", "sealed", "short", "sizeof", "stackalloc", "static",
+    "string", "struct", "switch", "this", "throw", "true", "try", "typeof", "uint", "ulong",
+    "unchecked", "unsafe", "ushort", "using", "virtual", "void", "volatile", "while"
+]
+
+# Each grammar lists its token rules as (pattern, color key, styles) in priority
+# order. The rules are merged into a single-pass Tokenizer, so where two rules
+# could match at the same position the earlier one wins; comments and strings
+# therefore come first so keywords inside them are not highlighted. A fourth
+# item makes the rule a region that stays open across lines until that close
+# pattern matches.
+KEYWORDS = object()
+
+STRING = r'"[^"\\]*(?:\\.[^"\\]*)*"|\'[^\'\\]*(?:\\.[^\'\\]*)*\''
+NUMBER = r'\b\d+(?:\.\d+)?\b'
+BLOCK_COMMENT = (r'/\*', "comment", (ITALIC,), r'.*?\*/')
+
+C_STYLE_RULES = [
+    BLOCK_COMMENT,
+    (r'//.*', "comment", (ITALIC,)),
+    (STRING, "string", ()),
+    (r'\bclass\s+[A-Za-z_][A-Za-z0-9_]*', "class", (BOLD,)),
+    (KEYWORDS, "keyword", (BOLD,)),
+    (r'\b[A-Za-z_][A-Za-z0-9_]*\s*\(', "function", ()),
+    (NUMBER, "number", ())
+]
+
+SCRIPT_RULES = [
+    BLOCK_COMMENT,
+    (r'//.*', "comment", (ITALIC,)),
+    (r'`', "string", (), r'(?:[^`\\]|\\.)*`'),
+    (STRING, "string", ()),
+    (r'\bfunction\s+[A-Za-z_][A-Za-z0-9_]*', "function", (BOLD,)),
+    (r'\bclass\s+[A-Za-z_][A-Za-z0-9_]*', "class", (BOLD,)),
+    (KEYWORDS, "keyword", (BOLD,)),
+    (NUMBER, "number", ())
+]
+
+GRAMMARS = {
+    "python": (PYTHON_KEYWORDS, [
+        (r'[rRbBuUfF]{0,2}"""', "string", (), r'(?:\\.|[^\\])*?"""'),
+        (r"[rRbBuUfF]{0,2}'''", "string", (), r"(?:\\.|[^\\])*?'''"),
+        (r'#.*', "comment", (ITALIC,)),
+        (STRING, "string", ()),
+        (r'@\w+', "decorator", ()),
+        (r'\bdef\s+[A-Za-z_][A-Za-z0-9_]*', "function", (BOLD,)),
+        (r'\bclass\s+[A-Za-z_][A-Za-z0-9_]*', "class", (BOLD,)),
+        (KEYWORDS, "keyword", (BOLD,)),
+        (NUMBER, "number", ())
+    ]),
+    "javascript": (JAVASCRIPT_KEYWORDS, SCRIPT_RULES),
+    "typescript": (JAVASCRIPT_KEYWORDS, SCRIPT_RULES),
+    "java": (JAVA_KEYWORDS, C_STYLE_RULES),
+    "c++": (CPP_KEYWORDS, C_STYLE_RULES),
+    "c#": (CSHARP_KEYWORDS, C_STYLE_RULES),
+    "html": ([], [
+        (r'<!--', "comment", (ITALIC,), r'.*?-->'),
+        (r'"[^"]*"|\'[^\']*\'', "string", ()),
+        (r'</?[a-zA-Z][a-zA-Z0-9]*', "tag", (BOLD,)),
+        (r'\b[a-zA-Z:-]+(?==)', "attribute", ())
+    ]),
+    "css": ([], [
+        BLOCK_COMMENT,
+        (r'"[^"]*"|\'[^\']*\'', "string", ()),
+        (r'^[.#]?[a-zA-Z0-9_-]+(?=\s*\{)', "selector", (BOLD,)),
+        (r'\b[a-zA-Z-]+(?=\s*:)', "property", ()),
+        (NUMBER, "number", ())
+    ])
+}
+
+FALLBACK_COLORS = {
+    "tag": "#22863a",
+    "attribute": "#6f42c1",
+    "selector": "#22863a",
+    "property": "#005cc5"
+}
+
+
+class Language:
+    __slots__ = ("name", "colors", "tokenizer", "formats")
+
+    def __init__(self, name, colors, tokenizer, formats):
+        self.name = name
+        self.colors = colors
+        self.tokenizer = tokenizer
+        self.formats = formats
+
+
+class LanguageRegistry:
+    _shared = None
+
+    def __init__(self, colors_path=COLORS_PATH):
+        self.colors_path = colors_path
+        self._color_data = None
+        self._languages = {}
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def language_for_path(self, path):
+        if not path:
+            return None
+        name = EXTENSIONS.get(os.path.splitext(path)[1].lower())
+        if name is None:
+            return None
+        return self.get(name)
+
+    def get(self, name):
+        language = self._languages.get(name)
+        if language is None and name in GRAMMARS:
+            language = self._compile(name)
+            self._languages[name] = language
+        return language
+
+    def colors(self, name):
+        if self._color_data is None:
+            try:
+                with open(self.colors_path, "r", encoding="utf-8") as f:
+                    self._color_data = json.load(f)
+            except Exception:
+                self._color_data = {}
+        return self._color_data.get(name) or self._color_data.get("python") or DEFAULT_COLORS
+
+    def _compile(self, name):
+        keywords, rules = GRAMMARS[name]
+        colors = self.colors(name)
+        patterns = []
+        formats = []
+        for pattern, color_key, styles, *close in rules:
+            if pattern is KEYWORDS:
+                words = sorted(set(keywords), key=lambda word: (-len(word), word))
+                pattern = rf'\b(?:{"|".join(words)})\b'
+            patterns.append((pattern, close[0] if close else None))
+            formats.append(self._format(colors, color_key, styles))
+        return Language(name, colors, Tokenizer(patterns), tuple(formats))
+
+    def _format(self, colors, color_key, styles):
+        fmt = QTextCharFormat()
+        fmt.setForeground(QColor(colors.get(color_key) or FALLBACK_COLORS.get(color_key, "#000000")))
+        if BOLD in styles:
+            fmt.setFontWeight(QFont.Weight.Bold)
+        if ITALIC in styles:
+            fmt.setFontItalic(True)
+        return fmt
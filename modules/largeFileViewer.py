@@ -0,0 +1,344 @@
+import re
+import mmap
+import threading
+from bisect import bisect_left
+from PyQt6.QtWidgets import QAbstractScrollArea, QMessageBox
+from PyQt6.QtGui import QPainter, QFontDatabase, QKeySequence
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from modules.encodingDetector import EncodingDetector
+from modules.editor import FindWidget
+
+# The line index stores the number of newlines before every CHECKPOINT bytes,
+# so locating any line means a bisect plus a scan of at most one checkpoint.
+CHECKPOINT = 64 * 1024
+INDEX_READ = 16 * 1024 * 1024
+SEARCH_WINDOW = 4 * 1024 * 1024
+# Longer lines are cut off when drawn.
+MAX_LINE_CHARS = 4096
+SAMPLE = 64 * 1024
+
+UNSUPPORTED_ENCODINGS = ("utf-16", "utf-32")
+
+
+def release_pages(data, start, end):
+    # Scanned pages of the map are clean and can be dropped right away instead
+    # of counting against the process until the kernel reclaims them.
+    if hasattr(mmap, "MADV_DONTNEED") and not data.closed:
+        start -= start % mmap.PAGESIZE
+        data.madvise(mmap.MADV_DONTNEED, start, end - start)
+
+
+class SharedMap:
+    # A read-only map of a file that searches on the pool share with the view.
+    # Closing it waits until the last search reading it has stopped, as
+    # closing a map still being read fails (and reading a closed one raises).
+    def __init__(self, file_path):
+        self._file = open(file_path, "rb")
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._lock = threading.Lock()
+        self._users = 0
+        self._closing = False
+
+    def acquire(self):
+        with self._lock:
+            self._users += 1
+
+    def release(self):
+        with self._lock:
+            self._users -= 1
+            close = self._closing and not self._users
+        if close:
+            self._close()
+
+    def close(self):
+        with self._lock:
+            self._closing = True
+            close = not self._users
+        if close:
+            self._close()
+
+    def _close(self):
+        self.data.close()
+        self._file.close()
+
+
+class IndexSignals(QObject):
+    progress = pyqtSignal(object)
+    finished = pyqtSignal()
+
+
+class LineIndexTask(QRunnable):
+    # Streams the file with plain reads rather than through the map, so the
+    # index costs no resident pages; emits the cumulative newline counts of
+    # each batch of checkpoints.
+    def __init__(self, file_path):
+        super().__init__()
+        self.file_path = file_path
+        self.cancelled = False
+        self.signals = IndexSignals()
+
+    def run(self):
+        total = 0
+        try:
+            with open(self.file_path, "rb") as file:
+                while not self.cancelled:
+                    data = file.read(INDEX_READ)
+                    if not data:
+                        break
+                    counts = []
+                    for start in range(0, len(data), CHECKPOINT):
+                        total += data.count(b"\n", start, start + CHECKPOINT)
+                        counts.append(total)
+                    self.signals.progress.emit(counts)
+        except OSError:
+            pass
+        if not self.cancelled:
+            self.signals.finished.emit()
+
+
+class SearchSignals(QObject):
+    found = pyqtSignal(int, int)
+    not_found = pyqtSignal()
+
+
+class SearchTask(QRunnable):
+    # Searches the mapped bytes in windows that end on a line break, so no
+    # single call holds the interpreter for long and a match never spans a
+    # window boundary. Wraps around once past the end. The map is held until
+    # the search stops.
+    def __init__(self, mapped, pattern, start):
+        super().__init__()
+        self.mapped = mapped
+        self.data = mapped.data
+        self.pattern = pattern
+        self.start = start
+        self.cancelled = False
+        self.signals = SearchSignals()
+
+    def run(self):
+        try:
+            self._search()
+        finally:
+            self.mapped.release()
+
+    def _search(self):
+        size = len(self.data)
+        for begin, end in ((self.start, size), (0, min(self.start + SEARCH_WINDOW, size))):
+            position = begin
+            while position < end and not self.cancelled:
+                limit = min(position + SEARCH_WINDOW, size)
+                if limit < size:
+                    newline = self.data.rfind(b"\n", position, limit)
+                    if newline > position:
+                        limit = newline + 1
+                match = self.pattern.search(self.data, position, limit)
+                if match:
+                    if not self.cancelled:
+                        self.signals.found.emit(match.start(), match.end() - match.start())
+                    return
+                release_pages(self.data, position, limit)
+                position = limit
+        if not self.cancelled:
+            self.signals.not_found.emit()
+
+
+class LargeFileView(QAbstractScrollArea):
+    # Read-only view of a memory-mapped file. Only the lines in the viewport
+    # are ever read and decoded, so memory use does not grow with file size.
+    def __init__(self, file_path, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self._map = SharedMap(file_path)
+        self.data = self._map.data
+        self.encoding, bom = EncodingDetector.shared().detect_sample(self.data[:SAMPLE])
+        self.data_start = len(bom)
+        self.checkpoints = [0]
+        self.indexed = False
+        self.match = None
+        self.match_end = None
+        # A match found past the lines indexed so far, shown once they are.
+        self._pending_match = None
+        self._search = None
+
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.verticalScrollBar().setRange(0, 0)
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+        self.init_find_widget()
+
+        self._index_task = LineIndexTask(file_path)
+        self._index_task.signals.progress.connect(self._add_checkpoints)
+        self._index_task.signals.finished.connect(self._index_finished)
+        QThreadPool.globalInstance().start(self._index_task)
+
+    @staticmethod
+    def supports(file_path):
+        with open(file_path, "rb") as file:
+            sample = file.read(SAMPLE)
+        encoding, _ = EncodingDetector.shared().detect_sample(sample)
+        return not encoding.lower().startswith(UNSUPPORTED_ENCODINGS)
+
+    def release(self):
+        self._index_task.cancelled = True
+        if self._search is not None:
+            self._search.cancelled = True
+        self._search = None
+        self._map.close()
+
+    def line_count(self):
+        lines = self.checkpoints[-1] + 1
+        return lines if self.indexed else max(lines - 1, 1)
+
+    def line_offset(self, line):
+        if line <= 0:
+            return self.data_start
+        checkpoint = bisect_left(self.checkpoints, line) - 1
+        position = checkpoint * CHECKPOINT
+        for _ in range(line - self.checkpoints[checkpoint]):
+            position = self.data.find(b"\n", position) + 1
+            if position == 0:
+                return len(self.data)
+        return position
+
+    def line_of_offset(self, offset):
+        checkpoint = offset // CHECKPOINT
+        if checkpoint >= len(self.checkpoints):
+            return None
+        return self.checkpoints[checkpoint] + self.data[checkpoint * CHECKPOINT:offset].count(b"\n")
+
+    def read_line(self, position):
+        end = self.data.find(b"\n", position)
+        if end == -1:
+            end = len(self.data)
+        raw = self.data[position:min(end, position + MAX_LINE_CHARS * 4)]
+        return raw.rstrip(b"\r").decode(self.encoding, "replace")[:MAX_LINE_CHARS], end + 1
+
+    def visible_lines(self):
+        return max(self.viewport().height() // self.fontMetrics().lineSpacing(), 1)
+
+    def go_to_line(self, line):
+        line = min(max(line, 0), self.line_count() - 1)
+        first = self.verticalScrollBar().value()
+        if not first <= line < first + self.visible_lines():
+            self.verticalScrollBar().setValue(max(line - self.visible_lines() // 2, 0))
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(self.viewport().rect(), self.palette().base())
+        metrics = self.fontMetrics()
+        line_height = metrics.lineSpacing()
+        x = 4 - self.horizontalScrollBar().value()
+        first = self.verticalScrollBar().value()
+        position = self.line_offset(first)
+        widest = 0
+        for row in range(self.visible_lines() + 1):
+            if position >= len(self.data) and (row > 0 or first > 0):
+                break
+            line = first + row
+            text, position = self.read_line(position)
+            y = row * line_height
+            if self.match is not None and self.match[0] == line:
+                prefix, length = self.match[1], self.match[2]
+                left = metrics.horizontalAdvance(text[:prefix])
+                width = metrics.horizontalAdvance(text[prefix:prefix + length])
+                painter.fillRect(x + left, y, width, line_height, self.palette().highlight())
+            painter.setPen(self.palette().text().color())
+            painter.drawText(x, y + metrics.ascent(), text)
+            widest = max(widest, metrics.horizontalAdvance(text))
+        painter.end()
+        self.horizontalScrollBar().setRange(0, max(widest - self.viewport().width() + 8, self.horizontalScrollBar().value()))
+        self.horizontalScrollBar().setPageStep(self.viewport().width())
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scroll_range()
+
+    def keyPressEvent(self, event):
+        scroll_bar = self.verticalScrollBar()
+        if event.matches(QKeySequence.StandardKey.Find):
+            self.show_find_widget()
+        elif event.key() == Qt.Key.Key_Up:
+            scroll_bar.setValue(scroll_bar.value() - 1)
+        elif event.key() == Qt.Key.Key_Down:
+            scroll_bar.setValue(scroll_bar.value() + 1)
+        elif event.key() == Qt.Key.Key_PageUp:
+            scroll_bar.setValue(scroll_bar.value() - self.visible_lines())
+        elif event.key() == Qt.Key.Key_PageDown:
+            scroll_bar.setValue(scroll_bar.value() + self.visible_lines())
+        elif event.key() == Qt.Key.Key_Home and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            scroll_bar.setValue(0)
+        elif event.key() == Qt.Key.Key_End and event.modifiers() & Qt.KeyboardModifier.ControlModifier:
+            scroll_bar.setValue(scroll_bar.maximum())
+        else:
+            super().keyPressEvent(event)
+
+    def init_find_widget(self):
+        self.find_widget = FindWidget()
+        self.find_widget.find_input.returnPressed.connect(self.find_text)
+        self.find_widget.hide()
+
+    def show_find_widget(self):
+        if not self.find_widget.isVisible():
+            self.find_widget.setParent(self)
+            self.find_widget.resize(200, 30)
+            self.find_widget.move(self.width() - 205, 5)
+            self.find_widget.show()
+        self.find_widget.find_input.setFocus()
+        self.find_widget.find_input.selectAll()
+
+    def find_text(self):
+        search_text = self.find_widget.find_input.text()
+        if not search_text:
+            return
+        try:
+            pattern = re.compile(re.escape(search_text.encode(self.encoding)))
+        except UnicodeEncodeError:
+            return
+        if self.match_end is not None:
+            start = self.match_end
+        else:
+            start = self.line_offset(self.verticalScrollBar().value())
+        if self._search is not None:
+            self._search.cancelled = True
+        self._pending_match = None
+        self._map.acquire()
+        self._search = SearchTask(self._map, pattern, min(start, len(self.data)))
+        self._search.signals.found.connect(self._show_match)
+        self._search.signals.not_found.connect(self._show_not_found)
+        QThreadPool.globalInstance().start(self._search)
+
+    def _show_match(self, offset, length):
+        self._search = None
+        line = self.line_of_offset(offset)
+        if line is None:
+            self._pending_match = (offset, length)
+            return
+        self._pending_match = None
+        prefix = self.data[self.line_offset(line):offset].decode(self.encoding, "replace")
+        matched = self.data[offset:offset + length].decode(self.encoding, "replace")
+        self.match = (line, len(prefix), len(matched))
+        self.match_end = offset + length
+        self.go_to_line(line)
+        self.viewport().update()
+
+    def _show_not_found(self):
+        self._search = None
+        QMessageBox.information(self, "Find", "No matches found.")
+
+    def _add_checkpoints(self, counts):
+        self.checkpoints.extend(counts)
+        self._update_scroll_range()
+        if self._pending_match is not None:
+            self._show_match(*self._pending_match)
+
+    def _index_finished(self):
+        self.indexed = True
+        self._update_scroll_range()
+        if self._pending_match is not None:
+            self._show_match(*self._pending_match)
+
+    def _update_scroll_range(self):
+        scroll_bar = self.verticalScrollBar()
+        scroll_bar.setPageStep(self.visible_lines())
+        scroll_bar.setRange(0, max(self.line_count() - self.visible_lines(), 0))
@@ -1,24 +1,81 @@
+import fnmatch
 import os
-from PyQt6.QtWidgets import QApplication, QMainWindow, QTabWidget, QTreeView, QSplitter, QFileDialog, QVBoxLayout, QWidget, QHeaderView, QStyle, QMessageBox
+import re
+import time
+from collections import deque
+from PyQt6.QtWidgets import QApplication, QMainWindow, QTabWidget, QTreeView, QSplitter, QFileDialog, QVBoxLayout, QWidget, QHeaderView, QStyle, QMessageBox, QInputDialog, QLineEdit
 from PyQt6.QtGui import QAction, QKeySequence, QFileSystemModel, QActionGroup
-from PyQt6.QtCore import Qt, QDir, QTimer, QSize, QRect, QSortFilterProxyModel
+from PyQt6.QtCore import Qt, QDir, QTimer, QSize, QRect, QSortFilterProxyModel, QModelIndex, QPersistentModelIndex
 from PyQt6.QtCore import QLoggingCategory
 from modules.editor import Editor
 from modules.fileManager import FileManager
 from modules.settings import Settings
+from modules.sessionStore import SessionStore
+from modules.documentLifecycle import DocumentLifecycle
+from modules.fileWatcher import FileWatcher
 from modules.themeManager import apply_theme
-from packaging import version
-import requests
-import webbrowser
+from modules.syntaxHightlighter import SyntaxHighlighter
+from modules.largeFileViewer import LargeFileView
+from modules.fileLoader import PlaceholderTab
+from modules.startupProfiler import StartupProfiler
+
+DIGITS = re.compile(r"(\d+)")
+# The explorer filter is applied once typing pauses for this long. It is
+# matched against the loaded rows for at most EXPLORER_FILTER_SLICE_SECONDS
+# per event loop turn, EXPLORER_FILTER_SLICE_ROWS rows of a folder at a time.
+EXPLORER_FILTER_DELAY_MS = 250
+EXPLORER_FILTER_SLICE_SECONDS = 0.008
+EXPLORER_FILTER_SLICE_ROWS = 256
+
+
+def natural_key(name):
+    # Case-insensitive, with runs of digits compared as numbers: "file9"
+    # comes before "file10". Text and numbers alternate, so two keys never
+    # compare a string with an int; the name itself breaks ties, kept apart
+    # so that "file" and "file1" do not compare it with a number.
+    parts = DIGITS.split(name.casefold())
+    for i in range(1, len(parts), 2):
+        parts[i] = int(parts[i])
+    return parts, name
 
 
 class FileNameProxyModel(QSortFilterProxyModel):
+    # Sort keys, and the casefolded names the filter looks at, are taken once
+    # per file and kept by the source index's internal id, which
+    # QFileSystemModel keeps for a file until it is removed; they are dropped
+    # for removed and renamed files.
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setDynamicSortFilter(True)
         self.folders_first = True
         self.sort_order = Qt.SortOrder.AscendingOrder
-
+        self._keys = {}
+        self._names = {}
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        self._forget_all()
+        model.rowsAboutToBeRemoved.connect(self._drop_keys)
+        model.modelAboutToBeReset.connect(self._forget_all)
+        model.fileRenamed.connect(self._renamed)
+
+    def _forget_all(self):
+        self._keys.clear()
+        self._names.clear()
+
+    def _drop_keys(self, parent, first, last):
+        model = self.sourceModel()
+        for row in range(first, last + 1):
+            file_id = model.index(row, 0, parent).internalId()
+            self._keys.pop(file_id, None)
+            self._names.pop(file_id, None)
+
+    def _renamed(self, path, old_name, new_name):
+        model = self.sourceModel()
+        for name in (old_name, new_name):
+            file_id = model.index(os.path.join(path, name)).internalId()
+            self._keys.pop(file_id, None)
+            self._names.pop(file_id, None)
 
     def columnCount(self, parent=None):
         return 1
@@ -32,28 +89,150 @@ class FileNameProxyModel(QSortFilterProxyModel):
                 return self.sourceModel().fileIcon(source_index)
         return None
 
-    def lessThan(self, left, right):
-        left_data = self.sourceModel().filePath(left)
-        right_data = self.sourceModel().filePath(right)
-        left_is_dir = self.sourceModel().isDir(left)
-        right_is_dir = self.sourceModel().isDir(right)
-
-        if left_is_dir != right_is_dir:
-            return left_is_dir
+    def sort_key(self, index):
+        # (is a folder, natural key)
+        key = self._keys.get(index.internalId())
+        if key is None:
+            model = self.sourceModel()
+            key = (model.isDir(index), natural_key(model.fileName(index)))
+            self._keys[index.internalId()] = key
+        return key
+
+    def filter_name(self, index):
+        # (is a folder, casefolded name)
+        name = self._names.get(index.internalId())
+        if name is None:
+            model = self.sourceModel()
+            name = (model.isDir(index), model.fileName(index).casefold())
+            self._names[index.internalId()] = name
+        return name
 
-        if self.sort_order == Qt.SortOrder.AscendingOrder:
-            return left_data.lower() < right_data.lower()
-        else:
-            return left_data.lower() > right_data.lower()
+    def lessThan(self, left, right):
+        left_is_dir, left_key = self.sort_key(left)
+        right_is_dir, right_key = self.sort_key(right)
+        if left_is_dir != right_is_dir and self.folders_first:
+            # Qt sorts descending by asking with the sides swapped; folders
+            # stay first either way.
+            if self.sort_order == Qt.SortOrder.AscendingOrder:
+                return left_is_dir
+            return right_is_dir
+        return left_key < right_key
 
     def sort(self, column, order):
         self.sort_order = order
         super().sort(column, order)
 
     def toggle_sort_order(self):
-        self.sort_order = Qt.SortOrder.DescendingOrder if self.sort_order == Qt.SortOrder.AscendingOrder else Qt.SortOrder.AscendingOrder
-        self.invalidate()
-        self.sort(0, self.sort_order)
+        # The keys are kept, so this only compares them again.
+        self.sort(0, Qt.SortOrder.DescendingOrder if self.sort_order == Qt.SortOrder.AscendingOrder else Qt.SortOrder.AscendingOrder)
+
+class FileNameFilterModel(QSortFilterProxyModel):
+    # Filters the rows of a FileNameProxyModel by name. Filtering over the
+    # sorted rows, in a proxy of its own, means a row shown again is never
+    # sorted in again. A new filter is matched against the loaded rows a
+    # slice at a time; the rows are then filtered again at once from what was
+    # matched. What was matched is kept by row, so it is dropped as soon as
+    # the rows change.
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setDynamicSortFilter(True)
+        self.name_filter = ""
+        self._match = None
+        self._matched = {}
+        # Folders still to match, as (parent, matched so far, is the root).
+        self._refilter = deque()
+        self._refilter_timer = QTimer(self)
+        self._refilter_timer.setSingleShot(True)
+        self._refilter_timer.timeout.connect(self._refilter_slice)
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        self._matched.clear()
+        for signal in (model.rowsAboutToBeInserted, model.rowsAboutToBeRemoved, model.rowsAboutToBeMoved, model.layoutAboutToBeChanged, model.modelAboutToBeReset):
+            signal.connect(self._rows_changing)
+
+    def _rows_changing(self, *args):
+        self._matched.clear()
+        if self._refilter:
+            self._refilter.clear()
+            self._refilter.append((QPersistentModelIndex(), [], True))
+
+    def map_from_files(self, index):
+        return self.mapFromSource(self.sourceModel().mapFromSource(index))
+
+    def map_to_files(self, index):
+        return self.sourceModel().mapToSource(self.mapToSource(index))
+
+    def sort(self, column, order):
+        # The rows come sorted from the source model.
+        self.sourceModel().sort(column, order)
+
+    def set_name_filter(self, text):
+        # Shows the files whose name contains text, or matches it as a glob
+        # pattern if it has any of *?[. Folders are always shown so they can
+        # still be opened. Rows loaded from now on are filtered as they come;
+        # the file system model is not asked to read anything.
+        text = text.strip().casefold()
+        if text == self.name_filter:
+            return
+        self.name_filter = text
+        self._matched.clear()
+        self._refilter.clear()
+        if not text:
+            self._match = None
+            self.invalidate()
+            return
+        if any(char in text for char in "*?["):
+            self._match = re.compile(fnmatch.translate(text)).match
+        else:
+            self._match = lambda name: text in name
+        self._refilter.append((QPersistentModelIndex(), [], True))
+        self._refilter_timer.start(0)
+
+    def _refilter_slice(self):
+        # The loaded subfolders of a folder are queued when it is started on;
+        # they come first in it.
+        model = self.sourceModel()
+        files = model.sourceModel()
+        deadline = time.perf_counter() + EXPLORER_FILTER_SLICE_SECONDS
+        while self._refilter and time.perf_counter() < deadline:
+            parent, matched, is_root = self._refilter[0]
+            if not is_root and not parent.isValid():
+                self._refilter.popleft()
+                continue
+            source_parent = QModelIndex(parent)
+            count = model.rowCount(source_parent)
+            row = len(matched)
+            if row == 0:
+                for child_row in range(count):
+                    child = model.index(child_row, 0, source_parent)
+                    files_child = model.mapToSource(child)
+                    if not files.isDir(files_child):
+                        break
+                    if files.rowCount(files_child):
+                        self._refilter.append((QPersistentModelIndex(child), [], False))
+            for row in range(row, min(row + EXPLORER_FILTER_SLICE_ROWS, count)):
+                matched.append(self._accepts(model.index(row, 0, source_parent)))
+            if len(matched) >= count:
+                self._matched[source_parent] = matched
+                self._refilter.popleft()
+        if self._refilter:
+            self._refilter_timer.start(0)
+        else:
+            self.invalidate()
+
+    def _accepts(self, index):
+        model = self.sourceModel()
+        is_dir, name = model.filter_name(model.mapToSource(index))
+        return is_dir or bool(self._match(name))
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self._match is None:
+            return True
+        matched = self._matched.get(source_parent)
+        if matched is not None:
+            return matched[source_row]
+        return self._accepts(self.sourceModel().index(source_row, 0, source_parent))
 
 class CustomHeaderView(QHeaderView):
     def __init__(self, orientation, notepad, parent=None):
@@ -88,7 +267,7 @@ class CustomHeaderView(QHeaderView):
             if event.position().x() <= icon_width:
                 self.notepad.go_up_directory()
             else:
-                proxy_model = self.notepad.file_explorer.model()
+                proxy_model = self.notepad.proxy_model
                 proxy_model.toggle_sort_order()
                 self.notepad.file_explorer.sortByColumn(0, proxy_model.sort_order)
         else:
@@ -101,16 +280,32 @@ class Notepad(QMainWindow):
         self.setGeometry(100, 100, 1000, 600)
 
         self.settings = Settings()
+        SyntaxHighlighter.use_worker = self.settings.get_background_highlighting()
         self.file_manager = FileManager(self)
+        self.session_store = SessionStore()
+        self.lifecycle = DocumentLifecycle(self)
+        self.file_watcher = FileWatcher(self)
+        self.legacy_session = False
         self.app = app
 
         QLoggingCategory.setFilterRules("qt.modelview.debug=true")
-        self.init_ui()
+        profiler = StartupProfiler.shared()
+        with profiler.phase("init_ui"):
+            self.init_ui()
         self.setup_autosave()
-        self.load_settings()
-        self.load_last_session()
-
-        self.check_for_updates(silent=True)
+        self.setup_session_saving()
+        with profiler.phase("theme"):
+            self.load_settings()
+        with profiler.phase("load_last_session"):
+            self.load_last_session()
+
+        self.update_checker = None
+        self.update_check_silent = True
+        self.find_in_files_panel = None
+        self.folder_indexer = None
+        self.quick_open_dialog = None
+        # The update check never runs before the window is up.
+        QTimer.singleShot(2000, self.check_for_updates_on_startup)
 
         geometry = self.settings.get_window_geometry()
         if geometry:
@@ -147,6 +342,11 @@ class Notepad(QMainWindow):
         open_folder_action.triggered.connect(self.open_folder)
         file_menu.addAction(open_folder_action)
 
+        quick_open_action = QAction('Quick Open...', self)
+        quick_open_action.setShortcut('Ctrl+P')
+        quick_open_action.triggered.connect(self.quick_open)
+        file_menu.addAction(quick_open_action)
+
         save_action = QAction('Save', self)
         save_action.setShortcut('Ctrl+S')
         save_action.triggered.connect(self.file_manager.save_file)
@@ -171,15 +371,54 @@ class Notepad(QMainWindow):
         find_action.setShortcut(QKeySequence.StandardKey.Find)
         find_action.triggered.connect(self.find_in_current_editor)
 
+        replace_action = QAction("Replace", self)
+        replace_action.setShortcut('Ctrl+H')
+        replace_action.triggered.connect(self.replace_in_current_editor)
+        edit_menu.addAction(replace_action)
+
+        find_in_files_action = QAction("Find in Files", self)
+        find_in_files_action.setShortcut('Ctrl+Alt+F')
+        find_in_files_action.triggered.connect(self.find_in_files)
+        edit_menu.addAction(find_in_files_action)
+
+        go_to_line_action = QAction("Go to Line", self)
+        go_to_line_action.setShortcut('Ctrl+G')
+        go_to_line_action.triggered.connect(self.go_to_line)
+        edit_menu.addAction(go_to_line_action)
+
         toggle_file_explorer = QAction('Toggle File Explorer', self)
         toggle_file_explorer.setShortcut('Ctrl+B')
         toggle_file_explorer.triggered.connect(self.toggle_file_explorer)
         view_menu.addAction(toggle_file_explorer)
+        self.follow_action = QAction('Follow File', self, checkable=True)
+        self.follow_action.setShortcut('Ctrl+Shift+F')
+        self.follow_action.triggered.connect(self.toggle_follow)
+        view_menu.addAction(self.follow_action)
+        memory_usage_action = QAction('Memory Usage', self)
+        memory_usage_action.triggered.connect(self.show_memory_usage)
+        view_menu.addAction(memory_usage_action)
 
         self.autosave_action = QAction('Autosave', self, checkable=True)
         self.autosave_action.setChecked(self.settings.get_autosave_enabled())
         self.autosave_action.triggered.connect(self.toggle_autosave)
         settings_menu.addAction(self.autosave_action)
+        self.background_highlighting_action = QAction('Background Highlighting', self, checkable=True)
+        self.background_highlighting_action.setChecked(self.settings.get_background_highlighting())
+        self.background_highlighting_action.triggered.connect(self.toggle_background_highlighting)
+        settings_menu.addAction(self.background_highlighting_action)
+        self.folder_index_action = QAction('Index Explorer Folder', self, checkable=True)
+        self.folder_index_action.setChecked(self.settings.get_folder_index_enabled())
+        self.folder_index_action.triggered.connect(self.toggle_folder_index)
+        settings_menu.addAction(self.folder_index_action)
+        large_file_threshold_action = QAction('Large File Threshold...', self)
+        large_file_threshold_action.triggered.connect(self.change_large_file_threshold)
+        settings_menu.addAction(large_file_threshold_action)
+        memory_budget_action = QAction('Memory Budget...', self)
+        memory_budget_action.triggered.connect(self.change_memory_budget)
+        settings_menu.addAction(memory_budget_action)
+        follow_lines_action = QAction('Follow Scrollback...', self)
+        follow_lines_action.triggered.connect(self.change_follow_max_lines)
+        settings_menu.addAction(follow_lines_action)
         check_updates_action = QAction('Check for Updates', self)
         check_updates_action.triggered.connect(self.check_for_updates)
         settings_menu.addAction(check_updates_action)
@@ -209,18 +448,20 @@ class Notepad(QMainWindow):
 
     
         try:
-            self.file_explorer = QTreeView()
-            self.file_model = QFileSystemModel()
-            self.setup_file_explorer()
-    
+            self.explorer_filter = QLineEdit()
+            self.explorer_filter.setPlaceholderText("Filter files (name or *.glob)")
+            self.explorer_filter.setClearButtonEnabled(True)
+            self.explorer_filter_timer = QTimer(self)
+            self.explorer_filter_timer.setSingleShot(True)
+            self.explorer_filter_timer.setInterval(EXPLORER_FILTER_DELAY_MS)
+            self.explorer_filter_timer.timeout.connect(self.apply_explorer_filter)
+            self.explorer_filter.textChanged.connect(self.explorer_filter_timer.start)
+            file_explorer_layout.addWidget(self.explorer_filter)
 
-            home_path = os.path.expanduser('~')
-            downloads_path = os.path.join(home_path, "Downloads")
-            source_index = self.file_model.index(downloads_path)
-            
-            proxy_index = self.proxy_model.mapFromSource(source_index)
-            
-            self.file_explorer.setRootIndex(proxy_index)
+            self.file_explorer = QTreeView()
+            self.file_model = None
+            # The file system model is only built once the window is up.
+            QTimer.singleShot(0, self.ensure_file_explorer)
             
             self.file_explorer.clicked.connect(self.on_file_explorer_single_clicked)
             self.file_explorer.doubleClicked.connect(self.on_file_explorer_double_clicked)
@@ -229,7 +470,7 @@ class Notepad(QMainWindow):
             self.main_splitter.addWidget(file_explorer_widget)
     
         except Exception as e:
-            QMessageBox.critical(self.notepad, "Error", f"Error in create_main_layout: {str(e)}")
+            QMessageBox.critical(self, "Error", f"Error in create_main_layout: {str(e)}")
     
         self.tab_widget = QTabWidget()
         self.tab_widget.setTabsClosable(True)
@@ -249,6 +490,14 @@ class Notepad(QMainWindow):
 
     def on_tab_changed(self, index):
         current_editor = self.tab_widget.widget(index)
+        if isinstance(current_editor, PlaceholderTab):
+            self.file_manager.materialize(current_editor)
+            return
+        self.file_manager.prewarm(index)
+        self.follow_action.setChecked(current_editor in self.file_watcher.following)
+        if current_editor is not None:
+            self.lifecycle.touch(current_editor)
+            self.lifecycle.enforce_budget()
         if isinstance(current_editor, Editor):
             if current_editor in self.file_manager.file_paths:
                 self.setWindowTitle(f"Pady - {self.file_manager.file_paths[current_editor]}")
@@ -256,7 +505,7 @@ class Notepad(QMainWindow):
                 self.setWindowTitle("Pady - Untitled")
 
     def close_tab(self, index):
-        self.tab_widget.removeTab(index)
+        self.lifecycle.close_tab(index)
 
     def undo(self):
         current_editor = self.tab_widget.currentWidget()
@@ -276,33 +525,78 @@ class Notepad(QMainWindow):
     def toggle_file_explorer(self):
         if self.file_explorer.isVisible():
             self.file_explorer.hide()
+            self.explorer_filter.hide()
         else:
             self.file_explorer.show()
+            self.explorer_filter.show()
+
+    def apply_explorer_filter(self):
+        if self.file_model is not None:
+            self.filter_model.set_name_filter(self.explorer_filter.text())
 
     def load_last_session(self):
-        open_files = self.settings.get_open_files()
-        if open_files:
-            self.file_manager.open_files_from_session(open_files)
-        else:
+        tabs, current = self.session_store.load()
+        if tabs:
+            self.file_manager.restore_session(self.session_store, tabs, current)
+        elif not self.session_store.exists():
+            # Sessions of older versions were kept in QSettings; they are moved
+            # to the session store by the first save.
+            open_files = self.settings.get_open_files()
+            if open_files:
+                self.file_manager.open_files_from_session(open_files)
+                self.legacy_session = True
+        if not self.tab_widget.count():
             self.file_manager.new_file()
 
+    def setup_session_saving(self):
+        self.session_timer = QTimer(self)
+        self.session_timer.timeout.connect(self.save_session)
+        self.session_timer.start(10000)
+
+    def save_session(self):
+        try:
+            self.session_store.save(self.file_manager.session_entries(), self.tab_widget.currentIndex())
+        except OSError as e:
+            self.statusBar().showMessage(f"Saving the session failed: {str(e)}", 10000)
+            return
+        if self.legacy_session:
+            self.settings.clear_open_files()
+            self.legacy_session = False
+
     def closeEvent(self, event):
-        open_files = self.file_manager.get_all_open_files()
-        self.settings.save_open_files(open_files)
+        self.file_manager.finish_saves()
+        self.save_session()
+        if self.find_in_files_panel is not None or self.folder_indexer is not None:
+            from modules.workerPool import WorkerPool
+            if self.find_in_files_panel is not None:
+                self.find_in_files_panel.cancel()
+            if self.folder_indexer is not None:
+                self.folder_indexer.stop()
+            WorkerPool.shared().shutdown()
         self.settings.save_window_geometry(self.saveGeometry())
         self.settings.save_window_state(self.saveState())
         event.accept()
 
+    def open_paths(self, paths):
+        # Files handed over by a later launch.
+        self.file_manager.open_files(paths)
+        if self.isMinimized():
+            self.showNormal()
+        self.raise_()
+        self.activateWindow()
+
     def open_folder(self):
         folder_path = QFileDialog.getExistingDirectory(self, "Select Folder")
         if folder_path:
+            self.ensure_file_explorer()
             source_index = self.file_model.index(folder_path)
-            proxy_index = self.proxy_model.mapFromSource(source_index)
+            proxy_index = self.filter_model.map_from_files(source_index)
             self.file_explorer.setRootIndex(proxy_index)
             self.current_folder = folder_path
+            self.update_folder_index()
 
     def on_file_explorer_double_clicked(self, index):
-        source_index = self.proxy_model.mapToSource(index)
+        source_index = self.filter_model.map_to_files(index)
         if self.file_model.isDir(source_index):
             self.file_explorer.setRootIndex(index)
         else:
@@ -310,7 +604,7 @@ class Notepad(QMainWindow):
             self.file_manager.open_file(file_path)
 
     def on_file_explorer_single_clicked(self, index):
-        source_index = self.proxy_model.mapToSource(index)
+        source_index = self.filter_model.map_to_files(index)
         if self.file_model.isDir(source_index):
             if self.file_explorer.isExpanded(index):
                 self.file_explorer.collapse(index)
@@ -321,6 +615,11 @@ class Notepad(QMainWindow):
             self.file_manager.open_file(file_path)
 
 
+    def ensure_file_explorer(self):
+        if self.file_model is None:
+            with StartupProfiler.shared().phase("setup_file_explorer"):
+                self.setup_file_explorer()
+
     def setup_file_explorer(self):
         self.file_model = QFileSystemModel()
         home_path = os.path.expanduser("~")
@@ -329,8 +628,11 @@ class Notepad(QMainWindow):
         
         self.proxy_model = FileNameProxyModel(self)
         self.proxy_model.setSourceModel(self.file_model)
+        self.filter_model = FileNameFilterModel(self)
+        self.filter_model.setSourceModel(self.proxy_model)
+        self.filter_model.set_name_filter(self.explorer_filter.text())
         
-        self.file_explorer.setModel(self.proxy_model)
+        self.file_explorer.setModel(self.filter_model)
         self.file_explorer.setHeader(CustomHeaderView(Qt.Orientation.Horizontal, self))
         self.file_explorer.setColumnWidth(0, 200)
         self.file_explorer.setHeaderHidden(False)
@@ -349,16 +651,26 @@ class Notepad(QMainWindow):
     
     def _set_file_explorer_root(self, path):
         source_root_index = self.file_model.index(path)
-        proxy_root_index = self.proxy_model.mapFromSource(source_root_index)
+        proxy_root_index = self.filter_model.map_from_files(source_root_index)
         self.file_explorer.setRootIndex(proxy_root_index)
         self.current_folder = path
+        self.update_folder_index()
     
     def go_up_directory(self):
         current_index = self.file_explorer.rootIndex()
         parent_index = current_index.parent()
         if parent_index.isValid():
             self.file_explorer.setRootIndex(parent_index)
-            self.current_folder = self.file_model.filePath(self.proxy_model.mapToSource(parent_index))
+            self.current_folder = self.file_model.filePath(self.filter_model.map_to_files(parent_index))
+            self.update_folder_index()
+
+    def update_folder_index(self):
+        if not self.settings.get_folder_index_enabled():
+            return
+        if self.folder_indexer is None:
+            from modules.trigramIndex import FolderIndexer
+            self.folder_indexer = FolderIndexer(self)
+        self.folder_indexer.set_root(self.current_folder)
 
     def load_settings(self):
         self.set_theme(self.settings.get_theme())
@@ -382,6 +694,18 @@ class Notepad(QMainWindow):
         else:
             self.autosave_timer.stop()
 
+    def toggle_background_highlighting(self, enabled):
+        self.settings.set_background_highlighting(enabled)
+        SyntaxHighlighter.use_worker = enabled
+
+    def toggle_folder_index(self, enabled):
+        self.settings.set_folder_index_enabled(enabled)
+        if enabled:
+            if self.file_model is not None:
+                self.update_folder_index()
+        elif self.folder_indexer is not None:
+            self.folder_indexer.stop()
+
     def change_theme(self, action):
         theme = action.data()
         self.set_theme(theme)
@@ -397,52 +721,112 @@ class Notepad(QMainWindow):
         
     def find_in_current_editor(self):
         current_editor = self.tab_widget.currentWidget()
-        if isinstance(current_editor, Editor):
+        if isinstance(current_editor, (Editor, LargeFileView)):
             current_editor.show_find_widget()
 
-    def check_for_updates(self, silent=False):
-        current_version = version.Version("pady-v1.6.6".strip("pady-"))
-        github_api_url = "https://api.github.com/repos/feketefh/pady/releases/latest"
+    def replace_in_current_editor(self):
+        current_editor = self.tab_widget.currentWidget()
+        if isinstance(current_editor, Editor):
+            current_editor.show_find_widget(replace=True)
+
+    def quick_open(self):
+        self.ensure_file_explorer()
+        if self.quick_open_dialog is None:
+            from modules.quickOpen import QuickOpenDialog
+            self.quick_open_dialog = QuickOpenDialog(self)
+        self.quick_open_dialog.open_for(self.current_folder)
+
+    def find_in_files(self):
+        self.ensure_file_explorer()
+        if self.find_in_files_panel is None:
+            from modules.findInFiles import FindInFilesPanel
+            self.find_in_files_panel = FindInFilesPanel(self)
+            self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.find_in_files_panel)
+        self.find_in_files_panel.show()
+        self.find_in_files_panel.query_input.setFocus()
+        self.find_in_files_panel.query_input.selectAll()
+
+    def go_to_line(self):
+        current_editor = self.tab_widget.currentWidget()
+        if not isinstance(current_editor, (Editor, LargeFileView)):
+            return
+        line, ok = QInputDialog.getInt(self, "Go to Line", "Line number:", 1, 1, 2**31 - 1)
+        if ok:
+            current_editor.go_to_line(line - 1)
+
+    def change_large_file_threshold(self):
+        megabytes, ok = QInputDialog.getInt(self, "Large File Threshold",
+                                            "Open files of at least this many MB in the read-only large file viewer:",
+                                            self.settings.get_large_file_threshold_mb(), 1, 1024 * 1024)
+        if ok:
+            self.settings.set_large_file_threshold_mb(megabytes)
+
+    def change_memory_budget(self):
+        megabytes, ok = QInputDialog.getInt(self, "Memory Budget",
+                                            "Hibernate the least recently used tabs when open documents use more than this many MB:",
+                                            self.settings.get_memory_budget_mb(), 16, 1024 * 1024)
+        if ok:
+            self.settings.set_memory_budget_mb(megabytes)
+            self.lifecycle.enforce_budget()
+
+    def toggle_follow(self, enabled):
+        current_editor = self.tab_widget.currentWidget()
+        if isinstance(current_editor, Editor):
+            self.file_watcher.set_follow(current_editor, enabled)
+        self.follow_action.setChecked(current_editor in self.file_watcher.following)
+
+    def change_follow_max_lines(self):
+        lines, ok = QInputDialog.getInt(self, "Follow Scrollback",
+                                        "Lines kept in tabs that follow a growing file:",
+                                        self.settings.get_follow_max_lines(), 100, 100000000)
+        if ok:
+            self.settings.set_follow_max_lines(lines)
+            for editor in self.file_watcher.following:
+                editor.document().setMaximumBlockCount(lines)
+
+    def show_memory_usage(self):
+        report = self.lifecycle.memory_report()
+        total = sum(size for _, size, _ in report)
+        lines = [f"{title}: {size / (1024 * 1024):.1f} MB ({state})" for title, size, state in report]
+        lines.append("")
+        lines.append(f"Total: {total / (1024 * 1024):.1f} MB of {self.settings.get_memory_budget_mb()} MB")
+        QMessageBox.information(self, "Memory Usage", "\n".join(lines))
 
-        try:
-            response = requests.get(github_api_url)
-            response.raise_for_status()
-            latest_release: str = response.json()
-            latest_version = version.Version(latest_release['tag_name'].strip("pady-"))
-
-            if latest_version > current_version:
-                if not silent:
-                    reply = QMessageBox.question(
-                        self,
-                        "Update Available",
-                        f"A new version ({latest_version}) is available. Do you want to download new version from Github?",
-                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                        QMessageBox.StandardButton.Yes
-                    )
-                    if reply == QMessageBox.StandardButton.Yes:
-                        try:
-                            webbrowser.open(latest_release['html_url'], new=1)
-                        except Exception as e:
-                            QMessageBox.critical(self, "Update Error", f"Failed to open release: {str(e)}")
-                else:
-                    reply = QMessageBox.question(
-                        self,
-                        "Update Available",
-                        f"A new version ({latest_version}) is available. Do you want to download new version from Github?",
-                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
-                        QMessageBox.StandardButton.Yes
-                    )
-                    if reply == QMessageBox.StandardButton.Yes:
-                        try:
-                            webbrowser.open(latest_release['html_url'], new=1)
-                        except Exception as e:
-                            QMessageBox.critical(self, "Update Error", f"Failed to open release: {str(e)}")
-            else:
-                if not silent:
-                    QMessageBox.information(self, "No Updates", "You are using the latest version.")
-        except requests.RequestException:
-            if not silent:
-                QMessageBox.warning(self, "Update Check Failed", "Failed to check for updates. Please try again later.")
-        except Exception as e:
-            if not silent:
-                QMessageBox.warning(self, "Update Check Failed", f"An unexpected error occurred while checking for updates: {str(e)}")
+    def check_for_updates(self, silent=False):
+        # Menu checks always ask the network; the silent startup check may be
+        # answered from the cache.
+        if self.update_checker is None:
+            from modules.updateChecker import UpdateChecker
+            self.update_checker = UpdateChecker(self.settings.get_update_endpoint() or None, self)
+            self.update_checker.update_available.connect(self.on_update_available)
+            self.update_checker.up_to_date.connect(self.on_up_to_date)
+            self.update_checker.failed.connect(self.on_update_check_failed)
+        self.update_check_silent = silent
+        self.update_checker.check(force=not silent)
+
+    def check_for_updates_on_startup(self):
+        with StartupProfiler.shared().phase("update check"):
+            self.check_for_updates(silent=True)
+
+    def on_update_available(self, latest_version, url):
+        reply = QMessageBox.question(
+            self,
+            "Update Available",
+            f"A new version ({latest_version}) is available. Do you want to download new version from Github?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            QMessageBox.StandardButton.Yes
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            try:
+                import webbrowser
+                webbrowser.open(url, new=1)
+            except Exception as e:
+                QMessageBox.critical(self, "Update Error", f"Failed to open release: {str(e)}")
+
+    def on_up_to_date(self):
+        if not self.update_check_silent:
+            QMessageBox.information(self, "No Updates", "You are using the latest version.")
+
+    def on_update_check_failed(self, error):
+        if not self.update_check_silent:
+            QMessageBox.warning(self, "Update Check Failed", f"Failed to check for updates. Please try again later.\n\n{error}")
@@ -0,0 +1,397 @@
+import hashlib
+import os
+import pickle
+import time
+from heapq import heappush, heapreplace
+from PyQt6.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, QTimer, QStandardPaths, pyqtSignal
+from modules.fileWriter import write_atomic
+from modules.textSearch import SKIP_DIRS
+
+LIST_VERSION = 1
+MAX_RESULTS = 100
+# Paths are matched for this long per event loop turn, checking the time
+# every SLICE_PATHS paths.
+SLICE_SECONDS = 0.008
+SLICE_PATHS = 1000
+# How often a running match shows what it has found so far.
+REPORT_SECONDS = 0.1
+SEPARATORS = "/\\_-. "
+
+
+def list_path(root):
+    data = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericDataLocation)
+    name = hashlib.sha1(root.encode("utf-8", "surrogatepass")).hexdigest()
+    return os.path.join(data, "Pady", "quickopen", f"{name}.lst")
+
+
+def scan_tree(root, previous):
+    # The files under root as {relative directory: (mtime, files, subdirs)}.
+    # Adding, removing or renaming an entry changes its directory's time, so
+    # directories whose time is the same as in previous are not read again.
+    tree = {}
+    stack = [""]
+    while stack:
+        relative = stack.pop()
+        path = os.path.join(root, relative) if relative else root
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            continue
+        entry = previous.get(relative)
+        if entry is None or entry[0] != mtime:
+            files = []
+            subdirs = []
+            try:
+                with os.scandir(path) as entries:
+                    for item in entries:
+                        try:
+                            if not item.is_dir(follow_symlinks=False):
+                                files.append(item.name)
+                            elif item.name not in SKIP_DIRS:
+                                subdirs.append(item.name)
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+            entry = (mtime, files, subdirs)
+        tree[relative] = entry
+        for name in entry[2]:
+            stack.append(os.path.join(relative, name) if relative else name)
+    return tree
+
+
+def fold(path):
+    # path lowercased one character at a time, so positions in it are
+    # positions in path ("İ".lower() is two characters).
+    lower = path.lower()
+    if len(lower) == len(path):
+        return lower
+    return "".join(char.lower()[0] for char in path)
+
+
+def flatten(tree):
+    # The relative paths in tree, with the lowercased paths and the offsets
+    # of the file names in them. Each directory is sorted on its own: one
+    # sort of every path would hold the interpreter lock for long enough to
+    # stall the window.
+    paths = []
+    for directory in sorted(tree):
+        files = sorted(tree[directory][1])
+        if directory:
+            prefix = directory + os.sep
+            paths += [prefix + name for name in files]
+        else:
+            paths += files
+    return paths, [fold(path) for path in paths], [path.rfind(os.sep) + 1 for path in paths]
+
+
+def pack(tree):
+    # The tree with each directory's names joined into one string, which
+    # pickles and unpickles far faster than many small strings.
+    return {directory: (mtime, "\0".join(files), "\0".join(subdirs))
+            for directory, (mtime, files, subdirs) in tree.items()}
+
+
+def unpack(packed):
+    tree = {}
+    for directory, (mtime, files, subdirs) in packed.items():
+        tree[directory] = (mtime, files.split("\0") if files else [], subdirs.split("\0") if subdirs else [])
+    return tree
+
+
+def fuzzy_score(query, path, lower, name_start):
+    # How well path matches query, lowercased, as a subsequence; None if it
+    # does not. Matches in the file name, at the start of words and in runs
+    # score higher, and shorter paths win ties.
+    positions = []
+    position = name_start
+    for char in query:
+        position = lower.find(char, position)
+        if position < 0:
+            break
+        positions.append(position)
+        position += 1
+    in_name = len(positions) == len(query)
+    if not in_name:
+        positions = []
+        position = 0
+        for char in query:
+            position = lower.find(char, position)
+            if position < 0:
+                return None
+            positions.append(position)
+            position += 1
+    score = 20 if in_name else 0
+    previous = -2
+    for position in positions:
+        if position == previous + 1:
+            score += 5
+        elif position == 0 or path[position - 1] in SEPARATORS or (
+                path[position].isupper() and path[position - 1].islower()):
+            score += 3
+        else:
+            score -= 1
+        previous = position
+    if positions[0] == name_start:
+        score += 10
+    return score * 1000 - min(len(path), 999)
+
+
+class ListSignals(QObject):
+    listed = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    done = pyqtSignal()
+
+
+class ListTask(QRunnable):
+    # Lists the files under root, starting from tree (or from the list kept
+    # on disk, which is shown at once), and keeps the list on disk again if
+    # it changed.
+    def __init__(self, root, tree=None):
+        super().__init__()
+        self.root = root
+        self.tree = tree
+        self.signals = ListSignals()
+
+    def run(self):
+        path = list_path(self.root)
+        try:
+            tree = self.tree
+            if tree is None:
+                tree = self._load(path)
+                if tree:
+                    self.signals.listed.emit((tree, *flatten(tree)))
+            scanned = scan_tree(self.root, tree)
+            if scanned != tree:
+                self.signals.listed.emit((scanned, *flatten(scanned)))
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                write_atomic(path, [pickle.dumps({"version": LIST_VERSION, "root": self.root, "tree": pack(scanned)},
+                                                 pickle.HIGHEST_PROTOCOL)])
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+        finally:
+            self.signals.done.emit()
+
+    def _load(self, path):
+        try:
+            with open(path, "rb") as file:
+                state = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            return {}
+        if state.get("version") != LIST_VERSION or state.get("root") != self.root:
+            return {}
+        return unpack(state["tree"])
+
+
+class FileList(QObject):
+    # The files under a folder, listed in the background. Each refresh only
+    # reads the directories that changed since the last one.
+    changed = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, root, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.tree = None
+        self.paths = []
+        self.lower = []
+        self.name_starts = []
+        self.version = 0
+        self.task = None
+
+    def refresh(self):
+        if self.task is not None:
+            return
+        self.task = ListTask(self.root, self.tree)
+        self.task.signals.listed.connect(self._listed)
+        self.task.signals.failed.connect(self.failed)
+        self.task.signals.done.connect(self._done)
+        QThreadPool.globalInstance().start(self.task)
+
+    def listing(self):
+        return self.task is not None
+
+    def _listed(self, listing):
+        self.tree, self.paths, self.lower, self.name_starts = listing
+        self.version += 1
+        self.changed.emit()
+
+    def _done(self):
+        self.task = None
+        self.changed.emit()
+
+
+class FuzzyMatcher(QObject):
+    # Scores every file against the query in short slices on the event loop,
+    # keeping the best MAX_RESULTS. A query that extends the last one only
+    # looks at the files the last one matched.
+    changed = pyqtSignal()
+
+    def __init__(self, files, parent=None):
+        super().__init__(parent)
+        self.files = files
+        self.query = ""
+        self.complete = True
+        self._version = -1
+        self._candidates = []
+        self._position = 0
+        self._matched = []
+        self._top = []
+        self._reported = 0.0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._match_slice)
+        files.changed.connect(self._files_changed)
+
+    def set_query(self, query):
+        query = "".join(query.lower().split())
+        narrowed = (self.complete and self.query and query.startswith(self.query)
+                    and self._version == self.files.version)
+        self._candidates = self._matched if narrowed else range(len(self.files.paths))
+        self._version = self.files.version
+        self.query = query
+        self._position = 0
+        self._matched = []
+        self._top = []
+        self.complete = not query
+        if query:
+            self._timer.start(0)
+        else:
+            self._timer.stop()
+        self.changed.emit()
+
+    def results(self):
+        # The best matches as (path, name_start), best first.
+        paths = self.files.paths
+        starts = self.files.name_starts
+        return [(paths[-key], starts[-key]) for _, key in sorted(self._top, reverse=True)]
+
+    def match_count(self):
+        return len(self._matched)
+
+    def _files_changed(self):
+        if self._version != self.files.version:
+            self.set_query(self.query)
+        else:
+            self.changed.emit()
+
+    def _match_slice(self):
+        deadline = time.perf_counter() + SLICE_SECONDS
+        query = self.query
+        paths = self.files.paths
+        lower = self.files.lower
+        starts = self.files.name_starts
+        candidates = self._candidates
+        matched = self._matched
+        top = self._top
+        while self._position < len(candidates) and time.perf_counter() < deadline:
+            end = min(self._position + SLICE_PATHS, len(candidates))
+            for i in candidates[self._position:end]:
+                score = fuzzy_score(query, paths[i], lower[i], starts[i])
+                if score is None:
+                    continue
+                matched.append(i)
+                # Ties go to the path listed first.
+                if len(top) < MAX_RESULTS:
+                    heappush(top, (score, -i))
+                elif (score, -i) > top[0]:
+                    heapreplace(top, (score, -i))
+            self._position = end
+        if self._position < len(candidates):
+            self._timer.start(0)
+        else:
+            self.complete = True
+        if self.complete or time.perf_counter() - self._reported >= REPORT_SECONDS:
+            self._reported = time.perf_counter()
+            self.changed.emit()
+
+
+class QuickOpenDialog(QDialog):
+    # Ctrl+P: opens a file under the explorer's folder by typing part of
+    # its path.
+    def __init__(self, notepad):
+        super().__init__(notepad, Qt.WindowType.Popup)
+        self.notepad = notepad
+        self.files = None
+        self.matcher = None
+        self.setMinimumWidth(500)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(5, 5, 5, 5)
+        self.query_input = QLineEdit()
+        self.query_input.setPlaceholderText("Search files by name...")
+        self.query_input.textChanged.connect(self._query_changed)
+        self.query_input.returnPressed.connect(self._open_current)
+        layout.addWidget(self.query_input)
+        self.results = QListWidget()
+        self.results.itemActivated.connect(self._open_item)
+        layout.addWidget(self.results)
+        self.status_label = QLabel()
+        layout.addWidget(self.status_label)
+
+    def open_for(self, root):
+        if self.files is None or self.files.root != root:
+            if self.matcher is not None:
+                self.matcher.deleteLater()
+                self.files.deleteLater()
+            self.files = FileList(root, self)
+            self.files.failed.connect(self._list_failed)
+            self.matcher = FuzzyMatcher(self.files, self)
+            self.matcher.changed.connect(self._show_results)
+        self.files.refresh()
+        parent = self.notepad.geometry()
+        width = max(self.minimumWidth(), parent.width() // 2)
+        self.setGeometry(parent.x() + (parent.width() - width) // 2, parent.y() + 60, width, 400)
+        self.query_input.selectAll()
+        self.show()
+        self.query_input.setFocus()
+        self._show_results()
+
+    def _list_failed(self, error):
+        self.status_label.setText(f"Could not list files: {error}")
+
+    def _query_changed(self, text):
+        self.matcher.set_query(text)
+
+    def _show_results(self):
+        if self.matcher is None:
+            return
+        self.results.setUpdatesEnabled(False)
+        try:
+            self.results.clear()
+            for path, name_start in self.matcher.results():
+                item = QListWidgetItem(f"{path[name_start:]}    {path[:name_start]}")
+                item.setData(Qt.ItemDataRole.UserRole, path)
+                self.results.addItem(item)
+            if self.results.count():
+                self.results.setCurrentRow(0)
+        finally:
+            self.results.setUpdatesEnabled(True)
+        count = len(self.files.paths)
+        if self.files.listing():
+            self.status_label.setText(f"Listing files... {count} so far")
+        elif not self.matcher.complete:
+            self.status_label.setText(f"Matching {count} files...")
+        else:
+            self.status_label.setText(f"{self.matcher.match_count() if self.matcher.query else count} files")
+
+    def keyPressEvent(self, event):
+        # The query keeps the focus; the arrow keys move through the results.
+        steps = {Qt.Key.Key_Down: 1, Qt.Key.Key_Up: -1, Qt.Key.Key_PageDown: 10, Qt.Key.Key_PageUp: -10}
+        step = steps.get(event.key())
+        if step is not None and self.results.count():
+            row = max(0, min(self.results.currentRow() + step, self.results.count() - 1))
+            self.results.setCurrentRow(row)
+            return
+        super().keyPressEvent(event)
+
+    def _open_current(self):
+        item = self.results.currentItem()
+        if item is not None:
+            self._open_item(item)
+
+    def _open_item(self, item):
+        path = os.path.join(self.files.root, item.data(Qt.ItemDataRole.UserRole))
+        self.hide()
+        self.notepad.file_manager.open_file(path)
@@ -0,0 +1,246 @@
+import time
+from bisect import bisect_left
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QTextCursor
+from modules.textSearch import compile_pattern
+
+# The document is scanned for this long per event loop turn, in pieces of
+# whole lines of about this many characters.
+SLICE_SECONDS = 0.008
+SLICE_CHARS = 64 * 1024
+# How often a running scan reports its progress.
+REPORT_SECONDS = 0.1
+
+
+def substitute(pattern, text, replacement, literal=False):
+    # Replaces the matches in text, whole lines separated by "\n", line by
+    # line as the index finds them. Returns the new text and the number of
+    # replacements. A regex replacement may refer to groups; a bad reference
+    # raises re.error or IndexError. Empty matches are left alone, as the
+    # index never shows them.
+    if literal:
+        return pattern.subn(lambda match: replacement, text)
+    count = 0
+
+    def expand(match):
+        nonlocal count
+        if match.start() == match.end():
+            return ""
+        count += 1
+        return match.expand(replacement)
+
+    lines = [pattern.sub(expand, line) for line in text.split("\n")]
+    return "\n".join(lines), count
+
+
+def utf16_length(text):
+    return len(text.encode("utf-16-le", "surrogatepass")) // 2
+
+
+class SearchIndex(QObject):
+    # The start and end positions of every match of a pattern in a document,
+    # sorted. The document is scanned in short slices on the event loop, and
+    # after an edit only the changed lines are scanned again. Matches do not
+    # span lines. Positions are QTextDocument positions (UTF-16 code units).
+    #
+    # The matches after an edit move by its length. Rather than rewriting
+    # them all, that move is kept as a delta that applies from index _split
+    # on; the next edit only rewrites the matches between the two edits.
+    changed = pyqtSignal()
+
+    def __init__(self, document, parent=None):
+        super().__init__(parent)
+        self.document = document
+        self.pattern = None
+        self.literal = False
+        self.complete = True
+        self._starts = []
+        self._ends = []
+        self._split = 0
+        self._delta = 0
+        self._scanned = 0
+        self._reported = 0.0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._scan_slice)
+
+    def set_pattern(self, pattern, literal=False):
+        # A literal pattern cannot match across lines, which lets whole
+        # pieces of the document be searched at once.
+        if self.pattern is None and pattern is not None:
+            self.document.contentsChange.connect(self._update)
+        elif self.pattern is not None and pattern is None:
+            self.document.contentsChange.disconnect(self._update)
+        self.pattern = pattern
+        self.literal = literal
+        self._starts = []
+        self._ends = []
+        self._split = 0
+        self._delta = 0
+        self._scanned = 0
+        self.complete = pattern is None
+        if pattern is None:
+            self._timer.stop()
+        else:
+            self._timer.start(0)
+        self.changed.emit()
+
+    def finish(self):
+        # Scans what is left at once.
+        self._move_split(len(self._starts))
+        length = self.document.characterCount()
+        if self.pattern is not None and self._scanned < length:
+            starts, ends = self._scan(self._scanned, length)
+            self._starts += starts
+            self._ends += ends
+            self._scanned = length
+        self._split = len(self._starts)
+        if not self.complete:
+            self.complete = True
+            self._timer.stop()
+            self.changed.emit()
+
+    def count(self):
+        return len(self._starts)
+
+    def span(self, i):
+        shift = self._delta if i >= self._split else 0
+        return self._starts[i] + shift, self._ends[i] + shift
+
+    def _bisect(self, values, position):
+        i = bisect_left(values, position, 0, self._split)
+        if i < self._split:
+            return i
+        return bisect_left(values, position - self._delta, self._split)
+
+    def find(self, start, end):
+        # The number of the match at exactly start..end, or -1.
+        i = self._bisect(self._starts, start)
+        if i < len(self._starts) and self.span(i) == (start, end):
+            return i
+        return -1
+
+    def next_match(self, position):
+        # The first match starting at or after position, wrapping around.
+        # None if there is none or the scan has not got that far yet.
+        i = self._bisect(self._starts, position)
+        if i < len(self._starts):
+            return i
+        if not self.complete or not self._starts:
+            return None
+        return 0
+
+    def previous_match(self, position):
+        # The last match starting before position, wrapping around.
+        if position > self._scanned and not self.complete:
+            return None
+        i = self._bisect(self._starts, position) - 1
+        if i >= 0:
+            return i
+        if not self.complete or not self._starts:
+            return None
+        return len(self._starts) - 1
+
+    def visible(self, start, end):
+        # Numbers of the matches overlapping start..end.
+        return range(self._bisect(self._ends, start + 1), self._bisect(self._starts, end))
+
+    def _move_split(self, split):
+        # Moves the point the delta applies from without moving any match.
+        if not self._delta:
+            pass
+        elif split < self._split:
+            self._starts[split:self._split] = [offset - self._delta for offset in self._starts[split:self._split]]
+            self._ends[split:self._split] = [offset - self._delta for offset in self._ends[split:self._split]]
+        elif split > self._split:
+            self._starts[self._split:split] = [offset + self._delta for offset in self._starts[self._split:split]]
+            self._ends[self._split:split] = [offset + self._delta for offset in self._ends[self._split:split]]
+        self._split = split
+
+    def _scan(self, start, end):
+        # Matches in the lines from start, the position of a block, to end,
+        # the end of a block.
+        cursor = QTextCursor(self.document)
+        cursor.setPosition(start)
+        cursor.setPosition(min(end, self.document.characterCount() - 1), QTextCursor.MoveMode.KeepAnchor)
+        text = cursor.selectedText()
+        # Positions count UTF-16 code units; only text outside the BMP needs
+        # its offsets converted.
+        wide = len(text) != cursor.selectionEnd() - start
+        if self.literal and not wide:
+            spans = [match.span() for match in self.pattern.finditer(text)]
+            return [start + first for first, _ in spans], [start + last for _, last in spans]
+        starts = []
+        ends = []
+        search = self.pattern.finditer
+        position = start
+        for line in text.split("\u2029"):
+            size = utf16_length(line) if wide else len(line)
+            for match in search(line):
+                first, last = match.span()
+                if first == last:
+                    continue
+                if size != len(line):
+                    first = utf16_length(line[:first])
+                    last = first + utf16_length(match.group())
+                starts.append(position + first)
+                ends.append(position + last)
+            position += size + 1
+        return starts, ends
+
+    def _scan_slice(self):
+        if self.pattern is None or self.complete:
+            return
+        deadline = time.perf_counter() + SLICE_SECONDS
+        length = self.document.characterCount()
+        # Matches appended past the split would be read with the delta.
+        self._move_split(len(self._starts))
+        while self._scanned < length and time.perf_counter() < deadline:
+            block = self.document.findBlock(min(self._scanned + SLICE_CHARS, length - 1))
+            end = block.position() + block.length()
+            starts, ends = self._scan(self._scanned, end)
+            self._starts += starts
+            self._ends += ends
+            self._scanned = end
+        self._split = len(self._starts)
+        if self._scanned < length:
+            self._timer.start(0)
+        else:
+            self.complete = True
+        if self.complete or time.perf_counter() - self._reported >= REPORT_SECONDS:
+            self._reported = time.perf_counter()
+            self.changed.emit()
+
+    def _update(self, position, removed, added):
+        length = self.document.characterCount()
+        delta = added - removed
+        first = self.document.findBlock(position)
+        last = self.document.findBlock(min(position + added, length - 1))
+        start = first.position()
+        new_end = last.position() + last.length()
+        old_end = new_end - delta
+        if start >= self._scanned and not self.complete:
+            return
+        if old_end > self._scanned or new_end - start > SLICE_CHARS:
+            # The change reaches the part not scanned yet (or is one Qt counts
+            # the final block separator in), or is too large to scan at once:
+            # scan again from its first line in the background.
+            i = self._bisect(self._starts, start)
+            self._move_split(i)
+            del self._starts[i:]
+            del self._ends[i:]
+            self._scanned = start
+            self.complete = False
+            self._timer.start(0)
+            self.changed.emit()
+            return
+        i = self._bisect(self._starts, start)
+        j = self._bisect(self._starts, old_end)
+        self._move_split(j)
+        starts, ends = self._scan(start, new_end)
+        self._starts[i:j] = starts
+        self._ends[i:j] = ends
+        self._split = i + len(starts)
+        self._delta += delta
+        self._scanned += delta
+        self.changed.emit()
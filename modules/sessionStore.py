@@ -0,0 +1,221 @@
+import json
+import os
+import zlib
+from PyQt6.QtCore import QStandardPaths
+from modules.fileWriter import write_atomic
+from modules.editJournal import EditJournal, file_base, read_journal, replay
+
+MANIFEST = "manifest.json"
+VERSION = 1
+# A journal is compacted into a content snapshot once it grows past this and
+# past twice the size of its document.
+COMPACT_MIN_BYTES = 1024 * 1024
+
+
+def new_tab_id():
+    return os.urandom(16).hex()
+
+
+class SessionTab:
+    __slots__ = ("tab_id", "path", "has_content", "modified", "cursor", "scroll")
+
+    def __init__(self, tab_id, path, has_content=False, modified=False, cursor=0, scroll=0):
+        self.tab_id = tab_id
+        self.path = path
+        self.has_content = has_content
+        self.modified = modified
+        self.cursor = cursor
+        self.scroll = scroll
+
+
+class SessionStore:
+    # The session is a small manifest listing the open tabs plus one compressed
+    # file per tab whose text is not on disk (untitled or unsaved tabs). Saving
+    # rewrites only the content of tabs edited since the last save, and the
+    # manifest only when it changed; loading reads just the manifest.
+    # Open editors also keep an edit journal next to their base text (the file,
+    # the stored content or an empty document), so unsaved edits survive a
+    # crash without the content being rewritten on every save.
+    def __init__(self, directory=None):
+        if directory is None:
+            data = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericDataLocation)
+            directory = os.path.join(data, "Pady", "session")
+        self.directory = directory
+        self._ids = {}
+        self._saved = {}
+        self._manifest = None
+        self._pruned = None
+        self.journals = {}
+
+    def _content_path(self, tab_id):
+        return os.path.join(self.directory, f"{tab_id}.txt.z")
+
+    def _journal_path(self, tab_id):
+        return os.path.join(self.directory, f"{tab_id}.log")
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.directory, MANIFEST))
+
+    def load(self):
+        try:
+            with open(os.path.join(self.directory, MANIFEST), "r", encoding="utf-8") as file:
+                manifest = json.load(file)
+            if manifest.get("version") != VERSION:
+                return [], 0
+            tabs = [SessionTab(entry["id"], entry["path"], entry.get("content", False), entry.get("modified", False),
+                               entry.get("cursor", 0), entry.get("scroll", 0))
+                    for entry in manifest.get("tabs", [])]
+            self._manifest = json.dumps(manifest, sort_keys=True)
+            self._saved = {tab.tab_id: None for tab in tabs if tab.has_content}
+            return tabs, manifest.get("current", 0)
+        except (OSError, ValueError, KeyError, TypeError):
+            return [], 0
+
+    def read_content(self, tab_id):
+        try:
+            with open(self._content_path(tab_id), "rb") as file:
+                return zlib.decompress(file.read()).decode("utf-8")
+        except (OSError, zlib.error, UnicodeDecodeError):
+            return None
+
+    def adopt(self, key, tab, revision):
+        # Ties a restored tab to its stored entry, so its content is not
+        # written again until it is edited.
+        self._ids[key] = tab.tab_id
+        if tab.has_content:
+            self._saved[tab.tab_id] = revision
+
+    def attach(self, key, editor, path, tab=None):
+        # Starts the journal of an editor holding its base text: the file at
+        # path (nothing for untitled tabs), or the stored content of a restored
+        # tab that has some. Edits journaled for a restored tab in an earlier
+        # run are replayed; returns whether there were any.
+        tab_id = tab.tab_id if tab is not None else self._ids.get(key) or new_tab_id()
+        self._ids[key] = tab_id
+        base_path = None if path.startswith("Untitled-") else path
+        if tab is not None and tab.has_content and os.path.exists(self._content_path(tab_id)):
+            base_path = self._content_path(tab_id)
+        base = file_base(base_path)
+        if base is None:
+            return False
+        log_path = self._journal_path(tab_id)
+        records = []
+        if tab is not None:
+            recorded_base, records = read_journal(log_path)
+            if recorded_base != base:
+                records = []
+        applied = replay(editor.document(), records) if records else 0
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            if applied and applied < len(records):
+                # The rest of the journal does not apply to the replayed text;
+                # what was recovered becomes the new base.
+                base = self._write_snapshot(tab_id, editor)
+            resume = bool(records) and applied == len(records)
+            journal = EditJournal(editor, log_path, base, resume=resume)
+        except OSError:
+            return applied > 0
+        self.journals[key] = journal
+        return applied > 0
+
+    def detach(self, key):
+        journal = self.journals.pop(key, None)
+        if journal is not None:
+            journal.close(delete=True)
+
+    def rebase_on_file(self, key, path):
+        # The file now holds the editor's text, so the journal starts over.
+        journal = self.journals.get(key)
+        base = file_base(path)
+        if journal is not None and base is not None:
+            journal.restart(base)
+
+    def _write_snapshot(self, tab_id, editor):
+        text = editor.toPlainText()
+        write_atomic(self._content_path(tab_id), [zlib.compress(text.encode("utf-8"), 1)])
+        self._saved[tab_id] = editor.edit_revision
+        return file_base(self._content_path(tab_id))
+
+    def snapshot(self, key, path, editor):
+        # Stores an editor's text if it is not on disk and returns the entry
+        # that restores it, for tabs that are unloaded while the app runs.
+        tab_id = self._ids.get(key) or new_tab_id()
+        self._ids[key] = tab_id
+        tab = self._write_content(tab_id, path, editor)
+        if tab.has_content:
+            self._saved[tab_id] = editor.edit_revision
+        self.detach(key)
+        return tab
+
+    def _write_content(self, tab_id, path, editor):
+        modified = editor.document().isModified()
+        has_content = path.startswith("Untitled-") or modified
+        if has_content and self._saved.get(tab_id) != editor.edit_revision:
+            text = editor.toPlainText()
+            os.makedirs(self.directory, exist_ok=True)
+            write_atomic(self._content_path(tab_id), [zlib.compress(text.encode("utf-8"), 1)])
+        return SessionTab(tab_id, path, has_content, modified,
+                          editor.textCursor().position(), editor.verticalScrollBar().value())
+
+    def save(self, entries, current):
+        # entries are (key, path, source) per tab in order. source is the
+        # tab's Editor, its SessionTab while it is not materialized, or None
+        # for tabs that have no text in memory yet.
+        os.makedirs(self.directory, exist_ok=True)
+        tabs = []
+        ids = {}
+        saved = {}
+        for key, path, source in entries:
+            tab_id = self._ids.get(key) or new_tab_id()
+            ids[key] = tab_id
+            entry = {"id": tab_id, "path": path}
+            if isinstance(source, SessionTab):
+                if source.has_content:
+                    saved[tab_id] = self._saved.get(tab_id)
+                    entry["content"] = True
+                    entry["modified"] = source.modified
+                entry["cursor"] = source.cursor
+                entry["scroll"] = source.scroll
+            elif key in self.journals:
+                journal = self.journals[key]
+                journal.flush()
+                if journal.size > max(COMPACT_MIN_BYTES, 2 * source.document().characterCount()):
+                    journal.restart(self._write_snapshot(tab_id, source))
+                base_path = journal.base["path"]
+                if base_path != path:
+                    entry["content"] = True
+                    entry["modified"] = source.document().isModified()
+                    if base_path is not None:
+                        saved[tab_id] = self._saved.get(tab_id)
+                entry["cursor"] = source.textCursor().position()
+                entry["scroll"] = source.verticalScrollBar().value()
+            elif source is not None:
+                tab = self._write_content(tab_id, path, source)
+                if tab.has_content:
+                    saved[tab_id] = source.edit_revision
+                    entry["content"] = True
+                    entry["modified"] = tab.modified
+                entry["cursor"] = tab.cursor
+                entry["scroll"] = tab.scroll
+            tabs.append(entry)
+
+        manifest = json.dumps({"version": VERSION, "current": current, "tabs": tabs}, sort_keys=True)
+        if manifest != self._manifest:
+            write_atomic(os.path.join(self.directory, MANIFEST), [manifest.encode("utf-8")])
+            self._manifest = manifest
+        for key in set(self.journals) - set(ids):
+            self.detach(key)
+        # Content and journals of tabs that are gone, and content that is no
+        # longer needed, are removed whenever the set of tabs changes.
+        live = set(ids.values())
+        if self._pruned != (live, set(saved)):
+            for name in os.listdir(self.directory):
+                tab_id, _, suffix = name.partition(".")
+                if suffix in ("txt.z", "log") and (tab_id not in live or suffix == "txt.z" and tab_id not in saved):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+            self._pruned = (live, set(saved))
+        self._ids = ids
+        self._saved = saved
@@ -10,6 +10,9 @@ class Settings:
     def get_open_files(self):
         return self.settings.value("open_files", [])
 
+    def clear_open_files(self):
+        self.settings.remove("open_files")
+
     def save_window_geometry(self, geometry):
         self.settings.setValue("window_geometry", geometry)
 
@@ -32,4 +35,40 @@ class Settings:
         return self.settings.value("theme", "system", type=str)
 
     def set_theme(self, theme):
-        self.settings.setValue("theme", theme)
\ No newline at end of file
+        self.settings.setValue("theme", theme)
+
+    def get_background_highlighting(self):
+        return self.settings.value("background_highlighting", False, type=bool)
+
+    def set_background_highlighting(self, enabled):
+        self.settings.setValue("background_highlighting", enabled)
+
+    def get_folder_index_enabled(self):
+        return self.settings.value("folder_index_enabled", False, type=bool)
+
+    def set_folder_index_enabled(self, enabled):
+        self.settings.setValue("folder_index_enabled", enabled)
+
+    def get_large_file_threshold_mb(self):
+        return self.settings.value("large_file_threshold_mb", 100, type=int)
+
+    def set_large_file_threshold_mb(self, megabytes):
+        self.settings.setValue("large_file_threshold_mb", megabytes)
+
+    def get_memory_budget_mb(self):
+        return self.settings.value("memory_budget_mb", 512, type=int)
+
+    def set_memory_budget_mb(self, megabytes):
+        self.settings.setValue("memory_budget_mb", megabytes)
+
+    def get_follow_max_lines(self):
+        return self.settings.value("follow_max_lines", 100000, type=int)
+
+    def set_follow_max_lines(self, lines):
+        self.settings.setValue("follow_max_lines", lines)
+
+    def get_update_endpoint(self):
+        return self.settings.value("update_endpoint", "", type=str)
+
+    def set_update_endpoint(self, url):
+        self.settings.setValue("update_endpoint", url)
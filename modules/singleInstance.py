@@ -0,0 +1,89 @@
+import getpass
+import hashlib
+import json
+from PyQt6.QtCore import QObject, pyqtSignal
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+# A launch gives up on a running instance that does not answer within this.
+CONNECT_TIMEOUT_MS = 500
+REPLY_TIMEOUT_MS = 2000
+
+
+def server_name():
+    # One instance per user; the name must not clash between users sharing
+    # a machine (or a /tmp).
+    try:
+        user = getpass.getuser()
+    except (OSError, KeyError):
+        user = "user"
+    user = hashlib.sha1(user.encode("utf-8")).hexdigest()[:12]
+    return f"pady-{user}"
+
+
+def forward(paths):
+    # Hands the paths to a running instance. Returns False if there is none,
+    # in which case this launch becomes the instance.
+    socket = QLocalSocket()
+    socket.connectToServer(server_name())
+    if not socket.waitForConnected(CONNECT_TIMEOUT_MS):
+        return False
+    socket.write(json.dumps({"paths": paths}).encode("utf-8") + b"\n")
+    if not socket.waitForBytesWritten(REPLY_TIMEOUT_MS):
+        return False
+    # The instance answers once the request has been read.
+    answered = socket.waitForReadyRead(REPLY_TIMEOUT_MS) and socket.readAll().data().startswith(b"ok")
+    socket.disconnectFromServer()
+    return answered
+
+
+class InstanceServer(QObject):
+    # Listens for later launches and emits the paths they forward.
+    paths_received = pyqtSignal(list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.server = QLocalServer(self)
+        self.server.setSocketOptions(QLocalServer.SocketOption.UserAccessOption)
+        self.server.newConnection.connect(self._accept)
+        self._buffers = {}
+
+    def listen(self):
+        # Fails if another instance got there first.
+        name = server_name()
+        if self.server.listen(name):
+            return True
+        probe = QLocalSocket()
+        probe.connectToServer(name)
+        if probe.waitForConnected(CONNECT_TIMEOUT_MS):
+            probe.disconnectFromServer()
+            return False
+        # A socket left behind by a crashed instance blocks the name.
+        QLocalServer.removeServer(name)
+        return self.server.listen(name)
+
+    def _accept(self):
+        while self.server.hasPendingConnections():
+            socket = self.server.nextPendingConnection()
+            self._buffers[socket] = b""
+            socket.readyRead.connect(lambda socket=socket: self._read(socket))
+            socket.disconnected.connect(lambda socket=socket: self._drop(socket))
+
+    def _read(self, socket):
+        data = self._buffers.get(socket, b"") + socket.readAll().data()
+        if b"\n" not in data:
+            self._buffers[socket] = data
+            return
+        self._buffers[socket] = b""
+        try:
+            paths = json.loads(data.split(b"\n", 1)[0])["paths"]
+            paths = [path for path in paths if isinstance(path, str)]
+        except (ValueError, KeyError, TypeError):
+            socket.write(b"error\n")
+            return
+        socket.write(b"ok\n")
+        socket.flush()
+        self.paths_received.emit(paths)
+
+    def _drop(self, socket):
+        self._buffers.pop(socket, None)
+        socket.deleteLater()
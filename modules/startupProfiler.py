@@ -0,0 +1,123 @@
+import sys
+import time
+from contextlib import contextmanager
+
+# Imports listed in the report, slowest first.
+REPORT_IMPORTS = 20
+
+
+class _TimedLoader:
+    # Wraps a module loader to time create_module (where extension modules do
+    # their work) and exec_module; everything else is passed on.
+    def __init__(self, loader, name, profiler):
+        self._loader = loader
+        self._name = name
+        self._profiler = profiler
+        self._created = (0.0, 0.0)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        module, own, total = self._profiler._timed(self._loader.create_module, spec)
+        self._created = (own, total)
+        return module
+
+    def exec_module(self, module):
+        _, own, total = self._profiler._timed(self._loader.exec_module, module)
+        self._profiler.imports.append((self._name, own + self._created[0], total + self._created[1]))
+
+
+class _ImportTimer:
+    # A meta path finder that asks the finders after it and wraps the loader
+    # of whatever they find.
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self._finding = False
+
+    def find_spec(self, name, path=None, target=None):
+        if self._finding:
+            return None
+        self._finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, name, self.profiler)
+        return spec
+
+
+class StartupProfiler:
+    # Enabled by --profile-startup: times the named startup phases and every
+    # module imported after enable(), and prints both to stderr. Disabled, a
+    # phase costs one attribute check.
+    _shared = None
+
+    def __init__(self):
+        self.enabled = False
+        self.started = time.perf_counter()
+        self.phases = []
+        self.imports = []
+        self._import_stack = []
+        self._finder = None
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def enable(self):
+        self.enabled = True
+        self._finder = _ImportTimer(self)
+        sys.meta_path.insert(0, self._finder)
+
+    def _timed(self, function, argument):
+        # Returns the result with the time spent in the call itself and in
+        # total; time spent in nested imports is not the call's own.
+        self._import_stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            result = function(argument)
+        finally:
+            total = time.perf_counter() - start
+            children = self._import_stack.pop()
+            if self._import_stack:
+                self._import_stack[-1] += total
+        return result, total - children, total
+
+    @contextmanager
+    def phase(self, name):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, start - self.started, time.perf_counter() - start))
+
+    def mark(self, name):
+        if self.enabled:
+            self.phases.append((name, time.perf_counter() - self.started, 0.0))
+
+    def report(self, file=None):
+        if not self.enabled:
+            return
+        if self._finder in sys.meta_path:
+            sys.meta_path.remove(self._finder)
+        file = file or sys.stderr
+        print("Startup profile (ms)            at     took", file=file)
+        for name, at, took in self.phases:
+            print(f"  {name:<28}{at * 1000:>6.1f}  {took * 1000:>7.1f}", file=file)
+        print(f"Slowest imports (ms)          self    total  ({len(self.imports)} modules)", file=file)
+        for name, own, total in sorted(self.imports, key=lambda item: item[1], reverse=True)[:REPORT_IMPORTS]:
+            print(f"  {name:<28}{own * 1000:>6.1f}  {total * 1000:>7.1f}", file=file)
@@ -1,194 +1,183 @@
-import os
-import json
-from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QColor, QFont
-from PyQt6.QtCore import QRegularExpression
+import time
+from PyQt6.QtGui import QSyntaxHighlighter, QTextCursor
+from PyQt6.QtCore import QTimer
+from modules.languageRegistry import LanguageRegistry
+from modules.tokenizer import NORMAL
+from modules.highlightWorker import TokenizeWorker, BlockSpans
+
+# Blocks highlighted per event loop turn before a changed lexer state (an
+# opened or closed block comment, say) stops propagating synchronously. The
+# rest of the cascade continues from a queued cursor on the next turns.
+CASCADE_LIMIT = 200
+
+# Lazy mode: how long one background fill slice may run, and how long the fill
+# stays paused after the user types or scrolls.
+FILL_SLICE = 0.008
+FILL_PAUSE_MS = 300
 
 class SyntaxHighlighter(QSyntaxHighlighter):
+    # When set, new highlighters tokenize on a worker thread and only apply
+    # the cached spans here.
+    use_worker = False
+
     def __init__(self, document, path: str=None):
         super().__init__(document)
         self.path = path
-        self.language = self.get_language_from_path(path)
-        self.colors = self.load_colors()
-        self.highlighting_rules = []
-        self.setup_highlighting()
-
-    def get_language_from_path(self, path):
-        if not path:
-            return "python"
-        ext = os.path.splitext(path)[1].lower()
-        ext_map = {
-            ".py": "python",
-            ".js": "javascript",
-            ".ts": "typescript",
-            ".java": "java",
-            ".cpp": "c++",
-            ".cc": "c++",
-            ".cxx": "c++",
-            ".hpp": "c++",
-            ".h": "c++",
-            ".cs": "c#",
-            ".html": "html",
-            ".htm": "html",
-            ".css": "css"
-        }
-        return ext_map.get(ext, "python")  # fallback to python
-
-    def load_colors(self):
-        json_path = os.path.join(os.path.dirname(__file__), "syntax_colors.json")
-        try:
-            with open(json_path, "r", encoding="utf-8") as f:
-                color_data = json.load(f)
-            return color_data.get(self.language, color_data["python"])
-        except Exception:
-            return {
-                "keyword": "#c678dd",
-                "string": "#98c379",
-                "comment": "#5c6370",
-                "number": "#d19a66",
-                "function": "#61afef",
-                "class": "#e5c07b",
-                "decorator": "#b58900"
-            }
-
-    def setup_highlighting(self):
-        path = self.path
-
-        if path and path.endswith(".py"):
-            keywords = [
-                "and", "as", "assert", "break", "class", "continue", "def", "del", "elif",
-                "else", "except", "False", "finally", "for", "from", "global", "if", "import",
-                "in", "is", "lambda", "None", "nonlocal", "not", "or", "pass", "raise",
-                "return", "True", "try", "while", "with", "yield"
-            ]
-            self.add_keyword_rules(keywords)
-            self.add_rule(r'"[^"\\]*(\\.[^"\\]*)*"', "string")
-            self.add_rule(r"'[^'\\]*(\\.[^'\\]*)*'", "string")
-            self.add_rule(r'#.*', "comment", italic=True)
-            self.add_rule(r'\b\d+(\.\d+)?\b', "number")
-            self.add_rule(r'\bdef\s+([A-Za-z_][A-Za-z0-9_]*)', "function", bold=True)
-            self.add_rule(r'\bclass\s+([A-Za-z_][A-Za-z0-9_]*)', "class", bold=True)
-            self.add_rule(r'@\w+', "decorator")
-
-        elif path and path.endswith((".js", ".ts")):
-            keywords = [
-                "break", "case", "catch", "class", "const", "continue", "debugger", "default", "delete",
-                "do", "else", "export", "extends", "finally", "for", "function", "if", "import", "in",
-                "instanceof", "let", "new", "return", "super", "switch", "this", "throw", "try", "typeof",
-                "var", "void", "while", "with", "yield", "enum", "implements", "interface", "package", "private",
-                "protected", "public", "static", "await", "async"
-            ]
-            self.add_keyword_rules(keywords)
-            self.add_rule(r'"[^"\\]*(\\.[^"\\]*)*"', "string")
-            self.add_rule(r"'[^'\\]*(\\.[^'\\]*)*'", "string")
-            self.add_rule(r'`[^`\\]*(\\.[^`\\]*)*`', "string")
-            self.add_rule(r'//.*', "comment", italic=True)
-            self.add_rule(r'/\*[\s\S]*?\*/', "comment", italic=True)
-            self.add_rule(r'\b\d+(\.\d+)?\b', "number")
-            self.add_rule(r'\bfunction\s+([A-Za-z_][A-Za-z0-9_]*)', "function", bold=True)
-            self.add_rule(r'\bclass\s+([A-Za-z_][A-Za-z0-9_]*)', "class", bold=True)
-
-        elif path and path.endswith(".java"):
-            keywords = [
-                "abstract", "assert", "boolean", "break", "byte", "case", "catch", "char", "class", "const",
-                "continue", "default", "do", "double", "else", "enum", "extends", "final", "finally", "float",
-                "for", "goto", "if", "implements", "import", "instanceof", "int", "interface", "long", "native",
-                "new", "package", "private", "protected", "public", "return", "short", "static", "strictfp",
-                "super", "switch", "synchronized", "this", "throw", "throws", "transient", "try", "void",
-                "volatile", "while", "true", "false", "null"
-            ]
-            self.add_keyword_rules(keywords)
-            self.add_rule(r'"[^"\\]*(\\.[^"\\]*)*"', "string")
-            self.add_rule(r"'[^'\\]*(\\.[^'\\]*)*'", "string")
-            self.add_rule(r'//.*', "comment", italic=True)
-            self.add_rule(r'/\*[\s\S]*?\*/', "comment", italic=True)
-            self.add_rule(r'\b\d+(\.\d+)?\b', "number")
-            self.add_rule(r'\bclass\s+([A-Za-z_][A-Za-z0-9_]*)', "class", bold=True)
-            self.add_rule(r'\b([A-Za-z_][A-Za-z0-9_]*)\s*\(', "function")
-
-        elif path and path.endswith((".cpp", ".h", ".c", ".hpp", ".cc", ".cxx")):
-            keywords = [
-
-                "alignas", "alignof", "and", "and_eq", "asm", "auto", "bitand", "bitor", "bool", "break", "case",
-                "catch", "char", "char16_t", "char32_t", "class", "compl", "const", "constexpr", "const_cast",
-                "continue", "decltype", "default", "delete", "do", "double", "dynamic_cast", "else", "enum",
-                "explicit", "export", "extern", "false", "float", "for", "friend", "goto", "if", "inline", "int",
-                "long", "mutable", "namespace", "new", "noexcept", "not", "not_eq", "nullptr", "operator", "or",
-                "or_eq", "private", "protected", "public", "register", "reinterpret_cast", "return", "short",
-                "signed", "sizeof", "static", "static_assert", "static_cast", "struct", "switch", "template",
-                "this", "thread_local", "throw", "true", "try", "typedef", "typeid", "typename", "union",
-                "unsigned", "using", "virtual", "void", "volatile", "wchar_t", "while", "xor", "xor_eq",
-
-                "abstract", "as", "base", "bool", "break", "byte", "case", "catch", "char", "checked", "class",
-                "const", "continue", "decimal", "default", "delegate", "do", "double", "else", "enum", "event",
-                "explicit", "extern", "false", "finally", "fixed", "float", "for", "foreach", "goto", "if",
-                "implicit", "in", "int", "interface", "internal", "is", "lock", "long", "namespace", "new",
-                "null", "object", "operator", "out", "override", "params", "private", "protected", "public",
-                "readonly", "ref", "return", "sbyte", "sealed", "short", "sizeof", "stackalloc", "static",
-                "string", "struct", "switch", "this", "throw", "true", "try", "typeof", "uint", "ulong",
-                "unchecked", "unsafe", "ushort", "using", "virtual", "void", "volatile", "while"
-            ]
-            self.add_keyword_rules(keywords)
-            self.add_rule(r'"[^"\\]*(\\.[^"\\]*)*"', "string")
-            self.add_rule(r"'[^'\\]*(\\.[^'\\]*)*'", "string")
-            self.add_rule(r'//.*', "comment", italic=True)
-            self.add_rule(r'/\*[\s\S]*?\*/', "comment", italic=True)
-            self.add_rule(r'\b\d+(\.\d+)?\b', "number")
-            self.add_rule(r'\bclass\s+([A-Za-z_][A-ZaZ0-9_]*)', "class", bold=True)
-            self.add_rule(r'\b([A-Za-z_][A-Za-z0-9_]*)\s*\(', "function")
-
-        elif path and path.endswith(".html"):
-            tag_format = QTextCharFormat()
-            tag_format.setForeground(QColor(self.colors.get("tag", "#22863a")))
-            tag_format.setFontWeight(QFont.Weight.Bold)
-            self.highlighting_rules.append((QRegularExpression(r'</?[a-zA-Z][a-zA-Z0-9]*'), tag_format))
-
-            attr_format = QTextCharFormat()
-            attr_format.setForeground(QColor(self.colors.get("attribute", "#6f42c1")))
-            self.highlighting_rules.append((QRegularExpression(r'\b[a-zA-Z-:]+(?=\=)'), attr_format))
-
-            self.add_rule(r'"[^"]*"', "string")
-            self.add_rule(r"'[^']*'", "string")
-            self.add_rule(r'<!--[\s\S]*?-->', "comment", italic=True)
-
-        elif path and path.endswith(".css"):
-
-            selector_format = QTextCharFormat()
-            selector_format.setForeground(QColor(self.colors.get("selector", "#22863a")))
-            selector_format.setFontWeight(QFont.Weight.Bold)
-            self.highlighting_rules.append((QRegularExpression(r'^[\.\#]?[a-zA-Z0-9\-\_]+(?=\s*\{)'), selector_format))
-
-            property_format = QTextCharFormat()
-            property_format.setForeground(QColor(self.colors.get("property", "#005cc5")))
-            self.highlighting_rules.append((QRegularExpression(r'\b[a-zA-Z\-]+(?=\s*:)'), property_format))
-
-            self.add_rule(r'"[^"]*"', "string")
-            self.add_rule(r"'[^']*'", "string")
-            self.add_rule(r'\b\d+(\.\d+)?\b', "number")
-
-            self.add_rule(r'/\*[\s\S]*?\*/', "comment", italic=True)
-
-    def add_keyword_rules(self, keywords):
-        fmt = QTextCharFormat()
-        fmt.setForeground(QColor(self.colors["keyword"]))
-        fmt.setFontWeight(QFont.Weight.Bold)
-        for word in keywords:
-            pattern = QRegularExpression(rf'\b{word}\b')
-            self.highlighting_rules.append((pattern, fmt))
-
-    def add_rule(self, pattern, color_key, bold=False, italic=False):
-        fmt = QTextCharFormat()
-        fmt.setForeground(QColor(self.colors.get(color_key, "#000000")))
-        if bold:
-            fmt.setFontWeight(QFont.Weight.Bold)
-        if italic:
-            fmt.setFontItalic(True)
-        self.highlighting_rules.append((QRegularExpression(pattern), fmt))
+        self.language = LanguageRegistry.shared().language_for_path(path)
+        self.worker = TokenizeWorker(self) if self.use_worker and self.language else None
+        self._pass_count = 0
+        self._pending = []
+
+        # In lazy mode every block before the frontier is fully highlighted.
+        # Blocks past it are only previewed while visible, without touching
+        # their state, until the idle fill reaches them.
+        self._frontier = None
+        self._visible = (0, -1)
+        self._loading = False
+        self._load_count = 0
+        self._filling = False
+        self._fill_deadline = 0
+        self._fill_next = None
+        self._fill_timer = QTimer(self)
+        self._fill_timer.setSingleShot(True)
+        self._fill_timer.timeout.connect(self._fill_step)
+        document.contentsChange.connect(self._pause_fill)
+
+    def begin_lazy(self, first_visible, last_visible):
+        if self.language is None:
+            return
+        self._loading = True
+        self._load_count = 0
+        if self.worker is not None:
+            return
+        self._frontier = QTextCursor(self.document())
+        self._frontier.setKeepPositionOnInsert(True)
+        self._visible = (first_visible, last_visible)
+        self._fill_timer.start(0)
+
+    def defer_from(self, position, first_visible, last_visible):
+        # Before a large edit: the blocks it touches are highlighted when
+        # visible and otherwise by the background fill, as after a load.
+        if self.language is None or self.worker is not None:
+            return
+        if self._frontier is None or position < self._frontier.position():
+            self._frontier = QTextCursor(self.document())
+            self._frontier.setKeepPositionOnInsert(True)
+            self._frontier.setPosition(position)
+        self._visible = (first_visible, last_visible)
+        self._fill_timer.start(FILL_PAUSE_MS)
+
+    def finish_loading(self):
+        # While text is being loaded Qt walks the new blocks in order, so
+        # counting calls is enough to skip everything below the viewport
+        # without asking Qt for block numbers.
+        self._loading = False
+        if self.worker is not None:
+            self.worker.request(self.document().firstBlock())
+
+    def is_lazy(self):
+        return self._frontier is not None
+
+    def set_visible_range(self, first_visible, last_visible):
+        if (first_visible, last_visible) == self._visible:
+            return
+        self._visible = (first_visible, last_visible)
+        if self._frontier is None:
+            return
+        self._pause_fill()
+        block = self.document().findBlockByNumber(max(first_visible, self._frontier.blockNumber()))
+        while block.isValid() and block.blockNumber() <= last_visible:
+            self.rehighlightBlock(block)
+            block = block.next()
 
     def highlightBlock(self, text):
-        for pattern, fmt in self.highlighting_rules:
-            it = pattern.globalMatch(text)
-            while it.hasNext():
-                match = it.next()
-                start = match.capturedStart()
-                length = match.capturedLength()
-                self.setFormat(start, length, fmt)
+        if self.language is None:
+            return
+        if self._loading:
+            self._load_count += 1
+            if self.worker is not None or self._load_count > self._visible[1] + 1:
+                return
+        if self.worker is not None:
+            self._apply_cached()
+            return
+        if self._pass_count == 0:
+            QTimer.singleShot(0, self._end_pass)
+        self._pass_count += 1
+
+        if self._frontier is not None:
+            if self._filling:
+                if time.perf_counter() > self._fill_deadline:
+                    # Leaving the state untouched stops Qt's cascade here.
+                    self._fill_next = self.currentBlock()
+                    self._preview(text)
+                    return
+                self._fill_next = self.currentBlock().next()
+            elif self.currentBlock().blockNumber() >= self._frontier.blockNumber():
+                self._preview(text)
+                return
+
+        spans, state = self.language.tokenizer.tokenize(text, max(self.previousBlockState(), NORMAL))
+        formats = self.language.formats
+        for start, length, kind in spans:
+            self.setFormat(start, length, formats[kind])
+
+        old_state = self.currentBlockState()
+        if state != old_state and old_state != -1 and self._pass_count > CASCADE_LIMIT:
+            # Keeping the old state makes Qt stop here; the block is
+            # highlighted again, with its real state, once this turn is over.
+            if not self._pending:
+                QTimer.singleShot(0, self._resume_cascade)
+            self._pending.append(QTextCursor(self.currentBlock()))
+            return
+        self.setCurrentBlockState(state)
+
+    def _apply_cached(self):
+        data = self.currentBlockUserData()
+        if isinstance(data, BlockSpans):
+            spans = data.spans
+            formats = self.language.formats
+            for i in range(0, len(spans), 3):
+                self.setFormat(spans[i], spans[i + 1], formats[spans[i + 2]])
+            if data.matches(self.currentBlock(), max(self.previousBlockState(), NORMAL)):
+                self.setCurrentBlockState(data.end_state)
+                return
+        # Stale or missing spans stay applied until the worker's result for
+        # this block arrives; the state is left alone so Qt stops here.
+        self.worker.request(self.currentBlock())
+
+    def _preview(self, text):
+        first_visible, last_visible = self._visible
+        if first_visible <= self.currentBlock().blockNumber() <= last_visible:
+            spans, _ = self.language.tokenizer.tokenize(text, max(self.previousBlockState(), NORMAL))
+            formats = self.language.formats
+            for start, length, kind in spans:
+                self.setFormat(start, length, formats[kind])
+
+    def _pause_fill(self, *args):
+        if self._frontier is not None and not self._filling:
+            self._fill_timer.start(FILL_PAUSE_MS)
+
+    def _fill_step(self):
+        block = self._frontier.block()
+        self._fill_next = None
+        self._filling = True
+        self._fill_deadline = time.perf_counter() + FILL_SLICE
+        try:
+            self.rehighlightBlock(block)
+        finally:
+            self._filling = False
+        if self._fill_next is not None and self._fill_next.isValid():
+            self._frontier.setPosition(self._fill_next.position())
+            self._fill_timer.start(0)
+        else:
+            self._frontier = None
+
+    def _end_pass(self):
+        self._pass_count = 0
+
+    def _resume_cascade(self):
+        pending, self._pending = self._pending, []
+        for cursor in pending:
+            block = cursor.block()
+            if block.isValid():
+                self.rehighlightBlock(block)
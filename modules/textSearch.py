@@ -0,0 +1,255 @@
+import os
+import re
+from array import array
+from functools import lru_cache
+
+# Directories never searched; they hold tool state rather than sources.
+SKIP_DIRS = frozenset({".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv"})
+# Files larger than this are skipped, as are files with a NUL byte in their
+# first SNIFF_BYTES.
+MAX_FILE_BYTES = 4 * 1024 * 1024
+SNIFF_BYTES = 8192
+MAX_MATCHES_PER_FILE = 1000
+PREVIEW_CHARS = 200
+
+
+def compile_pattern(text, regex=False, case=False, whole_word=False):
+    # Raises re.error for an invalid regular expression.
+    pattern = text if regex else re.escape(text)
+    if whole_word:
+        pattern = rf"\b(?:{pattern})\b"
+    return re.compile(pattern, 0 if case else re.IGNORECASE)
+
+
+def walk(root, directories=None):
+    # Yields the path, size and modification time (in nanoseconds) of every
+    # file under root that is worth searching, adding the directories it
+    # reads to directories if given. Symlinked directories are not followed.
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except OSError:
+            continue
+        if directories is not None:
+            directories.append(directory)
+        with entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in SKIP_DIRS:
+                            stack.append(entry.path)
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        if 0 < stat.st_size <= MAX_FILE_BYTES:
+                            yield entry.path, stat.st_size, stat.st_mtime_ns
+                except OSError:
+                    continue
+
+
+def _preview(line, column):
+    line = line.rstrip("\r")
+    start = max(column - PREVIEW_CHARS // 4, 0)
+    preview = line[start:start + PREVIEW_CHARS].strip()
+    return ("…" if start else "") + preview
+
+
+def _read_text(path):
+    # The bytes of a file worth searching, or None.
+    try:
+        with open(path, "rb") as file:
+            data = file.read(MAX_FILE_BYTES + 1)
+    except OSError:
+        return None
+    if b"\0" in data[:SNIFF_BYTES] or len(data) > MAX_FILE_BYTES:
+        return None
+    return data
+
+
+def search_file(path, pattern, literal=False, prefilter=None):
+    # The lines of a file with a match as (line, column, preview), counted
+    # from 0; the column is that of the first match in the line. Files the
+    # bytes pattern prefilter finds nothing in are not decoded.
+    data = _read_text(path)
+    if data is None:
+        return []
+    if prefilter is not None and prefilter.search(data) is None:
+        return []
+    text = data.decode("utf-8", "replace")
+    if pattern.search(text) is None:
+        return []
+    matches = []
+    if literal:
+        # A literal match never spans lines, so the whole text is searched
+        # at once and line numbers are counted between matches.
+        line = 0
+        line_start = 0
+        for match in pattern.finditer(text):
+            position = match.start()
+            if matches and position < line_end:
+                continue
+            line += text.count("\n", line_start, position)
+            line_start = text.rfind("\n", 0, position) + 1
+            line_end = text.find("\n", position)
+            if line_end == -1:
+                line_end = len(text)
+            line_text = text[line_start:line_end]
+            matches.append((line, position - line_start, _preview(line_text, position - line_start)))
+            if len(matches) >= MAX_MATCHES_PER_FILE:
+                break
+        return matches
+    for line, line_text in enumerate(text.split("\n")):
+        for match in pattern.finditer(line_text):
+            if match.start() == match.end():
+                continue
+            matches.append((line, match.start(), _preview(line_text, match.start())))
+            break
+        if len(matches) >= MAX_MATCHES_PER_FILE:
+            break
+    return matches
+
+
+@lru_cache(maxsize=8)
+def _compiled(query):
+    # The pattern, and for ASCII literal text the same pattern over bytes:
+    # as UTF-8 keeps ASCII as it is, a file it finds nothing in has no
+    # matches (short of the few non-ASCII letters that fold to ASCII ones).
+    text, regex, case, whole_word = query
+    pattern = compile_pattern(text, regex, case, whole_word)
+    prefilter = None
+    if not regex and text.isascii():
+        prefilter = re.compile(pattern.pattern.encode("ascii"), pattern.flags & re.IGNORECASE)
+    return pattern, prefilter
+
+
+def search_batch(paths, query):
+    # Runs in a worker process: the matches of query, a (text, regex, case,
+    # whole_word) tuple, in each of paths that has any.
+    pattern, prefilter = _compiled(query)
+    results = []
+    for path in paths:
+        matches = search_file(path, pattern, not query[1], prefilter)
+        if matches:
+            results.append((path, matches))
+    return results
+
+
+def _trigrams(data):
+    # The three byte sequences in data as integers. Matches never span
+    # lines, so neither do the trigrams; repeated lines are only taken once.
+    found = set()
+    for line in set(data.split(b"\n")):
+        found.update(zip(line, line[1:], line[2:]))
+    return {a << 16 | b << 8 | c for a, b, c in found}
+
+
+def file_trigrams(path):
+    # The sorted trigrams of a file's lowercased bytes, or None for a file
+    # that is not searched.
+    data = _read_text(path)
+    if data is None:
+        return None
+    return array("I", sorted(_trigrams(data.lower())))
+
+
+def index_batch(paths):
+    # Runs in a worker process: the trigrams of each of paths.
+    return [(path, file_trigrams(path)) for path in paths]
+
+
+def _literal_runs(pattern):
+    # Pieces of text every match of a regular expression contains. Empty
+    # when that cannot be told cheaply, as for any alternation.
+    runs = []
+    current = ""
+    groups = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        i += 1
+        if char == "\\":
+            char = pattern[i:i + 1]
+            i += 1
+            if not char or char in "xuUN" or char.isdigit():
+                # A character by its code or name, or a back reference:
+                # what follows is not literal text.
+                return []
+            if char.isalnum():
+                # A class, an anchor or an escape.
+                runs.append(current)
+                current = ""
+                continue
+        elif char == "[":
+            if pattern[i:i + 1] == "^":
+                i += 1
+            if pattern[i:i + 1] == "]":
+                i += 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+            i += 1
+            runs.append(current)
+            current = ""
+            continue
+        elif char == "|":
+            return []
+        elif char == "(":
+            runs.append(current)
+            current = ""
+            if pattern.startswith("?:", i):
+                i += 2
+            elif pattern.startswith("?P<", i):
+                i = pattern.find(">", i) + 1
+            elif pattern.startswith("?", i):
+                flags = re.match(r"\?[aiLmsux-]*\)", pattern[i:])
+                if flags is None or "x" in flags.group():
+                    # A lookaround, a conditional, or verbose mode, where
+                    # whitespace and comments are not literal text.
+                    return []
+                i += flags.end()
+                continue
+            groups.append(len(runs))
+            continue
+        elif char == ")":
+            runs.append(current)
+            current = ""
+            start = groups.pop() if groups else 0
+            if pattern[i:i + 1] in ("?", "*", "{"):
+                # An optional group: nothing in it is required.
+                del runs[start:]
+            continue
+        elif char in ".^$":
+            runs.append(current)
+            current = ""
+            continue
+        elif char in "?*+{":
+            if char != "+":
+                current = current[:-1]
+            runs.append(current)
+            current = ""
+            if char == "{":
+                i = pattern.find("}", i) + 1 or len(pattern)
+            if pattern[i:i + 1] in ("?", "+"):
+                i += 1
+            continue
+        current += char
+    runs.append(current)
+    return [run for run in runs if run]
+
+
+def query_trigrams(query):
+    # Trigrams a file must contain to match query, a (text, regex, case,
+    # whole_word) tuple, or None if no file can be ruled out.
+    text, regex, case = query[:3]
+    if regex and compile_pattern(text, regex, case).flags & re.IGNORECASE:
+        # Inline flags turned case off.
+        case = False
+    runs = _literal_runs(text) if regex else [text]
+    found = set()
+    for run in runs:
+        for trigram in _trigrams(run.encode("utf-8").lower()):
+            # Without case a non-ASCII letter may match others that lowercase
+            # to different bytes.
+            if case or trigram & 0x808080 == 0:
+                found.add(trigram)
+    return found or None
@@ -1,8 +1,11 @@
-import winreg
-from PyQt6.QtGui import QPalette, QColor
+import sys
+from PyQt6.QtGui import QPalette, QColor, QGuiApplication
 from PyQt6.QtCore import Qt
 
 def get_windows_theme():
+    if sys.platform != "win32":
+        return get_system_theme()
+    import winreg
     is_dark = False
     try:
         registry = winreg.ConnectRegistry(None, winreg.HKEY_CURRENT_USER)
@@ -18,6 +21,10 @@ def get_windows_theme():
         pass
     return "dark" if is_dark else "light"
 
+def get_system_theme():
+    scheme = QGuiApplication.styleHints().colorScheme()
+    return "dark" if scheme == Qt.ColorScheme.Dark else "light"
+
 def apply_theme(app, theme="system", main_window=None):
     app.setStyle("Fusion")
     if theme == "system":
@@ -0,0 +1,83 @@
+import re
+from bisect import bisect_left
+
+ASTRAL = re.compile('[\U00010000-\U0010ffff]')
+
+NORMAL = 0
+
+
+class Tokenizer:
+    # Merges a language's token rules into one alternation of named groups so a
+    # line is scanned once. Rules are listed in priority order: at any position
+    # the first rule that matches wins and the scan resumes after its match, so
+    # the emitted spans never overlap.
+    #
+    # A rule with a close pattern opens a region (block comment, template or
+    # triple-quoted string) that may run past the end of the line. tokenize()
+    # takes the state the previous line ended in and returns the state this
+    # line ends in: NORMAL, or 1 + the index of the region left open.
+    def __init__(self, rules):
+        self.kinds = {}
+        self.regions = []
+        self.region_states = {}
+        alternatives = []
+        for kind, (pattern, close) in enumerate(rules):
+            name = f"t{kind}"
+            self.kinds[name] = kind
+            if close is not None:
+                self.regions.append((re.compile(close, re.ASCII), kind))
+                self.region_states[name] = len(self.regions)
+            alternatives.append(f"(?P<{name}>{pattern})")
+        self.pattern = re.compile("|".join(alternatives), re.ASCII)
+
+    def tokenize(self, text, state=NORMAL):
+        spans = []
+        pos = 0
+        if NORMAL < state <= len(self.regions):
+            close, kind = self.regions[state - 1]
+            end = close.match(text)
+            if end is None:
+                return self._finish(text, [(0, len(text), kind)]), state
+            spans.append((0, end.end(), kind))
+            pos = end.end()
+        kinds = self.kinds
+        region_states = self.region_states
+        search = self.pattern.search
+        length = len(text)
+        while pos < length:
+            m = search(text, pos)
+            if m is None:
+                break
+            start, pos = m.span()
+            name = m.lastgroup
+            if name in region_states:
+                close, kind = self.regions[region_states[name] - 1]
+                end = close.match(text, pos)
+                if end is None:
+                    spans.append((start, length - start, kind))
+                    return self._finish(text, spans), region_states[name]
+                pos = end.end()
+            elif pos == start:
+                pos += 1
+                continue
+            spans.append((start, pos - start, kinds[name]))
+        return self._finish(text, spans), NORMAL
+
+    def _finish(self, text, spans):
+        if spans and not text.isascii():
+            spans = to_utf16(text, spans)
+        return spans
+
+
+def to_utf16(text, spans):
+    # Qt addresses block text in UTF-16 code units; characters outside the BMP
+    # take two of them but only one Python index.
+    astral = [m.start() for m in ASTRAL.finditer(text)]
+    if not astral:
+        return spans
+    converted = []
+    for start, length, kind in spans:
+        before = bisect_left(astral, start)
+        inside = bisect_left(astral, start + length) - before
+        converted.append((start + before, length + inside, kind))
+    return converted
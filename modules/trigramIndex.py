@@ -0,0 +1,279 @@
+import hashlib
+import os
+import pickle
+import threading
+from array import array
+from concurrent.futures import as_completed
+from PyQt6.QtCore import QObject, QRunnable, QTimer, QFileSystemWatcher, QStandardPaths, pyqtSignal
+from modules.fileWriter import write_atomic
+from modules.textSearch import walk, index_batch
+from modules.workerPool import WorkerPool
+
+INDEX_VERSION = 1
+# Changed files are read in this thread when there are this few of them, and
+# in the worker processes in batches of this many otherwise.
+INLINE_FILES = 64
+BATCH_FILES = 256
+# Filesystem events are gathered for this long before the index is checked.
+REFRESH_DELAY_MS = 1000
+# Watching a directory takes a file descriptor (or a handle) each, so only
+# this many are watched.
+MAX_WATCHED_DIRS = 2000
+
+
+def index_path(root):
+    data = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericDataLocation)
+    name = hashlib.sha1(root.encode("utf-8", "surrogatepass")).hexdigest()
+    return os.path.join(data, "Pady", "index", f"{name}.idx")
+
+
+class TrigramIndex:
+    # The files under root that contain each trigram (three bytes of their
+    # lowercased text), as posting lists of file ids. A file that changes is
+    # given a new id rather than being taken out of every list; lists are
+    # only cleaned up once there are more ids dropped than in use.
+    def __init__(self, root):
+        self.root = root
+        # Path to (id, size, mtime); files that are not searched have id -1.
+        self.files = {}
+        self.paths = {}
+        self.postings = {}
+        self.next_id = 0
+        self.dropped = 0
+        self.directories = []
+        self.lock = threading.Lock()
+        self.update_lock = threading.Lock()
+
+    @classmethod
+    def load(cls, root, path):
+        try:
+            with open(path, "rb") as file:
+                state = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+            return None
+        if state.get("version") != INDEX_VERSION or state.get("root") != root:
+            return None
+        index = cls(root)
+        index.files = state["files"]
+        index.postings = state["postings"]
+        index.next_id = state["next_id"]
+        index.dropped = state["dropped"]
+        index.paths = {entry[0]: path for path, entry in index.files.items() if entry[0] >= 0}
+        return index
+
+    def save(self, path):
+        with self.lock:
+            state = {"version": INDEX_VERSION, "root": self.root, "files": self.files,
+                     "postings": self.postings, "next_id": self.next_id, "dropped": self.dropped}
+            data = pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write_atomic(path, [data])
+
+    def update(self, executor=None, is_cancelled=lambda: False):
+        # Brings the index up to date with the files' sizes and times.
+        # Returns whether anything changed.
+        with self.update_lock:
+            seen = set()
+            changed = []
+            directories = []
+            for path, size, mtime in walk(self.root, directories):
+                seen.add(path)
+                entry = self.files.get(path)
+                if entry is None or entry[1] != size or entry[2] != mtime:
+                    changed.append((path, size, mtime))
+            removed = [path for path in self.files if path not in seen]
+            self.directories = directories
+            if is_cancelled():
+                return False
+            with self.lock:
+                for path in removed:
+                    self._drop(path)
+            if len(changed) <= INLINE_FILES or executor is None:
+                self._add(changed, index_batch([path for path, _, _ in changed]))
+            else:
+                futures = {}
+                for i in range(0, len(changed), BATCH_FILES):
+                    batch = changed[i:i + BATCH_FILES]
+                    futures[executor.submit(index_batch, [path for path, _, _ in batch])] = batch
+                try:
+                    for future in as_completed(futures):
+                        if is_cancelled():
+                            return True
+                        self._add(futures[future], future.result())
+                finally:
+                    for future in futures:
+                        future.cancel()
+            if self.dropped > len(self.paths):
+                self._compact()
+            return bool(changed or removed)
+
+    def _drop(self, path):
+        entry = self.files.pop(path, None)
+        if entry is not None and entry[0] >= 0:
+            del self.paths[entry[0]]
+            self.dropped += 1
+
+    def _add(self, files, results):
+        with self.lock:
+            postings = self.postings
+            for (path, size, mtime), (_, trigrams) in zip(files, results):
+                self._drop(path)
+                if trigrams is None:
+                    self.files[path] = (-1, size, mtime)
+                    continue
+                file_id = self.next_id
+                self.next_id += 1
+                self.files[path] = (file_id, size, mtime)
+                self.paths[file_id] = path
+                for trigram in trigrams:
+                    posting = postings.get(trigram)
+                    if posting is None:
+                        postings[trigram] = array("I", (file_id,))
+                    else:
+                        posting.append(file_id)
+
+    def _compact(self):
+        with self.lock:
+            live = self.paths
+            postings = {}
+            for trigram, posting in self.postings.items():
+                posting = array("I", [file_id for file_id in posting if file_id in live])
+                if posting:
+                    postings[trigram] = posting
+            self.postings = postings
+            self.dropped = 0
+
+    def candidates(self, trigrams):
+        # The files that contain every one of trigrams, sorted.
+        with self.lock:
+            postings = []
+            for trigram in trigrams:
+                posting = self.postings.get(trigram)
+                if posting is None:
+                    return []
+                postings.append(posting)
+            postings.sort(key=len)
+            ids = set(postings[0])
+            for posting in postings[1:]:
+                if not ids:
+                    break
+                ids.intersection_update(posting)
+            return sorted(self.paths[file_id] for file_id in ids if file_id in self.paths)
+
+
+class IndexSignals(QObject):
+    finished = pyqtSignal(object, list)
+    failed = pyqtSignal(str)
+
+
+class IndexTask(QRunnable):
+    # Loads the saved index of root (or starts a new one), updates it and
+    # saves it again if anything changed.
+    def __init__(self, root, index=None):
+        super().__init__()
+        self.root = root
+        self.index = index
+        self.cancelled = False
+        self.signals = IndexSignals()
+
+    def run(self):
+        path = index_path(self.root)
+        try:
+            index = self.index or TrigramIndex.load(self.root, path) or TrigramIndex(self.root)
+            if index.update(WorkerPool.shared().executor(), lambda: self.cancelled) and not self.cancelled:
+                index.save(path)
+            if not self.cancelled:
+                self.signals.finished.emit(index, index.directories)
+        except Exception as e:
+            WorkerPool.shared().reset()
+            self.signals.failed.emit(str(e))
+
+
+class FolderIndexer(QObject):
+    # Keeps a trigram index of the explorer's folder so find in files only
+    # has to read the files that can match. The index is built in the
+    # background, kept on disk between runs and updated when files are added
+    # to or removed from the watched directories. As a file changed in place
+    # does not change its directory, searches update it first too; that only
+    # reads the files whose size or time changed.
+    def __init__(self, notepad):
+        super().__init__(notepad)
+        self.notepad = notepad
+        self.root = None
+        self.index = None
+        self.task = None
+        self._again = False
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self._schedule_refresh)
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.setInterval(REFRESH_DELAY_MS)
+        self.refresh_timer.timeout.connect(self.refresh)
+
+    def set_root(self, root):
+        if root == self.root:
+            return
+        self.stop()
+        self.root = root
+        if root:
+            self.notepad.statusBar().showMessage(f"Indexing {root}...", 3000)
+            self.refresh()
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancelled = True
+            self.task = None
+        self.refresh_timer.stop()
+        self._again = False
+        self.root = None
+        self.index = None
+        self._unwatch()
+
+    def index_for(self, root):
+        # The index of root once its first pass is done, otherwise None.
+        if root == self.root:
+            return self.index
+        return None
+
+    def refresh(self):
+        if self.root is None:
+            return
+        if self.task is not None:
+            self._again = True
+            return
+        self.task = IndexTask(self.root, self.index)
+        task = self.task
+        task.signals.finished.connect(lambda index, directories: self._indexed(task, index, directories))
+        task.signals.failed.connect(lambda error: self._failed(task, error))
+        WorkerPool.shared().start(task)
+
+    def _schedule_refresh(self, path):
+        self.refresh_timer.start()
+
+    def _unwatch(self):
+        watched = self.watcher.directories()
+        if watched:
+            self.watcher.removePaths(watched)
+
+    def _indexed(self, task, index, directories):
+        if task is not self.task:
+            return
+        self.task = None
+        if self.index is None:
+            self.notepad.statusBar().showMessage(f"Indexed {len(index.paths)} files in {self.root}", 3000)
+        self.index = index
+        wanted = set(directories[:MAX_WATCHED_DIRS])
+        watched = set(self.watcher.directories())
+        if watched - wanted:
+            self.watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            self.watcher.addPaths(list(wanted - watched))
+        if self._again:
+            self._again = False
+            self.refresh()
+
+    def _failed(self, task, error):
+        if task is not self.task:
+            return
+        self.task = None
+        self.notepad.statusBar().showMessage(f"Indexing failed: {error}", 10000)
@@ -0,0 +1,91 @@
+import json
+import os
+import time
+from PyQt6.QtCore import QObject, QTimer, QUrl, QStandardPaths, pyqtSignal
+from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
+
+CURRENT_VERSION = "1.6.6"
+DEFAULT_ENDPOINT = "https://api.github.com/repos/feketefh/pady/releases/latest"
+# Overrides the endpoint, e.g. to test against a local stub server.
+ENDPOINT_VARIABLE = "PADY_UPDATE_URL"
+TIMEOUT_MS = 5000
+CACHE_TTL = 24 * 60 * 60
+
+
+def parse_version(text):
+    from packaging import version
+    return version.Version(text.strip("pady-"))
+
+
+class UpdateChecker(QObject):
+    # Fetches the latest release asynchronously with a strict timeout. A
+    # successful answer is cached on disk and reused for a day, so the network
+    # is asked at most once per day unless a check is forced.
+    update_available = pyqtSignal(str, str)
+    up_to_date = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, endpoint=None, parent=None):
+        super().__init__(parent)
+        self.endpoint = os.environ.get(ENDPOINT_VARIABLE) or endpoint or DEFAULT_ENDPOINT
+        data = QStandardPaths.writableLocation(QStandardPaths.StandardLocation.GenericDataLocation)
+        self.cache_path = os.path.join(data, "Pady", "update.json")
+        self._network = None
+        self._reply = None
+
+    def check(self, force=False):
+        if self._reply is not None:
+            return
+        cached = None if force else self._read_cache()
+        if cached is not None:
+            QTimer.singleShot(0, lambda: self._report(cached))
+            return
+        if self._network is None:
+            self._network = QNetworkAccessManager(self)
+        request = QNetworkRequest(QUrl(self.endpoint))
+        request.setRawHeader(b"Accept", b"application/vnd.github+json")
+        request.setRawHeader(b"User-Agent", f"Pady/{CURRENT_VERSION}".encode())
+        request.setTransferTimeout(TIMEOUT_MS)
+        self._reply = self._network.get(request)
+        self._reply.finished.connect(self._finished)
+
+    def _finished(self):
+        reply = self._reply
+        self._reply = None
+        reply.deleteLater()
+        if reply.error() != QNetworkReply.NetworkError.NoError:
+            self.failed.emit(reply.errorString())
+            return
+        try:
+            release = json.loads(bytes(reply.readAll()))
+            release = {"tag_name": release["tag_name"], "html_url": release["html_url"]}
+            parse_version(release["tag_name"])
+        except Exception as e:
+            self.failed.emit(f"Unexpected response: {str(e)}")
+            return
+        self._write_cache(release)
+        self._report(release)
+
+    def _report(self, release):
+        if parse_version(release["tag_name"]) > parse_version(CURRENT_VERSION):
+            self.update_available.emit(str(parse_version(release["tag_name"])), release["html_url"])
+        else:
+            self.up_to_date.emit()
+
+    def _read_cache(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as file:
+                cache = json.load(file)
+            if cache["endpoint"] == self.endpoint and 0 <= time.time() - cache["checked"] < CACHE_TTL:
+                return cache["release"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def _write_cache(self, release):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, "w", encoding="utf-8") as file:
+                json.dump({"endpoint": self.endpoint, "checked": time.time(), "release": release}, file)
+        except OSError:
+            pass
@@ -0,0 +1,49 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from PyQt6.QtCore import QThreadPool
+
+# The tasks feeding the workers wait on them for as long as a search or an
+# index pass takes, so they get threads of their own rather than holding up
+# the global pool that files are loaded and saved on.
+TASK_THREADS = 2
+
+
+class WorkerPool:
+    # The worker processes shared by find in files and the folder index.
+    # Workers are spawned rather than forked from this threaded process and
+    # only import the Qt-free search module.
+    _shared = None
+
+    def __init__(self):
+        self.workers = os.cpu_count() or 1
+        self._executor = None
+        self._threads = None
+
+    @classmethod
+    def shared(cls):
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def start(self, task):
+        if self._threads is None:
+            self._threads = QThreadPool()
+            self._threads.setMaxThreadCount(TASK_THREADS)
+        self._threads.start(task)
+
+    def reset(self):
+        # Drops a broken pool; the next caller starts a new one.
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def shutdown(self):
+        if self._threads is not None:
+            self._threads.clear()
+        self.reset()
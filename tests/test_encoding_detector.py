@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.encodingDetector import EncodingDetector
+
+
+def test_cache_keeps_inexact_fallback():
+    detector = EncodingDetector()
+    detector._sniff = lambda sample: None
+    raw = b"caf\xe9\r\n"
+    key = ("/tmp/cafe.txt", len(raw), 1)
+    first = detector.decode(raw, key)
+    second = detector.decode(raw, key)
+    assert (first.encoding, first.exact) == ("latin-1", False)
+    assert (second.encoding, second.exact, second.newline, second.text) == ("latin-1", False, "\r\n", "café\n")
+
+
+def test_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr("modules.encodingDetector.CACHE_SIZE", 4)
+    detector = EncodingDetector()
+    for i in range(10):
+        detector.decode(b"text", ("/tmp/file", 4, i))
+    assert len(detector._cache) == 4
+    detector.forget("/tmp/file")
+    assert not detector._cache
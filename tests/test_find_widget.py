@@ -0,0 +1,43 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication, QTabWidget
+
+from modules.editor import Editor
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def spin(editor):
+    while not editor.search_index.complete:
+        app.processEvents()
+    app.processEvents()
+
+
+def test_switching_tabs_keeps_the_search():
+    tabs = QTabWidget()
+    first, second = Editor(), Editor()
+    tabs.addTab(first, "first")
+    tabs.addTab(second, "second")
+    tabs.show()
+    first.setPlainText("foo\n" * 30)
+    first.show_find_widget()
+    first.find_widget.find_input.setText("foo")
+    first.search()
+    spin(first)
+    assert first.search_index.count() == 30
+
+    tabs.setCurrentIndex(1)
+    tabs.setCurrentIndex(0)
+    app.processEvents()
+    assert first.find_widget.isVisible()
+    assert first.search_index.pattern is not None
+    assert first.search_index.count() == 30
+
+    first.find_widget.close_find()
+    assert not first.find_widget.isVisible()
+    assert first.search_index.pattern is None
+    assert not first.extraSelections()
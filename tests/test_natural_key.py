@@ -0,0 +1,18 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from modules.notepad import natural_key
+
+
+def test_prefix_and_digit_names_compare():
+    names = ["notes2", "file1", "notes", "file", "file10", "File9", "a1b", "a1", "1", "10", "b"]
+    ordered = sorted(names, key=natural_key)
+    assert ordered == ["1", "10", "a1", "a1b", "b", "file", "file1", "File9", "file10", "notes", "notes2"]
+
+
+def test_name_breaks_ties():
+    assert natural_key("File") != natural_key("file")
+    assert sorted(["file", "File"], key=natural_key) == ["File", "file"]
@@ -0,0 +1,17 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.quickOpen import fold, fuzzy_score
+
+
+def test_fold_keeps_positions():
+    for path in ("İstanbul.txt", "ﬁle/ẞtraße.md", "plain/Path.py"):
+        assert len(fold(path)) == len(path)
+
+
+def test_fuzzy_score_with_expanding_lowercase():
+    path = "dir/İstanbul.txt"
+    assert fuzzy_score("btt", path, fold(path), 4) is not None
+    assert fuzzy_score("ist", path, fold(path), 4) > fuzzy_score("dst", path, fold(path), 4)
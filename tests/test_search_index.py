@@ -0,0 +1,15 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.searchIndex import substitute
+
+
+def test_substitute_skips_empty_matches():
+    assert substitute(re.compile("x*"), "axxb\ncd", "-") == ("a-b\ncd", 1)
+
+
+def test_substitute_expands_groups_per_line():
+    assert substitute(re.compile(r"(\w)x$"), "ax\nbx", r"\1-") == ("a-\nb-", 2)
@@ -0,0 +1,38 @@
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.textSearch import compile_pattern, query_trigrams, _trigrams
+
+PATTERNS = [
+    r"\x41bcd", r"\101bcd", r"éabc", r"\U000000e9abc", r"\N{LATIN CAPITAL LETTER A}bcd", r"ab\0cd",
+    r"(?x)foo bar", r"(?x:foo bar)", r"(?i)FOOBAR", r"foo\d+bar", r"fo+bar", r"(foo)?barbaz", r"foo.bar",
+    r"[xyz]foobar", r"foo\sbar", r"foo|bar", r"(?=foo)foobar", r"\bfoobar\b", r"foo{1,2}bar", r"café",
+]
+TEXTS = [
+    "Abcd", "xx abcd", "éabc", "Éabc", "ab\0cd", "foobar", "foo bar", "FOOBAR", "foo12bar", "fooooobar",
+    "barbaz", "foo-bar", "xfoobar", "foo\tbar", "bar", "CAFÉ", "café", "foobar!",
+]
+
+
+def test_query_trigrams_are_in_every_match():
+    # A file is only searched if it has every query trigram, so a text that
+    # matches must have them all.
+    for text in PATTERNS:
+        for case in (False, True):
+            query = (text, True, case, False)
+            trigrams = query_trigrams(query)
+            if trigrams is None:
+                continue
+            pattern = compile_pattern(*query)
+            for sample in TEXTS:
+                if pattern.search(sample):
+                    assert trigrams <= _trigrams(sample.encode("utf-8").lower()), (text, case, sample)
+
+
+def test_literal_query_trigrams():
+    assert query_trigrams(("foobar", False, False, False)) == _trigrams(b"foobar")
+    assert query_trigrams(("fo", False, False, False)) is None
+    assert query_trigrams((re.escape("a.b*c"), True, True, False)) == _trigrams(b"a.b*c")